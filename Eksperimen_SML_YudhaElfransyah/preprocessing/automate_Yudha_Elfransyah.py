@@ -1,12 +1,342 @@
 import pandas as pd
+import numpy as np
+import argparse
+import json
 import os
 
-def preprocess_data(input_path, output_path):
+# Kolom yang tidak dipakai model
+COLS_TO_DROP = ['PassengerId', 'Name', 'Ticket', 'Cabin']
+SEX_MAPPING = {'male': 0, 'female': 1}
+TARGET = 'Survived'
+# Nama file preprocessor yang disimpan di samping data/artefak model
+PREPROCESSOR_FILENAME = 'preprocessor.json'
+# Format kolumnar (Arrow) yang didukung, ditentukan dari ekstensi file output
+COLUMNAR_FORMATS = {'.feather': 'feather', '.arrow': 'feather', '.parquet': 'parquet'}
+
+class QuantileSketch:
+    """
+    Sketch kuantil streaming dengan memori terbatas.
+
+    Selama jumlah nilai <= max_exact, semua nilai disimpan sehingga median
+    identik dengan pandas. Setelah itu sketch beralih ke kompaktor bertingkat
+    (gaya KLL): setiap tingkat yang melebihi k nilai diurutkan dan separuh
+    nilainya (selang-seling) dinaikkan ke tingkat berikutnya dengan bobot dua
+    kali lipat. Memori menjadi O(k * log(n / k)) dengan galat peringkat sekitar
+    O(log(n / k) / k).
+    """
+
+    def __init__(self, max_exact=1_000_000, k=65536, seed=42):
+        self.max_exact = max_exact
+        self.k = k
+        self.count = 0
+        self._exact = []
+        self._levels = None
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, values):
+        """Tambahkan nilai (NaN diabaikan)."""
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return
+        self.count += values.size
+        if self._levels is None:
+            self._exact.append(values)
+            if self.count > self.max_exact:
+                self._levels = [np.concatenate(self._exact)]
+                self._exact = None
+                self._compact()
+        else:
+            self._levels[0] = np.concatenate([self._levels[0], values])
+            self._compact()
+
+    def _compact(self):
+        level = 0
+        while level < len(self._levels):
+            buf = self._levels[level]
+            if buf.size > self.k:
+                buf = np.sort(buf)
+                # Sisakan satu nilai jika ganjil agar bobot total tetap tepat
+                keep = buf[-1:] if buf.size % 2 else buf[:0]
+                buf = buf[:buf.size - keep.size]
+                promoted = buf[self._rng.integers(2)::2]
+                self._levels[level] = keep
+                if level + 1 == len(self._levels):
+                    self._levels.append(promoted)
+                else:
+                    self._levels[level + 1] = np.concatenate([self._levels[level + 1], promoted])
+            level += 1
+
+    def median(self):
+        """Median (tepat selama count <= max_exact, aproksimasi setelahnya)."""
+        if self.count == 0:
+            return np.nan
+        if self._levels is None:
+            return np.median(np.concatenate(self._exact))
+        values = np.concatenate(self._levels)
+        weights = np.concatenate([np.full(buf.size, 2.0 ** level) for level, buf in enumerate(self._levels)])
+        order = np.argsort(values, kind='stable')
+        cumulative = np.cumsum(weights[order])
+        return values[order][np.searchsorted(cumulative, cumulative[-1] / 2.0)]
+
+class TitanicPreprocessor:
+    """
+    Transformer fit/transform untuk data Titanic yang dipakai bersama oleh
+    training dan serving.
+
+    fit() menghitung statistik imputasi (median Age, modus Embarked), dtype
+    kolom, dan kategori Embarked sekali; transform() menerapkannya tanpa
+    menghitung ulang sehingga layout kolom get_dummies(drop_first=True) selalu
+    sama. Hasil fit disimpan sebagai JSON (save/load) di samping data
+    preprocessing dan artefak model.
+    """
+
+    def __init__(self):
+        self.dtypes_ = None
+        self.age_median_ = None
+        self.embarked_mode_ = None
+        self.embarked_categories_ = None
+        self.sex_unmapped_ = False
+        self.n_rows_ = 0
+
+    @staticmethod
+    def _drop_unused(df):
+        return df.drop(columns=[c for c in COLS_TO_DROP if c in df.columns], errors='ignore')
+
+    def fit(self, df):
+        """
+        Hitung statistik dari satu DataFrame mentah (tepat, seperti pandas).
+        Returns:
+            TitanicPreprocessor: self.
+        """
+        df_clean = self._drop_unused(df)
+        self.dtypes_ = dict(df_clean.dtypes)
+        self.n_rows_ = len(df_clean)
+        if 'Age' in df_clean.columns:
+            self.age_median_ = df_clean['Age'].median()
+        if 'Embarked' in df_clean.columns:
+            self.embarked_mode_ = df_clean['Embarked'].mode()[0]
+            self.embarked_categories_ = sorted(df_clean['Embarked'].dropna().unique())
+        if 'Sex' in df_clean.columns:
+            self.sex_unmapped_ = not df_clean['Sex'].isin(SEX_MAPPING.keys()).all()
+        return self
+
+    def fit_chunks(self, chunks):
+        """
+        Hitung statistik secara streaming dari iterable DataFrame mentah.
+        Median Age dihitung dengan QuantileSketch (tepat untuk input kecil) dan
+        modus Embarked dari jumlah nilai per chunk.
+        Returns:
+            TitanicPreprocessor: self.
+        """
+        dtypes = {}
+        age_sketch = QuantileSketch()
+        embarked_counts = {}
+        sex_unmapped = False
+        rows = 0
+
+        for chunk in chunks:
+            chunk = self._drop_unused(chunk)
+            rows += len(chunk)
+            # dtype tiap chunk diinfer terpisah oleh read_csv; gabungkan agar sama
+            # dengan dtype yang diinfer saat seluruh file dibaca sekaligus
+            for col, dtype in chunk.dtypes.items():
+                dtypes[col] = dtype if col not in dtypes else np.result_type(dtypes[col], dtype)
+            if 'Age' in chunk.columns:
+                age_sketch.update(chunk['Age'].to_numpy(dtype=np.float64, na_value=np.nan))
+            if 'Embarked' in chunk.columns:
+                for value, count in chunk['Embarked'].value_counts().items():
+                    embarked_counts[value] = embarked_counts.get(value, 0) + count
+            if 'Sex' in chunk.columns:
+                sex_unmapped = sex_unmapped or not chunk['Sex'].isin(SEX_MAPPING.keys()).all()
+
+        self.dtypes_ = dtypes
+        self.n_rows_ = rows
+        self.sex_unmapped_ = sex_unmapped
+        if 'Age' in dtypes:
+            self.age_median_ = age_sketch.median()
+        if 'Embarked' in dtypes:
+            # Sama seperti Series.mode()[0]: frekuensi tertinggi, nilai terkecil jika seri
+            top = max(embarked_counts.values())
+            self.embarked_mode_ = sorted(v for v, c in embarked_counts.items() if c == top)[0]
+            self.embarked_categories_ = sorted(embarked_counts)
+        return self
+
+    @property
+    def input_columns(self):
+        """Kolom mentah yang dibutuhkan transform (tanpa target)."""
+        return [c for c in self.dtypes_ if c != TARGET]
+
+    @property
+    def feature_columns(self):
+        """Urutan kolom fitur hasil transform (tanpa target)."""
+        columns = [c for c in self.dtypes_ if c not in (TARGET, 'Embarked')]
+        if 'Embarked' in self.dtypes_:
+            columns += [f"Embarked_{c}" for c in self.embarked_categories_[1:]]
+        return columns
+
+    def _impute_encode(self, df_clean):
+        # Isi nilai yang hilang
+        if 'Age' in df_clean.columns:
+            df_clean['Age'] = df_clean['Age'].fillna(self.age_median_)
+        if 'Embarked' in df_clean.columns:
+            df_clean['Embarked'] = df_clean['Embarked'].fillna(self.embarked_mode_)
+
+        # Encoding
+        if 'Sex' in df_clean.columns:
+            df_clean['Sex'] = df_clean['Sex'].map(SEX_MAPPING)
+            if self.sex_unmapped_:
+                df_clean['Sex'] = df_clean['Sex'].astype(np.float64)
+        if 'Embarked' in df_clean.columns:
+            # Nilai di luar kategori akan menjadi NaN di Categorical dan semua
+            # dummy-nya 0, sama persis dengan kategori pertama; tolak di sini
+            unknown = ~df_clean['Embarked'].isna() & ~df_clean['Embarked'].isin(self.embarked_categories_)
+            if unknown.any():
+                raise ValueError(f"Unknown Embarked values {sorted(map(str, df_clean['Embarked'][unknown].unique()))}, "
+                                 f"expected one of {self.embarked_categories_}")
+            # Kategori tetap agar setiap input menghasilkan kolom dummy yang sama
+            df_clean['Embarked'] = pd.Categorical(df_clean['Embarked'], categories=self.embarked_categories_)
+            df_clean = pd.get_dummies(df_clean, columns=['Embarked'], drop_first=True)
+        return df_clean
+
+    def transform(self, df):
+        """
+        Transformasi DataFrame mentah (training) dengan statistik hasil fit.
+        Returns:
+            pd.DataFrame: Data hasil preprocessing, termasuk target jika ada.
+        """
+        df_clean = self._drop_unused(df)
+        df_clean = df_clean.astype({c: self.dtypes_[c] for c in df_clean.columns if c in self.dtypes_})
+        return self._impute_encode(df_clean)
+
+    def fit_transform(self, df):
+        return self.fit(df).transform(df)
+
+    def transform_features(self, records, columns=None):
+        """
+        Transformasi record penumpang mentah (serving) menjadi matriks fitur.
+        Age dan Embarked boleh kosong (diimputasi); kolom lain wajib ada.
+        Args:
+            records (list atau pd.DataFrame): Daftar dict penumpang, mis.
+                {"Pclass": 3, "Sex": "male", "Age": None, "SibSp": 1, "Parch": 0,
+                 "Fare": 7.25, "Embarked": "S"}.
+            columns (list): Urutan kolom yang diharapkan model. Default: feature_columns.
+        Returns:
+            np.array: Matriks float64 berbentuk (n_baris, n_kolom).
+        Raises:
+            ValueError: Jika ada nilai wajib yang hilang atau tidak valid.
+        """
+        df = records if isinstance(records, pd.DataFrame) else pd.DataFrame.from_records(list(records))
+        df = df.reindex(columns=self.input_columns)
+        # Kolom numerik dari JSON bisa bertipe object (None, string); nilai tidak valid menjadi NaN
+        for col in df.columns:
+            if col not in ('Sex', 'Embarked'):
+                df[col] = pd.to_numeric(df[col], errors='coerce')
+        df = self._impute_encode(df)
+        columns = list(columns) if columns is not None else self.feature_columns
+
+        missing = [c for c in columns if c not in df.columns]
+        if missing:
+            raise ValueError(f"Preprocessor does not produce columns: {missing}")
+        try:
+            X = df[columns].to_numpy(dtype=np.float64)
+        except (TypeError, ValueError):
+            raise ValueError("Passenger fields must be numeric except Sex and Embarked")
+        invalid = np.isnan(X).any(axis=0)
+        if invalid.any():
+            raise ValueError(f"Missing or invalid values for: {[columns[i] for i in np.flatnonzero(invalid)]}")
+        return X
+
+    def to_dict(self):
+        return {
+            'dtypes': {col: str(dtype) for col, dtype in self.dtypes_.items()},
+            'age_median': None if self.age_median_ is None else float(self.age_median_),
+            'embarked_mode': self.embarked_mode_,
+            'embarked_categories': self.embarked_categories_,
+            'sex_mapping': SEX_MAPPING,
+            'sex_unmapped': bool(self.sex_unmapped_),
+            'n_rows': int(self.n_rows_),
+            'feature_columns': self.feature_columns,
+        }
+
+    @classmethod
+    def from_dict(cls, config):
+        preprocessor = cls()
+        preprocessor.dtypes_ = {col: pd.api.types.pandas_dtype(dtype) for col, dtype in config['dtypes'].items()}
+        preprocessor.age_median_ = config.get('age_median')
+        preprocessor.embarked_mode_ = config.get('embarked_mode')
+        preprocessor.embarked_categories_ = config.get('embarked_categories')
+        preprocessor.sex_unmapped_ = config.get('sex_unmapped', False)
+        preprocessor.n_rows_ = config.get('n_rows', 0)
+        return preprocessor
+
+    def save(self, path):
+        """Simpan hasil fit sebagai JSON."""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+def columnar_schema(columns):
+    """Schema Arrow eksplisit: fitur float64 (siap dipakai model) dan target int8."""
+    import pyarrow as pa
+    return pa.schema([(col, pa.int8() if col == TARGET else pa.float64()) for col in columns])
+
+def open_columnar_writer(path, schema):
+    """
+    Buka writer kolumnar sesuai ekstensi path (lihat COLUMNAR_FORMATS).
+    Feather/Arrow IPC ditulis tanpa kompresi agar dapat di-memory-map saat training.
+    Returns:
+        Writer dengan method write_table(table) dan close().
+    """
+    import pyarrow as pa
+    fmt = COLUMNAR_FORMATS.get(os.path.splitext(path)[1].lower())
+    if fmt is None:
+        raise ValueError(f"Unsupported columnar format for {path}, expected one of {sorted(COLUMNAR_FORMATS)}")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    if fmt == 'parquet':
+        import pyarrow.parquet as pq
+        return pq.ParquetWriter(path, schema)
+    return pa.ipc.new_file(path, schema)
+
+def to_columnar_table(df, schema):
+    """Ubah DataFrame hasil transform menjadi tabel Arrow dengan schema kolumnar."""
+    import pyarrow as pa
+    return pa.Table.from_arrays(
+        [pa.array(df[field.name].to_numpy(dtype=field.type.to_pandas_dtype())) for field in schema],
+        schema=schema)
+
+def write_columnar(df, path):
+    """Simpan DataFrame hasil preprocessing ke file Feather/Arrow IPC atau Parquet."""
+    schema = columnar_schema(df.columns)
+    writer = open_columnar_writer(path, schema)
+    try:
+        writer.write_table(to_columnar_table(df, schema))
+    finally:
+        writer.close()
+
+def default_columnar_path(output_path):
+    """Lokasi default salinan kolumnar: nama yang sama dengan output CSV, ekstensi .feather."""
+    return f"{os.path.splitext(output_path)[0]}.feather"
+
+def default_preprocessor_path(output_path):
+    """Lokasi default preprocessor.json: di folder yang sama dengan data hasil preprocessing."""
+    return os.path.join(os.path.dirname(os.path.abspath(output_path)), PREPROCESSOR_FILENAME)
+
+def preprocess_data(input_path, output_path, preprocessor_path=None, columnar_path=None):
     """
     Melakukan preprocessing data Titanic secara otomatis.
     Args:
         input_path (str): Path ke file data raw (csv).
         output_path (str): Path untuk menyimpan file data hasil preprocessing (csv).
+        preprocessor_path (str): Path untuk menyimpan preprocessor hasil fit (json).
+            Default: preprocessor.json di folder output.
+        columnar_path (str): Path opsional salinan kolumnar (.feather/.arrow/.parquet)
+            dengan fitur float64 dan target int8.
     Returns:
         pd.DataFrame: Dataframe yang sudah diproses.
     """
@@ -17,44 +347,102 @@ def preprocess_data(input_path, output_path):
         print(f"Error: File {input_path} not found.")
         return None
 
-    # 1. Hapus kolom
-    print("Dropping unnecessary columns...")
-    cols_to_drop = ['PassengerId', 'Name', 'Ticket', 'Cabin']
-    df_clean = df.drop(columns=[c for c in cols_to_drop if c in df.columns], errors='ignore')
+    # 1. Fit statistik (median Age, modus Embarked, layout kolom)
+    print("Fitting preprocessing statistics...")
+    preprocessor = TitanicPreprocessor().fit(df)
 
-    # 2. Isi nilai yang hilang
-    print("Filling missing values...")
-    # Age: median
-    if 'Age' in df_clean.columns:
-        df_clean['Age'] = df_clean['Age'].fillna(df_clean['Age'].median())
-    
-    # Embarked: modus
-    if 'Embarked' in df_clean.columns:
-        mode_embarked = df_clean['Embarked'].mode()[0]
-        df_clean['Embarked'] = df_clean['Embarked'].fillna(mode_embarked)
-
-    # 3. Encoding
-    print("Encoding categorical variables...")
-    # Sex
-    if 'Sex' in df_clean.columns:
-        df_clean['Sex'] = df_clean['Sex'].map({'male': 0, 'female': 1})
-    
-    # Embarked
-    if 'Embarked' in df_clean.columns:
-        df_clean = pd.get_dummies(df_clean, columns=['Embarked'], drop_first=True)
+    # 2. Hapus kolom, isi nilai yang hilang, dan encoding
+    print("Dropping columns, filling missing values and encoding categorical variables...")
+    df_clean = preprocessor.transform(df)
 
     # Simpan
     print(f"Saving processed data to {output_path}...")
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
     df_clean.to_csv(output_path, index=False)
+    if columnar_path:
+        print(f"Saving columnar copy to {columnar_path}...")
+        write_columnar(df_clean, columnar_path)
+    preprocessor_path = preprocessor_path or default_preprocessor_path(output_path)
+    print(f"Saving preprocessor to {preprocessor_path}...")
+    preprocessor.save(preprocessor_path)
     print("Preprocessing completed successfully.")
     
     return df_clean
 
+def preprocess_data_streaming(input_path, output_path, chunksize=100_000, preprocessor_path=None,
+                              columnar_path=None):
+    """
+    Preprocessing data Titanic secara streaming dengan memori terbatas.
+    Pass pertama menghitung statistik global (median Age lewat QuantileSketch,
+    modus Embarked) per chunk; pass kedua mentransformasi dan menambahkan
+    setiap chunk ke file output. Untuk input kecil (<= 1 juta nilai Age)
+    hasilnya identik byte demi byte dengan preprocess_data.
+    Args:
+        input_path (str): Path ke file data raw (csv).
+        output_path (str): Path untuk menyimpan file data hasil preprocessing (csv).
+        chunksize (int): Jumlah baris per chunk.
+        preprocessor_path (str): Path untuk menyimpan preprocessor hasil fit (json).
+        columnar_path (str): Path opsional salinan kolumnar, ditulis per chunk.
+    Returns:
+        dict: Statistik yang dipakai (jumlah baris, median Age, modus Embarked).
+    """
+    print(f"Streaming data from {input_path} in chunks of {chunksize} rows...")
+    if not os.path.exists(input_path):
+        print(f"Error: File {input_path} not found.")
+        return None
+
+    print("Pass 1: computing global statistics...")
+    preprocessor = TitanicPreprocessor().fit_chunks(pd.read_csv(input_path, chunksize=chunksize))
+
+    print("Pass 2: transforming chunks...")
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    tmp_path = f"{output_path}.tmp"
+    columnar_tmp_path = writer = schema = None
+    try:
+        for i, chunk in enumerate(pd.read_csv(input_path, chunksize=chunksize)):
+            df_chunk = preprocessor.transform(chunk)
+            df_chunk.to_csv(tmp_path, mode='w' if i == 0 else 'a', header=(i == 0), index=False)
+            if columnar_path:
+                if writer is None:
+                    schema = columnar_schema(df_chunk.columns)
+                    root, ext = os.path.splitext(columnar_path)
+                    columnar_tmp_path = f"{root}.tmp{ext}"
+                    writer = open_columnar_writer(columnar_tmp_path, schema)
+                writer.write_table(to_columnar_table(df_chunk, schema))
+    finally:
+        if writer is not None:
+            writer.close()
+    os.replace(tmp_path, output_path)
+    if columnar_tmp_path:
+        os.replace(columnar_tmp_path, columnar_path)
+    preprocessor.save(preprocessor_path or default_preprocessor_path(output_path))
+    print(f"Preprocessing completed successfully ({preprocessor.n_rows_} rows).")
+
+    return {
+        'rows': preprocessor.n_rows_,
+        'age_median': preprocessor.age_median_,
+        'embarked_mode': preprocessor.embarked_mode_,
+    }
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Preprocessing data Titanic")
+    parser.add_argument("--input", help="Path file CSV mentah")
+    parser.add_argument("--output", help="Path file CSV hasil preprocessing")
+    parser.add_argument("--chunksize", type=int, default=None,
+                        help="Aktifkan mode streaming dengan jumlah baris per chunk ini")
+    parser.add_argument("--columnar", default=None,
+                        help="Path salinan kolumnar (.feather/.arrow/.parquet). Default: <output>.feather")
+    parser.add_argument("--no-columnar", action="store_true", help="Hanya tulis CSV")
+    args = parser.parse_args()
+
     # Tentukan path relatif terhadap eksekusi script ini atau absolut
     base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    input_file = os.path.join(base_dir, 'titanic_raw', 'train.csv')
-    output_file = os.path.join(base_dir, 'preprocessing', 'train_processed.csv')
+    input_file = args.input or os.path.join(base_dir, 'titanic_raw', 'train.csv')
+    output_file = args.output or os.path.join(base_dir, 'preprocessing', 'train_processed.csv')
     
-    preprocess_data(input_file, output_file)
+    columnar_file = None if args.no_columnar else (args.columnar or default_columnar_path(output_file))
+
+    if args.chunksize:
+        preprocess_data_streaming(input_file, output_file, chunksize=args.chunksize, columnar_path=columnar_file)
+    else:
+        preprocess_data(input_file, output_file, columnar_path=columnar_file)
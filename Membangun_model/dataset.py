@@ -0,0 +1,68 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# Nama dataset hasil preprocessing (tanpa ekstensi) dan folder pencariannya
+DATASET_NAME = 'titanic_preprocessing'
+SEARCH_DIRS = ['.', 'Membangun_model']
+TARGET = 'Survived'
+
+# Urutan preferensi format: Feather/Arrow IPC (memory-map tanpa salinan),
+# Parquet (kolumnar, tetap perlu decode), lalu CSV (kompatibilitas)
+FORMAT_PREFERENCE = ['.feather', '.arrow', '.parquet', '.csv']
+
+
+def find_dataset(name=DATASET_NAME, search_dirs=SEARCH_DIRS):
+    """
+    Cari file dataset terbaru di folder pertama yang memilikinya.
+    Salinan kolumnar yang lebih lama dari CSV (mis. CSV dibuat ulang tanpa
+    menulis ulang Feather) sudah basi, jadi file dengan mtime terbaru yang
+    dipakai; jika mtime sama, format dengan preferensi tertinggi menang.
+    Returns:
+        str: Path file dataset.
+    Raises:
+        FileNotFoundError: Jika tidak ada format yang ditemukan.
+    """
+    for directory in search_dirs:
+        candidates = [(os.path.getmtime(path), -rank, path)
+                      for rank, path in enumerate(os.path.join(directory, name + ext) for ext in FORMAT_PREFERENCE)
+                      if os.path.exists(path)]
+        if candidates:
+            return max(candidates)[2]
+    raise FileNotFoundError(f"{name}{{{','.join(FORMAT_PREFERENCE)}}} not found in {search_dirs}")
+
+
+def read_dataset(path):
+    """
+    Baca dataset hasil preprocessing menjadi DataFrame dengan fitur float64.
+    File Feather/Arrow IPC tanpa kompresi di-memory-map: kolom fitur float64
+    dipakai langsung dari halaman file tanpa parse dan tanpa astype.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext in ('.feather', '.arrow'):
+        import pyarrow as pa
+        table = pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+        # split_blocks: satu blok per kolom sehingga kolom float64 tidak disalin ke blok 2D
+        return table.to_pandas(split_blocks=True)
+    if ext == '.parquet':
+        import pyarrow.parquet as pq
+        return pq.read_table(path, memory_map=True).to_pandas(split_blocks=True)
+
+    df = pd.read_csv(path)
+    # CSV tidak menyimpan dtype: ubah fitur ke float untuk hindari peringatan skema MLflow
+    features = [c for c in df.columns if c != TARGET]
+    return df.astype({c: np.float64 for c in features})
+
+
+def load_dataset(name=DATASET_NAME, search_dirs=SEARCH_DIRS):
+    """
+    Muat dataset training dari format terbaik yang tersedia.
+    Returns:
+        tuple: (X, y, path) dengan X DataFrame fitur float64 dan y Series target.
+    """
+    path = find_dataset(name, search_dirs)
+    df = read_dataset(path)
+    # pop (bukan drop) agar kolom fitur yang di-memory-map tidak disalin
+    y = df.pop(TARGET)
+    return df, y, path
@@ -1,4 +1,3 @@
-import pandas as pd
 import mlflow
 import mlflow.sklearn
 import logging
@@ -6,6 +5,7 @@ import os
 from sklearn.model_selection import train_test_split
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
+from dataset import load_dataset
 
 # Setup logging
 def setup_logging():
@@ -21,28 +21,25 @@ def setup_logging():
         ]
     )
 
+def find_preprocessor():
+    """Cari preprocessor.json hasil preprocessing (dari folder ini atau dari root)."""
+    for path in ['preprocessor.json', 'Membangun_model/preprocessor.json']:
+        if os.path.exists(path):
+            return path
+    return None
+
 def train_model():
     setup_logging()
     logging.info("Starting training pipeline...")
 
-    # Muat data
+    # Muat data (Feather di-memory-map jika tersedia, CSV sebagai fallback)
     logging.info("Loading data...")
     try:
-        df = pd.read_csv('titanic_preprocessing.csv')
-        logging.info("Data loaded from current directory.")
+        X, y, data_path = load_dataset()
+        logging.info(f"Data loaded from {data_path}.")
     except FileNotFoundError:
-        # Fallback jika dijalankan dari root
-        try:
-            df = pd.read_csv('Membangun_model/titanic_preprocessing.csv')
-            logging.info("Data loaded from Membangun_model directory.")
-        except FileNotFoundError:
-            logging.error("titanic_preprocessing.csv not found!")
-            raise
-    
-    X = df.drop('Survived', axis=1)
-    # Ubah ke float untuk hindari peringatan skema MLflow tentang kolom integer
-    X = X.astype(float)
-    y = df['Survived']
+        logging.error("titanic_preprocessing dataset not found!")
+        raise
     
     # Bagi data
     logging.info("Splitting data...")
@@ -69,5 +66,13 @@ def train_model():
         mlflow.sklearn.log_model(model, "model", signature=signature)
         logging.info("Model logged to MLflow.")
 
+        # Simpan preprocessor di samping artefak model agar serving dapat menerima data mentah
+        preprocessor_path = find_preprocessor()
+        if preprocessor_path:
+            mlflow.log_artifact(preprocessor_path, artifact_path="model")
+            logging.info("Preprocessor logged to MLflow.")
+        else:
+            logging.warning("preprocessor.json not found, model logged without preprocessor.")
+
 if __name__ == "__main__":
     train_model()
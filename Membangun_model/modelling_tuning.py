@@ -1,16 +1,471 @@
-import pandas as pd
 import mlflow
 import mlflow.sklearn
-from sklearn.model_selection import train_test_split
+from mlflow.entities import Metric
+from mlflow.tracking import MlflowClient
+from sklearn.model_selection import StratifiedKFold, train_test_split
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, confusion_matrix
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 import seaborn as sns
+import numpy as np
+import concurrent.futures
+import itertools
+import logging
+import math
+import multiprocessing
 import os
+import shutil
+import tempfile
+import time
 import dagshub
 import argparse
+from dataset import load_dataset
+
+# Strategi pencarian hyperparameter
+SEARCH_STRATEGIES = ("grid", "random", "halving")
+# Mode logging MLflow: "full" (model + artefak di setiap run) atau "cheap"
+# (model hanya untuk run yang mengalahkan skor terbaik, artefak di background)
+LOGGING_MODES = ("full", "cheap")
+
+# State per proses untuk evaluate_config (diisi init_worker di setiap worker,
+# atau di proses utama pada mode sekuensial)
+_worker_state = {}
+
+def init_worker(data, tracking_uri, experiment_id, parent_run_id=None, preprocessor_path=None,
+                logging_mode="full", signature=None, best_score=None, pip_requirements=None, cv=None):
+    """
+    Siapkan proses (worker) untuk mengevaluasi konfigurasi.
+    Args:
+        data (tuple): (X_train, X_test, y_train, y_test, urutan subsampel X_train).
+        tracking_uri (str): Tracking URI MLflow proses utama.
+        experiment_id (str): Eksperimen tempat run dibuat.
+        parent_run_id (str): Run induk; jika ada, setiap run menjadi child run-nya.
+        preprocessor_path (str): preprocessor.json yang dilog bersama model.
+        logging_mode (str): Salah satu LOGGING_MODES.
+        signature (ModelSignature): Signature model yang dihitung sekali per dataset (mode cheap).
+        best_score (multiprocessing.Value): Akurasi terbaik yang dibagi antar worker (mode cheap).
+        pip_requirements (list): Requirement model yang ditentukan sekali (mode cheap); tanpa ini
+            log_model menginferensi requirement lewat subprocess di setiap run.
+        cv (tuple): (X, y, path fold_ids.npy) untuk mode k-fold; fold_ids dibuka sebagai memmap
+            read-only sehingga semua worker membaca halaman file yang sama.
+    """
+    mlflow.set_tracking_uri(tracking_uri)
+    _worker_state.update(
+        data=data,
+        experiment_id=experiment_id,
+        parent_run_id=parent_run_id,
+        preprocessor_path=preprocessor_path,
+        logging_mode=logging_mode,
+        signature=signature,
+        best_score=best_score,
+        pip_requirements=pip_requirements,
+        cv_data=cv[:2] if cv else None,
+        fold_ids=np.load(cv[2], mmap_mode='r') if cv else None,
+        fold_splits={},
+    )
+
+def make_run_name(params):
+    """Nama run dari parameter, mis. RF_n50_d5 (parameter non-default ditambahkan)."""
+    name = f"RF_n{params['n_estimators']}_d{params['max_depth']}"
+    if params.get('min_samples_leaf', 1) != 1:
+        name += f"_l{params['min_samples_leaf']}"
+    return name
+
+def render_confusion_matrix(cm, run_name, run_id):
+    """
+    Render confusion matrix ke temp_artifacts/<run_id>/confusion_matrix.png.
+    Memakai API objek matplotlib (tanpa pyplot) sehingga aman dipanggil dari
+    thread background dan worker paralel tidak saling menimpa file. Folder run
+    dihapus lewat log_and_remove setelah diupload.
+    Returns:
+        str: Path file gambar.
+    """
+    fig = Figure(figsize=(6,4))
+    ax = fig.subplots()
+    sns.heatmap(cm, annot=True, fmt='d', cmap='Blues', ax=ax)
+    ax.set_title(f'Confusion Matrix {run_name}')
+    ax.set_ylabel('True Label')
+    ax.set_xlabel('Predicted Label')
+
+    # Simpan plot sementara
+    cm_dir = os.path.join("temp_artifacts", run_id)
+    os.makedirs(cm_dir, exist_ok=True)
+    cm_path = os.path.join(cm_dir, "confusion_matrix.png")
+    fig.savefig(cm_path)
+    return cm_path
+
+def log_and_remove(log_artifact, path):
+    """Upload file artefak sementara lalu hapus folder run-nya (temp_artifacts/<run_id>)."""
+    try:
+        log_artifact(path)
+    finally:
+        shutil.rmtree(os.path.dirname(path), ignore_errors=True)
+
+class ArtifactUploader:
+    """
+    Render dan upload artefak run di thread pool background (mode cheap).
+    Run sudah selesai saat artefak diupload, jadi upload memakai MlflowClient
+    dengan run_id eksplisit, bukan run aktif.
+    """
+
+    def __init__(self, max_workers=4):
+        self._client = MlflowClient()
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers,
+                                                               thread_name_prefix="artifact-upload")
+        self._futures = []
+
+    def _upload_confusion_matrix(self, cm, run_name, run_id):
+        log_and_remove(lambda path: self._client.log_artifact(run_id, path),
+                       render_confusion_matrix(cm, run_name, run_id))
+
+    def submit(self, result):
+        """Antrekan artefak untuk satu hasil evaluate_config (jika ada)."""
+        if result.get("confusion_matrix") is not None:
+            self._futures.append(self._executor.submit(
+                self._upload_confusion_matrix, np.asarray(result["confusion_matrix"]),
+                result["run_name"], result["run_id"]))
+
+    def close(self):
+        """Tunggu semua upload selesai; kegagalan upload dicatat tanpa menggagalkan pencarian."""
+        for future in concurrent.futures.as_completed(self._futures):
+            if future.exception() is not None:
+                logging.warning("Artifact upload failed: %s", future.exception())
+        self._executor.shutdown()
+
+def _run_tags(tags=None):
+    """Tag run: tag tambahan ditambah parentRunId jika pencarian memakai run induk."""
+    tags = dict(tags or {})
+    if _worker_state['parent_run_id']:
+        tags['mlflow.parentRunId'] = _worker_state['parent_run_id']
+    return tags
+
+def claim_best(score):
+    """Catat score sebagai terbaik jika mengalahkan skor terbaik antar worker; True jika menang."""
+    best_score = _worker_state['best_score']
+    with best_score.get_lock():
+        if score > best_score.value:
+            best_score.value = score
+            return True
+    return False
+
+def score_and_log(model, run, run_name, X_train, log_artifacts=True):
+    """
+    Evaluasi model terlatih pada data test lalu log metrik (dan artefak) ke run aktif.
+    Returns:
+        dict: Metrik, ditambah "confusion_matrix" jika artefak dirender di background.
+    """
+    _, X_test, _, y_test, _ = _worker_state['data']
+    y_pred = model.predict(X_test)
+
+    # Logging Manual: Metrik (Sama seperti autolog)
+    metrics = {
+        "accuracy": accuracy_score(y_test, y_pred),
+        "precision": precision_score(y_test, y_pred),
+        "recall": recall_score(y_test, y_pred),
+        "f1_score": f1_score(y_test, y_pred),
+    }
+    mlflow.log_metrics(metrics)
+
+    print(f"Run: {run_name} -> Accuracy: {metrics['accuracy']}")
+
+    start = time.perf_counter()
+    cm = confusion_matrix(y_test, y_pred)
+    extra = {}
+    if log_artifacts and _worker_state['logging_mode'] == "cheap":
+        # Confusion matrix dirender dan diupload proses utama di background;
+        # model lengkap hanya dilog jika mengalahkan run terbaik sejauh ini
+        extra["confusion_matrix"] = cm.tolist()
+        extra["model_logged"] = claim_best(metrics["accuracy"])
+        if extra["model_logged"]:
+            mlflow.sklearn.log_model(model, "model", signature=_worker_state['signature'],
+                                     pip_requirements=_worker_state['pip_requirements'])
+            if _worker_state['preprocessor_path']:
+                mlflow.log_artifact(_worker_state['preprocessor_path'], artifact_path="model")
+        mlflow.set_tag("model_logged", str(extra["model_logged"]).lower())
+    elif log_artifacts:
+        # Advanced: Log Artefak (Confusion Matrix)
+        log_and_remove(mlflow.log_artifact, render_confusion_matrix(cm, run_name, run.info.run_id))
+
+        # Log model
+        # Poin 5: Manual logging model (instead of autolog)
+        signature = mlflow.models.infer_signature(X_train, model.predict(X_train))
+        mlflow.sklearn.log_model(model, "model", signature=signature)
+        # Preprocessor di samping model agar serving dapat menerima data mentah
+        if _worker_state['preprocessor_path']:
+            mlflow.log_artifact(_worker_state['preprocessor_path'], artifact_path="model")
+    mlflow.log_metric("logging_seconds", time.perf_counter() - start)
+    return {**metrics, **extra}
+
+def evaluate_config(params, run_name, n_samples=None, log_artifacts=True, tags=None):
+    """
+    Latih dan evaluasi satu konfigurasi dalam satu run MLflow.
+    Args:
+        params (dict): Parameter RandomForestClassifier.
+        run_name (str): Nama run MLflow.
+        n_samples (int): Jika diisi, latih hanya pada subsampel sebesar ini (successive halving).
+        log_artifacts (bool): Log confusion matrix dan model (False untuk ronde halving awal).
+        tags (dict): Tag tambahan untuk run.
+    Returns:
+        dict: Nama run, run_id, parameter, metrik, dan waktu fit.
+    """
+    X_train, _, y_train, _, order = _worker_state['data']
+    if n_samples is not None:
+        X_train, y_train = X_train.iloc[order[:n_samples]], y_train.iloc[order[:n_samples]]
+
+    with mlflow.start_run(run_name=run_name, experiment_id=_worker_state['experiment_id'],
+                          tags=_run_tags(tags)) as run:
+        # Poin 5: Manual Logging (Metrics & Params)
+
+        # Logging Manual: Parameter
+        mlflow.log_params(params)
+        if n_samples is not None:
+            mlflow.log_param("n_samples", n_samples)
+
+        model = RandomForestClassifier(**params, random_state=42)
+        start = time.perf_counter()
+        model.fit(X_train, y_train)
+        fit_time = time.perf_counter() - start
+        mlflow.log_metric("fit_time_seconds", fit_time)
+
+        metrics = score_and_log(model, run, run_name, X_train, log_artifacts)
+
+    return {"run_name": run_name, "run_id": run.info.run_id, "params": params,
+            "fit_time": fit_time, **metrics}
+
+def evaluate_ladder(base_params, sizes, log_artifacts=True):
+    """
+    Evaluasi satu tangga n_estimators dengan menumbuhkan satu forest (warm_start).
+    Setiap ukuran di `sizes` dicatat sebagai run sendiri. Forest hanya ditambah
+    pohon baru sebanyak selisih ukuran, dan hasilnya identik dengan melatih dari
+    awal dengan random_state yang sama: sklearn memajukan RNG sebanyak pohon yang
+    sudah ada sebelum membuat seed pohon baru.
+    Args:
+        base_params (dict): Parameter selain n_estimators.
+        sizes (list): Ukuran n_estimators yang dievaluasi (diurutkan naik).
+    Returns:
+        list: Hasil per ukuran (format sama dengan evaluate_config), dengan
+            fit_time berupa waktu fit marginal.
+    """
+    X_train, _, y_train, _, _ = _worker_state['data']
+    model = RandomForestClassifier(**base_params, warm_start=True, random_state=42)
+    results = []
+    previous_size, cumulative_fit_time = 0, 0.0
+    for size in sorted(sizes):
+        params = {"n_estimators": size, **base_params}
+        run_name = make_run_name(params)
+        with mlflow.start_run(run_name=run_name, experiment_id=_worker_state['experiment_id'],
+                              tags=_run_tags({"warm_start_from": str(previous_size)})) as run:
+            mlflow.log_params(params)
+
+            # Hanya pohon ke-(previous_size + 1) sampai ke-size yang dilatih
+            model.set_params(n_estimators=size)
+            start = time.perf_counter()
+            model.fit(X_train, y_train)
+            fit_time = time.perf_counter() - start
+            cumulative_fit_time += fit_time
+            mlflow.log_metrics({"fit_time_seconds": fit_time, "cumulative_fit_time_seconds": cumulative_fit_time})
+
+            metrics = score_and_log(model, run, run_name, X_train, log_artifacts)
+        results.append({"run_name": run_name, "run_id": run.info.run_id, "params": params,
+                        "fit_time": fit_time, **metrics})
+        previous_size = size
+    return results
+
+def group_ladders(configs):
+    """
+    Kelompokkan konfigurasi berdasarkan semua parameter kecuali n_estimators.
+    Returns:
+        list: (parameter dasar, daftar n_estimators) dalam urutan kemunculan pertama.
+    """
+    ladders = {}
+    for params in configs:
+        base = tuple((k, v) for k, v in params.items() if k != "n_estimators")
+        ladders.setdefault(base, []).append(params["n_estimators"])
+    return [(dict(base), sizes) for base, sizes in ladders.items()]
+
+def make_fold_ids(y, n_folds, seed=42):
+    """Nomor fold (0..n_folds-1) per baris dari StratifiedKFold, dihitung sekali untuk semua config."""
+    fold_ids = np.empty(len(y), dtype=np.int8)
+    splitter = StratifiedKFold(n_splits=n_folds, shuffle=True, random_state=seed)
+    for fold, (_, test_idx) in enumerate(splitter.split(np.zeros(len(y)), y)):
+        fold_ids[test_idx] = fold
+    return fold_ids
+
+def fold_split(fold):
+    """
+    Data train/test satu fold. Split di-cache per worker sehingga config lain
+    pada fold yang sama tidak mengulang indexing.
+    """
+    splits = _worker_state['fold_splits']
+    if fold not in splits:
+        X, y = _worker_state['cv_data']
+        test_mask = np.asarray(_worker_state['fold_ids']) == fold
+        train_idx, test_idx = np.flatnonzero(~test_mask), np.flatnonzero(test_mask)
+        splits[fold] = (X.iloc[train_idx], X.iloc[test_idx], y.iloc[train_idx], y.iloc[test_idx])
+    return splits[fold]
+
+def evaluate_fold(run_id, params, fold):
+    """
+    Latih dan evaluasi satu config pada satu fold (tanpa akses MLflow; metrik
+    dilog proses utama ke run config).
+    Returns:
+        dict: run_id, fold, metrik, dan waktu fit.
+    """
+    X_train, X_test, y_train, y_test = fold_split(fold)
+    model = RandomForestClassifier(**params, random_state=42)
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_time = time.perf_counter() - start
+    y_pred = model.predict(X_test)
+    return {
+        "run_id": run_id, "fold": fold, "fit_time": fit_time,
+        "accuracy": accuracy_score(y_test, y_pred),
+        "precision": precision_score(y_test, y_pred),
+        "recall": recall_score(y_test, y_pred),
+        "f1_score": f1_score(y_test, y_pred),
+    }
+
+def run_cv_search(configs, n_folds, experiment_id, parent_run_id, executor=None):
+    """
+    Evaluasi setiap config dengan k-fold. Satu run MLflow per config (child dari
+    parent_run_id) berisi metrik per fold (step = nomor fold) serta mean/std;
+    job fold x config dijalankan paralel jika executor diberikan.
+    Returns:
+        list: Hasil per config dengan metrik rata-rata (format sama dengan evaluate_config).
+    """
+    client = MlflowClient()
+    run_ids = []
+    for params in configs:
+        run = client.create_run(experiment_id, run_name=make_run_name(params),
+                                tags={"mlflow.parentRunId": parent_run_id, "cv_folds": str(n_folds)})
+        for key, value in params.items():
+            client.log_param(run.info.run_id, key, value)
+        run_ids.append(run.info.run_id)
+
+    jobs = [((run_id, params, fold), {}) for run_id, params in zip(run_ids, configs) for fold in range(n_folds)]
+    fold_results = run_jobs(jobs, executor, fn=evaluate_fold)
+
+    results = []
+    for run_id, params in zip(run_ids, configs):
+        folds = sorted((r for r in fold_results if r["run_id"] == run_id), key=lambda r: r["fold"])
+        timestamp = int(time.time() * 1000)
+        metrics, summary = [], {}
+        for name in ("accuracy", "precision", "recall", "f1_score", "fit_time"):
+            values = np.array([r[name] for r in folds])
+            summary[name], summary[f"{name}_std"] = float(values.mean()), float(values.std())
+            metrics += [Metric(f"fold_{name}", float(v), timestamp, fold) for fold, v in enumerate(values)]
+            metrics += [Metric(f"{name}_mean", summary[name], timestamp, 0),
+                        Metric(f"{name}_std", summary[f"{name}_std"], timestamp, 0)]
+        # "accuracy" dkk. = rata-rata fold agar sebanding dengan run holdout
+        metrics += [Metric(name, summary[name], timestamp, 0) for name in ("accuracy", "precision", "recall", "f1_score")]
+        client.log_batch(run_id, metrics=metrics)
+        client.set_terminated(run_id)
+        print(f"Run: {make_run_name(params)} -> CV Accuracy: {summary['accuracy']:.4f} "
+              f"+/- {summary['accuracy_std']:.4f}")
+        results.append({"run_name": make_run_name(params), "run_id": run_id, "params": params, **summary})
+    return results
+
+def build_grid(n_estimators_list, max_depth_list, min_samples_leaf_list=(1,)):
+    """Semua kombinasi parameter (urutan sama dengan loop bersarang sebelumnya)."""
+    return [
+        {"n_estimators": n_est, "max_depth": depth, "min_samples_leaf": leaf}
+        if leaf != 1 else {"n_estimators": n_est, "max_depth": depth}
+        for n_est, depth, leaf in itertools.product(n_estimators_list, max_depth_list, min_samples_leaf_list)
+    ]
+
+def sample_configs(grid, n_iter, seed=42):
+    """Ambil n_iter konfigurasi acak (tanpa pengembalian) dari grid."""
+    if n_iter >= len(grid):
+        return list(grid)
+    rng = np.random.default_rng(seed)
+    return [grid[i] for i in sorted(rng.choice(len(grid), size=n_iter, replace=False))]
+
+def halving_schedule(n_configs, n_train, factor=3, min_resources=20):
+    """
+    Jadwal successive halving: daftar (jumlah kandidat, jumlah sampel) per ronde.
+    Setiap ronde menyisakan 1/factor kandidat terbaik dan melipatgandakan jumlah
+    sampel dengan factor; ronde terakhir memakai seluruh data train.
+    """
+    if factor < 2:
+        raise ValueError(f"Halving factor must be at least 2, got {factor}")
+    candidates = [n_configs]
+    while candidates[-1] >= factor:
+        candidates.append(math.ceil(candidates[-1] / factor))
+    n_rounds = len(candidates)
+    return [
+        (n, n_train if i == n_rounds - 1 else max(min_resources, n_train // factor ** (n_rounds - 1 - i)))
+        for i, n in enumerate(candidates)
+    ]
+
+def run_jobs(jobs, executor=None, fn=evaluate_config, on_result=None):
+    """
+    Jalankan fn untuk setiap job (args, kwargs).
+    Dengan executor, job dievaluasi paralel; hasil tetap dalam urutan job.
+    on_result dipanggil untuk setiap hasil segera setelah job selesai.
+    """
+    if executor is None:
+        results = []
+        for args, kwargs in jobs:
+            results.append(fn(*args, **kwargs))
+            if on_result:
+                on_result(results[-1])
+        return results
+    futures = [executor.submit(fn, *args, **kwargs) for args, kwargs in jobs]
+    if on_result:
+        for future in concurrent.futures.as_completed(futures):
+            on_result(future.result())
+    return [future.result() for future in futures]
+
+def run_search(configs, strategy="grid", executor=None, n_train=None, factor=3, min_resources=20,
+               warm_start=False, on_result=None):
+    """
+    Evaluasi konfigurasi sesuai strategi pencarian.
+    Dengan warm_start, konfigurasi yang hanya berbeda n_estimators dievaluasi
+    sebagai satu tangga (satu job per tangga, lihat evaluate_ladder).
+    on_result dipanggil untuk setiap hasil run (mis. ArtifactUploader.submit).
+    Returns:
+        list: Hasil evaluate_config dari run yang memakai seluruh data train,
+            dalam urutan configs.
+    """
+    if strategy != "halving" and warm_start:
+        ladders = run_jobs([((base, sizes), {}) for base, sizes in group_ladders(configs)],
+                           executor, fn=evaluate_ladder,
+                           on_result=(lambda ladder: [on_result(r) for r in ladder]) if on_result else None)
+        results = [result for ladder in ladders for result in ladder]
+        # Kembalikan ke urutan grid agar pemilihan model terbaik (dan seri) tidak berubah
+        return sorted(results, key=lambda r: configs.index(r["params"]))
+    if strategy != "halving":
+        return run_jobs([((params, make_run_name(params)), {}) for params in configs], executor,
+                        on_result=on_result)
+    if warm_start:
+        raise ValueError("warm_start ladders are not supported with successive halving")
+
+    candidates = list(configs)
+    schedule = halving_schedule(len(candidates), n_train, factor, min_resources)
+    for round_idx, (_, n_samples) in enumerate(schedule):
+        final = round_idx == len(schedule) - 1
+        jobs = [
+            ((params, f"{make_run_name(params)}_r{round_idx}"),
+             {"n_samples": None if final else n_samples, "log_artifacts": final,
+              "tags": {"halving_round": str(round_idx)}})
+            for params in candidates
+        ]
+        results = run_jobs(jobs, executor, on_result=on_result)
+        print(f"Halving round {round_idx}: {len(candidates)} candidates on {n_samples} samples")
+        if final:
+            return results
+        # Urutkan stabil: kandidat dengan akurasi sama mempertahankan urutan grid
+        ranked = sorted(range(len(results)), key=lambda i: -results[i]["accuracy"])
+        candidates = [candidates[i] for i in sorted(ranked[:schedule[round_idx + 1][0]])]
+
+def train_with_tuning(enable_dagshub=False, search="grid", parallel=False, workers=None,
+                      n_estimators_list=(50, 100), max_depth_list=(5, 10), min_samples_leaf_list=(1,),
+                      n_iter=10, halving_factor=3, warm_start=False, logging_mode="full", cv_folds=0):
+    if warm_start and search == "halving":
+        raise ValueError("warm_start ladders are not supported with successive halving")
+    if cv_folds and (warm_start or search == "halving"):
+        raise ValueError("Cross-validation supports grid and random search without warm_start")
 
-def train_with_tuning(enable_dagshub=False):
     if enable_dagshub:
         # Inisialisasi DagsHub (Poin 6)
         print("Using DagsHub Tracking...")
@@ -23,92 +478,136 @@ def train_with_tuning(enable_dagshub=False):
         mlflow.set_tracking_uri("")
         experiment_name = "Titanic_Tuned_Model_Local"
 
-    # Muat data (Poin 1)
+    # Muat data (Poin 1) - Feather di-memory-map jika tersedia, CSV sebagai fallback
     print("Loading data...")
     try:
-        df = pd.read_csv('titanic_preprocessing.csv')
+        X, y, data_path = load_dataset()
     except FileNotFoundError:
-        try:
-            df = pd.read_csv('Membangun_model/titanic_preprocessing.csv')
-        except FileNotFoundError:
-            print("Error: Dataset not found!")
-            return
-    
-    X = df.drop('Survived', axis=1)
-    # Convert to float to avoid MLflow schema warnings
-    X = X.astype(float)
-    y = df['Survived']
-    
+        print("Error: Dataset not found!")
+        return
+    print(f"Data loaded from {data_path}")
+
+    preprocessor_path = next((p for p in ['preprocessor.json', 'Membangun_model/preprocessor.json'] if os.path.exists(p)), None)
+
     X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-    
-    mlflow.set_experiment(experiment_name)
-    
+    # Urutan acak tetap untuk subsampel ronde awal successive halving
+    order = np.random.default_rng(42).permutation(len(X_train))
+
+    experiment_id = mlflow.set_experiment(experiment_name).experiment_id
+
     # Hyperparameter untuk di-tuning
-    n_estimators_list = [50, 100]
-    max_depth_list = [5, 10]
-    
-    best_acc = 0
-    best_params = {}
-    
-    for n_est in n_estimators_list:
-        for depth in max_depth_list:
-            run_name = f"RF_n{n_est}_d{depth}"
-            with mlflow.start_run(run_name=run_name):
-                # Poin 5: Manual Logging (Metrics & Params)
-                
-                # Logging Manual: Parameter
-                params = {"n_estimators": n_est, "max_depth": depth}
-                mlflow.log_params(params)
-                
-                model = RandomForestClassifier(n_estimators=n_est, max_depth=depth, random_state=42)
-                model.fit(X_train, y_train)
-                
-                y_pred = model.predict(X_test)
-                
-                # Logging Manual: Metrik (Sama seperti autolog)
-                acc = accuracy_score(y_test, y_pred)
-                prec = precision_score(y_test, y_pred)
-                rec = recall_score(y_test, y_pred)
-                f1 = f1_score(y_test, y_pred)
-                
-                mlflow.log_metric("accuracy", acc)
-                mlflow.log_metric("precision", prec)
-                mlflow.log_metric("recall", rec)
-                mlflow.log_metric("f1_score", f1)
-                
-                print(f"Run: {run_name} -> Accuracy: {acc}")
-                
-                # Advanced: Log Artefak (Confusion Matrix)
-                cm = confusion_matrix(y_test, y_pred)
-                plt.figure(figsize=(6,4))
-                sns.heatmap(cm, annot=True, fmt='d', cmap='Blues')
-                plt.title(f'Confusion Matrix {run_name}')
-                plt.ylabel('True Label')
-                plt.xlabel('Predicted Label')
-                
-                # Simpan plot sementara
-                os.makedirs("temp_artifacts", exist_ok=True)
-                cm_path = "temp_artifacts/confusion_matrix.png"
-                plt.savefig(cm_path)
-                plt.close()
-                
-                # Log artefak
-                mlflow.log_artifact(cm_path)
-                
-                # Log model
-                # Poin 5: Manual logging model (instead of autolog)
-                signature = mlflow.models.infer_signature(X_train, model.predict(X_train))
-                mlflow.sklearn.log_model(model, "model", signature=signature)
-                
-                if acc > best_acc:
-                    best_acc = acc
-                    best_params = params
+    configs = build_grid(n_estimators_list, max_depth_list, min_samples_leaf_list)
+    if search == "random":
+        configs = sample_configs(configs, n_iter)
+
+    # Run induk untuk mode selain pencarian grid sekuensial bawaan; setiap konfigurasi menjadi child run
+    client = MlflowClient()
+    parent_run_id = None
+    if parallel or search != "grid" or warm_start or logging_mode != "full" or cv_folds:
+        parent = client.create_run(experiment_id, run_name=f"search_{search}",
+                                   tags={"search_strategy": search, "parallel": str(parallel),
+                                         "warm_start": str(warm_start), "cv_folds": str(cv_folds)})
+        parent_run_id = parent.info.run_id
+        client.log_param(parent_run_id, "n_configs", len(configs))
+        client.log_param(parent_run_id, "logging_mode", logging_mode)
+
+    signature = best_score = uploader = pip_requirements = None
+    if logging_mode == "cheap":
+        # Signature hanya bergantung pada schema fitur dan tipe target: hitung sekali
+        signature = mlflow.models.infer_signature(X_train.head(), y_train.head().to_numpy())
+        pip_requirements = mlflow.sklearn.get_default_pip_requirements()
+        best_score = multiprocessing.Value('d', float('-inf'))
+        uploader = ArtifactUploader()
+
+    cv_dir = cv = None
+    if cv_folds:
+        # Nomor fold dihitung sekali dan dibagi ke worker sebagai file .npy yang di-memory-map
+        cv_dir = tempfile.mkdtemp(prefix="cv_folds_")
+        fold_path = os.path.join(cv_dir, "fold_ids.npy")
+        np.save(fold_path, make_fold_ids(y, cv_folds))
+        cv = (X, y, fold_path)
+
+    worker_args = ((X_train, X_test, y_train, y_test, order), mlflow.get_tracking_uri(),
+                   experiment_id, parent_run_id, preprocessor_path, logging_mode, signature, best_score,
+                   pip_requirements, cv)
+    on_result = uploader.submit if uploader else None
+
+    def search_with(executor):
+        if cv_folds:
+            return run_cv_search(configs, cv_folds, experiment_id, parent_run_id, executor)
+        return run_search(configs, search, executor, len(X_train), halving_factor,
+                          warm_start=warm_start, on_result=on_result)
+
+    start = time.perf_counter()
+    try:
+        if parallel:
+            # Satu konfigurasi (atau fold) per core: setiap forest dilatih single-thread di worker-nya
+            workers = workers or os.cpu_count()
+            print(f"Evaluating {len(configs)} configurations on {workers} worker processes...")
+            with concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                                        initargs=worker_args) as executor:
+                results = search_with(executor)
+        else:
+            init_worker(*worker_args)
+            results = search_with(None)
+    finally:
+        if cv_dir:
+            shutil.rmtree(cv_dir, ignore_errors=True)
+    if uploader:
+        uploader.close()
+    elapsed = time.perf_counter() - start
+
+    # Mode cheap: pilih run terbaik yang benar-benar menyimpan model (akurasinya sama dengan maksimum)
+    candidates = [r for r in results if r.get("model_logged")] or results
+    best = max(candidates, key=lambda r: r["accuracy"])
+    best_acc, best_params = best["accuracy"], best["params"]
+
+    if cv_folds:
+        # Mode k-fold: hanya config terbaik yang dilatih ulang pada seluruh data dan dilog modelnya
+        model = RandomForestClassifier(**best_params, random_state=42).fit(X, y)
+        with mlflow.start_run(run_id=best["run_id"]):
+            signature = signature or mlflow.models.infer_signature(X.head(), y.head().to_numpy())
+            mlflow.sklearn.log_model(model, "model", signature=signature, pip_requirements=pip_requirements)
+            if preprocessor_path:
+                mlflow.log_artifact(preprocessor_path, artifact_path="model")
+
+    if parent_run_id:
+        client.log_metric(parent_run_id, "best_accuracy", best_acc)
+        client.log_metric(parent_run_id, "search_seconds", elapsed)
+        client.set_tag(parent_run_id, "best_run_id", best["run_id"])
+        for key, value in best_params.items():
+            client.log_param(parent_run_id, f"best_{key}", value)
+        client.set_terminated(parent_run_id)
 
     print(f"Best Accuracy: {best_acc} with params {best_params}")
+    print(f"Search finished in {elapsed:.1f}s")
+    return results
+
+def parse_depth(value):
+    """max_depth dari CLI: bilangan bulat atau 'none' (tanpa batas)."""
+    return None if value.lower() == "none" else int(value)
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--dagshub", action="store_true", help="Enable DagsHub tracking")
+    parser.add_argument("--search", choices=SEARCH_STRATEGIES, default="grid", help="Search strategy")
+    parser.add_argument("--parallel", action="store_true", help="Evaluate configurations in a process pool")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--n-estimators", type=int, nargs="+", default=[50, 100])
+    parser.add_argument("--max-depth", type=parse_depth, nargs="+", default=[5, 10])
+    parser.add_argument("--min-samples-leaf", type=int, nargs="+", default=[1])
+    parser.add_argument("--n-iter", type=int, default=10, help="Configurations sampled by random search")
+    parser.add_argument("--halving-factor", type=int, default=3, help="Successive halving reduction factor")
+    parser.add_argument("--warm-start", action="store_true",
+                        help="Grow one forest per n_estimators ladder instead of refitting each size")
+    parser.add_argument("--cv", type=int, default=0, metavar="K",
+                        help="Select with stratified K-fold cross-validation instead of one holdout split")
+    parser.add_argument("--logging-mode", choices=LOGGING_MODES, default="full",
+                        help="cheap: log models only for new best runs and upload plots in the background")
     args = parser.parse_args()
-    
-    train_with_tuning(enable_dagshub=args.dagshub)
+
+    train_with_tuning(enable_dagshub=args.dagshub, search=args.search, parallel=args.parallel,
+                      workers=args.workers, n_estimators_list=args.n_estimators,
+                      max_depth_list=args.max_depth, min_samples_leaf_list=args.min_samples_leaf,
+                      n_iter=args.n_iter, halving_factor=args.halving_factor, warm_start=args.warm_start,
+                      logging_mode=args.logging_mode, cv_folds=args.cv)
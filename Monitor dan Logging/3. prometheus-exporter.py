@@ -1,14 +1,25 @@
 from flask import Flask, request, jsonify
-from prometheus_client import make_wsgi_app, Counter, Histogram, Gauge, Summary
+from prometheus_client import make_wsgi_app, Counter, Histogram, Gauge, Summary, CollectorRegistry, REGISTRY, multiprocess
 from werkzeug.middleware.dispatcher import DispatcherMiddleware
-from flasgger import Swagger
-from pydantic import BaseModel, ValidationError
+from pydantic import BaseModel, TypeAdapter, ValidationError
 from typing import List
+import numpy as np
+import hmac
+import json
 import time
 import importlib.util
 import os
+import threading
+import atexit
 import psutil
 
+try:
+    # orjson jauh lebih cepat untuk payload kecil; opsional
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
+
 # Impor modul inferensi secara dinamis
 script_dir = os.path.dirname(os.path.abspath(__file__))
 inference_path = os.path.join(script_dir, "7. inference.py")
@@ -16,14 +27,79 @@ spec = importlib.util.spec_from_file_location("inference_module", inference_path
 inference_module = importlib.util.module_from_spec(spec)
 spec.loader.exec_module(inference_module)
 
+# Modul pendamping (folder ini sudah ditambahkan ke sys.path oleh modul inferensi)
+import prediction_cache
+import drift_monitor
+import audit_log
+import sampling_profiler
+import model_reloader
+import model_loader
+import shadow_scoring
+
+# Mode start cepat: Swagger UI (flasgger) baru dimuat saat /apidocs pertama
+# diakses, dan pemanasan model berjalan di background sehingga server langsung
+# menerima koneksi; /ready baru 200 setelah model dimuat dan dipanaskan
+FAST_START = os.environ.get('FAST_START', '0') == '1'
+# Prefix URL milik flasgger (UI, spesifikasi JSON, dan aset statis)
+SWAGGER_PREFIXES = ('/apidocs', '/apispec', '/flasgger_static')
+
+# Waktu start proses (epoch). Dengan preload gunicorn modul ini dimuat di master,
+# jadi nilainya adalah waktu start master yang diwarisi semua worker
+PROCESS_START_TIME = psutil.Process().create_time()
+
 app = Flask(__name__)
-swagger = Swagger(app)
+if not FAST_START:
+    from flasgger import Swagger
+    swagger = Swagger(app)
+
+class LazySwaggerMiddleware:
+    """
+    Middleware WSGI yang melayani prefix Swagger dari aplikasi Flask terpisah
+    yang dibangun saat permintaan dokumentasi pertama. Flask tidak mengizinkan
+    blueprint didaftarkan setelah permintaan pertama, jadi aplikasi dokumentasi
+    menyalin semua rute aplikasi utama agar spesifikasi tetap lengkap.
+    """
+
+    def __init__(self, app, wsgi_app):
+        self.app = app
+        self.wsgi_app = wsgi_app
+        self._docs_app = None
+        self._lock = threading.Lock()
+
+    def docs_app(self):
+        with self._lock:
+            if self._docs_app is None:
+                from flasgger import Swagger
+                docs = Flask(self.app.import_name)
+                for rule in self.app.url_map.iter_rules():
+                    if rule.endpoint != 'static':
+                        docs.add_url_rule(rule.rule, rule.endpoint, self.app.view_functions[rule.endpoint],
+                                          methods=rule.methods)
+                Swagger(docs)
+                self._docs_app = docs
+            return self._docs_app
+
+    def __call__(self, environ, start_response):
+        if environ.get('PATH_INFO', '').startswith(SWAGGER_PREFIXES):
+            return self.docs_app().wsgi_app(environ, start_response)
+        return self.wsgi_app(environ, start_response)
 
 # Model Pydantic untuk Validasi Input
 class PredictionInput(BaseModel):
     features: List[float]
 
+# Validator yang dikompilasi sekali, dipakai jika jalur cepat tidak berlaku
+PREDICTION_INPUT_ADAPTER = TypeAdapter(PredictionInput)
+
+# Content type biner untuk klien tanpa parsing: 8 double little-endian (64 byte)
+BINARY_CONTENT_TYPE = 'application/octet-stream'
+BINARY_FEATURES_DTYPE = np.dtype('<f8')
+
 # --- DEFINISI 10 METRIK ---
+# Jika PROMETHEUS_MULTIPROC_DIR diset (mode gunicorn multi-worker), Counter dan
+# Histogram dijumlahkan otomatis antar worker. Gauge memakai multiprocess_mode
+# sebagai kebijakan penggabungan: nilai terbaru untuk nilai global, jumlah
+# worker yang masih hidup untuk nilai per proses.
 # 1. Total Permintaan
 REQUEST_COUNT = Counter('prediction_requests_total', 'Total jumlah permintaan prediksi')
 
@@ -31,7 +107,7 @@ REQUEST_COUNT = Counter('prediction_requests_total', 'Total jumlah permintaan pr
 REQUEST_LATENCY = Histogram('prediction_latency_seconds', 'Waktu pemrosesan prediksi')
 
 # 3. Nilai Prediksi Terakhir
-PREDICTION_GAUGE = Gauge('last_prediction_value', 'Nilai prediksi terakhir')
+PREDICTION_GAUGE = Gauge('last_prediction_value', 'Nilai prediksi terakhir', multiprocess_mode='mostrecent')
 
 # 4. Distribusi Output Prediksi (Selamat/Meninggal)
 PREDICTION_OUTPUT_COUNT = Counter('prediction_output_count', 'Distribusi kelas prediksi', ['class'])
@@ -43,34 +119,454 @@ INPUT_FEATURE_SUM = Counter('input_feature_sum', 'Jumlah nilai fitur input')
 INVALID_REQUEST_COUNT = Counter('invalid_requests_total', 'Total jumlah permintaan tidak valid')
 
 # 7. Penggunaan CPU Sistem
-SYSTEM_CPU_USAGE = Gauge('system_cpu_usage_percent', 'Persentase penggunaan CPU sistem saat ini')
+SYSTEM_CPU_USAGE = Gauge('system_cpu_usage_percent', 'Persentase penggunaan CPU sistem saat ini', multiprocess_mode='livemostrecent')
 
 # 8. Penggunaan Memori Sistem
-SYSTEM_MEMORY_USAGE = Gauge('system_memory_usage_bytes', 'Penggunaan memori sistem saat ini dalam byte')
+SYSTEM_MEMORY_USAGE = Gauge('system_memory_usage_bytes', 'Penggunaan memori sistem saat ini dalam byte', multiprocess_mode='livemostrecent')
 
 # 9. Distribusi Fitur: Umur (Indeks 2 dalam fitur)
-FEATURE_AGE_DIST = Histogram('feature_age_distribution', 'Distribusi fitur Umur')
+# Bucket disesuaikan dengan rentang data (bucket default berhenti di 10)
+FEATURE_AGE_DIST = Histogram('feature_age_distribution', 'Distribusi fitur Umur',
+                             buckets=(1, 5, 10, 15, 20, 25, 30, 35, 40, 50, 60, 70, 80))
 
 # 10. Distribusi Fitur: Tarif (Indeks 5 dalam fitur)
-FEATURE_FARE_DIST = Histogram('feature_fare_distribution', 'Distribusi fitur Tarif')
+FEATURE_FARE_DIST = Histogram('feature_fare_distribution', 'Distribusi fitur Tarif',
+                              buckets=(5, 7.5, 10, 15, 20, 30, 50, 75, 100, 150, 250, 520))
+
+# --- METRIK PROSES EXPORTER ---
+# Dijumlahkan antar worker (RSS total ikut menghitung halaman copy-on-write yang dibagi)
+PROCESS_RSS = Gauge('app_process_rss_bytes', 'Resident set size proses exporter dalam byte', multiprocess_mode='livesum')
+PROCESS_THREADS = Gauge('app_process_threads', 'Jumlah thread proses exporter', multiprocess_mode='livesum')
+PROCESS_OPEN_FDS = Gauge('app_process_open_fds', 'Jumlah file descriptor/handle yang terbuka di proses exporter', multiprocess_mode='livesum')
+
+# Distribusi probabilitas kelas positif (Selamat) untuk memantau kalibrasi:
+# bandingkan rata-ratanya (sum/count) dengan tingkat kelangsungan hidup aktual
+PREDICTION_PROBABILITY = Histogram('prediction_probability', 'Distribusi probabilitas kelas positif',
+                                   buckets=tuple(round(0.05 * i, 2) for i in range(1, 21)))
+
+# --- METRIK TAHAP /predict ---
+# Durasi per tahap (parse, validate, features, inference, record = metrik prediksi,
+# audit log, dan antrean shadow, serialize) dan total, diukur dengan perf_counter
+# untuk semua permintaan termasuk yang gagal.
+# outcome: cache_hit / cache_miss (200), invalid (400), error (500)
+STAGE_LATENCY = Histogram('prediction_stage_seconds', 'Durasi per tahap pemrosesan /predict',
+                          ['stage', 'status', 'outcome'],
+                          buckets=(.00001, .000025, .00005, .0001, .00025, .0005, .001, .0025, .005,
+                                   .01, .025, .05, .1, .25, 1.0))
+
+# --- METRIK STARTUP ---
+# livemax: worker hidup terakhir yang siap, yaitu saat seluruh server siap
+READY_TIMESTAMP = Gauge('app_ready_timestamp_seconds', 'Waktu (epoch) model dimuat dan dipanaskan',
+                        multiprocess_mode='livemax')
+STARTUP_DURATION = Gauge('app_startup_seconds', 'Durasi dari start proses hingga siap melayani',
+                         multiprocess_mode='livemax')
+
+# Interval (detik) pengambilan sampel metrik sistem di background
+SYSTEM_METRICS_INTERVAL = float(os.environ.get('SYSTEM_METRICS_INTERVAL', '5'))
+
+
+# Token untuk endpoint /admin (endpoint nonaktif jika tidak diset)
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN')
+
+# Inisialisasi Model (file pointer, jika ada, menentukan model awal)
+model_service = inference_module.ModelInference(
+    model_reloader.read_pointer(model_reloader.MODEL_POINTER_FILE) if model_reloader.MODEL_POINTER_FILE else None)
+
+def swap_model_service(service):
+    """
+    Ganti model yang dilayani. Jalur baca tidak memakai lock: setiap permintaan
+    mengambil referensi model_service sekali dan memakainya sampai selesai.
+    """
+    global model_service
+    model_service = service
+
+# Hot-swap model: /admin/reload dan watcher MODEL_POINTER_FILE
+reloader = model_reloader.ModelReloader(
+    factory=lambda model_uri: inference_module.ModelInference(model_uri),
+    swap=swap_model_service,
+    current=lambda: model_service,
+    warmup_rows=model_reloader.load_warmup_rows(feature_names=inference_module.FEATURE_NAMES))
+
+# Shadow scoring model kandidat (None jika SHADOW_MODEL_URI tidak diset)
+shadow = shadow_scoring.load_shadow_scorer(lambda model_uri: inference_module.ModelInference(model_uri))
+
+# Cache prediksi untuk baris fitur yang berulang (dikosongkan otomatis saat versi model berubah)
+result_cache = prediction_cache.PredictionCache()
+
+# Monitor drift per fitur terhadap data training (None jika data referensi tidak ada)
+drift = drift_monitor.load_default_monitor(inference_module.FEATURE_NAMES)
 
+# Audit log prediksi (ditulis di background, None jika AUDIT_LOG_ENABLED=0)
+audit = audit_log.AuditLogger() if audit_log.AUDIT_LOG_ENABLED else None
 
-# Inisialisasi Model
-model_service = inference_module.ModelInference()
+def predict_cached(data, service=None):
+    """
+    Prediksi satu baris (8 fitur) lewat cache hasil prediksi.
+    Args:
+        data: Baris fitur.
+        service (ModelInference): Model yang dipakai. Default: model_service saat ini.
+    Returns:
+        tuple: (prediksi, probabilitas per kelas, True jika dilayani dari cache).
+    """
+    if service is None:
+        service = model_service
+    key = prediction_cache.make_key(data)
+    cached = result_cache.get(key, service.cache_version)
+    if cached is not None:
+        return cached + (True,)
+    # Prediksi dan probabilitas dari satu evaluasi forest, di-cache bersama
+    cached = service.predict_with_proba(data)
+    result_cache.put(key, cached, service.cache_version)
+    return cached + (False,)
+
+class StageTimer:
+    """
+    Pencatat durasi tahap satu permintaan. mark() menutup tahap yang sedang
+    berjalan; finish() merekam semua tahap beserta total ke STAGE_LATENCY
+    dengan label status dan outcome yang baru diketahui di akhir permintaan.
+    """
+    __slots__ = ('start', 'last', 'stages')
+
+    def __init__(self):
+        self.start = self.last = time.perf_counter()
+        self.stages = []
+
+    def mark(self, stage):
+        now = time.perf_counter()
+        self.stages.append((stage, now - self.last))
+        self.last = now
+
+    def finish(self, status, outcome):
+        """Rekam tahap-tahap yang sudah ditandai; kembalikan durasi total (detik)."""
+        total = time.perf_counter() - self.start
+        status = str(status)
+        for stage, seconds in self.stages:
+            STAGE_LATENCY.labels(stage, status, outcome).observe(seconds)
+        STAGE_LATENCY.labels('total', status, outcome).observe(total)
+        return total
 
 def update_system_metrics():
     """Perbarui metrik sistem (CPU/Memori)"""
     SYSTEM_CPU_USAGE.set(psutil.cpu_percent())
     SYSTEM_MEMORY_USAGE.set(psutil.virtual_memory().used)
 
+class SystemMetricsSampler(threading.Thread):
+    """
+    Thread background yang memperbarui metrik sistem dan proses secara berkala.
+    Dengan begitu panggilan psutil tidak lagi ada di jalur permintaan /predict,
+    dan CPU tetap dilaporkan walaupun tidak ada trafik.
+    """
+
+    def __init__(self, interval=SYSTEM_METRICS_INTERVAL):
+        super().__init__(name='system-metrics-sampler', daemon=True)
+        self.interval = interval
+        self._stop_event = threading.Event()
+        self._process = None
+
+    def sample(self):
+        """Ambil satu sampel metrik sistem dan proses."""
+        # Proses dibuat saat pertama kali dipakai agar PID benar setelah fork
+        if self._process is None:
+            self._process = psutil.Process()
+        update_system_metrics()
+        with self._process.oneshot():
+            PROCESS_RSS.set(self._process.memory_info().rss)
+            PROCESS_THREADS.set(self._process.num_threads())
+            if hasattr(self._process, 'num_fds'):
+                PROCESS_OPEN_FDS.set(self._process.num_fds())
+            else:
+                # Windows tidak memiliki file descriptor, gunakan jumlah handle
+                PROCESS_OPEN_FDS.set(self._process.num_handles())
+        # Skor drift dihitung di sini, bukan di jalur permintaan
+        if drift is not None:
+            drift.export()
+
+    def run(self):
+        # cpu_percent() tanpa interval mengukur sejak panggilan sebelumnya,
+        # jadi setiap sampel adalah rata-rata penggunaan CPU selama satu interval
+        psutil.cpu_percent()
+        while not self._stop_event.wait(self.interval):
+            self.sample()
+
+    def stop(self):
+        self._stop_event.set()
+
+system_sampler = None
+
+# Diset setelah model dimuat dan dipanaskan di proses ini (lihat /ready)
+ready_event = threading.Event()
+startup_seconds = None
+
+def warm_up_and_mark_ready():
+    """
+    Panaskan model yang dilayani dengan baris pemanasan, lalu tandai proses
+    siap dan rekam waktu startup. Jika pemanasan gagal, /ready tetap 503.
+    """
+    global startup_seconds
+    try:
+        model_reloader.warm_up(model_service, reloader.warmup_rows)
+    except Exception:
+        app.logger.exception("Model warm-up failed; readiness stays false")
+        return
+    now = time.time()
+    startup_seconds = now - PROCESS_START_TIME
+    READY_TIMESTAMP.set(now)
+    STARTUP_DURATION.set(startup_seconds)
+    ready_event.set()
+    app.logger.info("Ready %.3fs after process start", startup_seconds)
+
+def start_background_services():
+    """
+    Mulai thread background exporter. Dipanggil sekali per proses, setelah fork
+    jika dijalankan oleh server pre-fork. Pada FAST_START pemanasan model
+    berjalan di thread background; selain itu selesai sebelum fungsi kembali.
+    """
+    global system_sampler
+    if system_sampler is None:
+        if FAST_START:
+            threading.Thread(target=warm_up_and_mark_ready, name='model-warmup', daemon=True).start()
+        else:
+            warm_up_and_mark_ready()
+        system_sampler = SystemMetricsSampler()
+        system_sampler.sample()
+        system_sampler.start()
+        reloader.start()
+        if shadow is not None:
+            shadow.start()
+        if audit is not None:
+            audit.start()
+            atexit.register(audit.stop)
+
+class BinaryPayloadError(ValueError):
+    """Payload biner /predict tidak berisi tepat 8 double little-endian."""
+
+def decode_binary_features(body):
+    """
+    Decode payload application/octet-stream menjadi baris fitur float64.
+    Raises:
+        BinaryPayloadError: Jika panjang payload bukan 8 * 8 byte.
+    """
+    expected = inference_module.N_FEATURES * BINARY_FEATURES_DTYPE.itemsize
+    if len(body) != expected:
+        raise BinaryPayloadError(
+            f"Binary payload must be exactly {expected} bytes "
+            f"({inference_module.N_FEATURES} little-endian float64 values), got {len(body)}")
+    return np.frombuffer(body, dtype=BINARY_FEATURES_DTYPE).astype(np.float64)
+
+class RawRecordError(ValueError):
+    """Record penumpang mentah tidak dapat diubah menjadi fitur oleh preprocessor."""
+
+def transform_passengers(records, service=None):
+    """
+    Ubah record penumpang mentah menjadi matriks fitur dengan preprocessor model.
+    Args:
+        records (list): Record penumpang mentah (dict).
+        service (ModelInference): Model yang dipakai. Default: model_service saat ini.
+    Raises:
+        RawRecordError: Jika model tidak memiliki preprocessor atau record tidak valid.
+    """
+    if not isinstance(records, list) or not records or not all(isinstance(r, dict) for r in records):
+        raise RawRecordError("Passenger records must be JSON objects")
+    if service is None:
+        service = model_service
+    try:
+        return service.transform_records(records)
+    except ValueError as e:
+        raise RawRecordError(str(e))
+
+def validate_features(json_data, service=None):
+    """
+    Validasi body /predict dan kembalikan tepat 8 fitur sebagai baris float64.
+    Jika daftar fitur lebih pendek, sisanya diisi 0; jika lebih panjang, dipotong.
+    Body {"passenger": {...}} berisi record mentah diubah oleh preprocessor
+    model `service` (default: model_service saat ini).
+    Raises:
+        ValidationError: Jika body tidak sesuai PredictionInput.
+        RawRecordError: Jika record penumpang mentah tidak valid.
+    """
+    row = np.zeros(inference_module.N_FEATURES)
+    features = json_data.get('features') if isinstance(json_data, dict) else None
+
+    # Jalur cepat: daftar berisi int/float murni langsung disalin ke baris numpy.
+    # Input lain (string angka, bool, null, dll.) ditangani validator Pydantic
+    # agar hasil dan pesan error 400 tetap sama persis.
+    if type(features) is list and all(type(v) is float or type(v) is int for v in features):
+        try:
+            values = features[:inference_module.N_FEATURES]
+            row[:len(values)] = values
+            return row
+        except OverflowError:
+            pass
+
+    if isinstance(json_data, dict) and features is None and 'passenger' in json_data:
+        return transform_passengers([json_data['passenger']], service)[0]
+
+    if isinstance(json_data, dict):
+        input_data = PREDICTION_INPUT_ADAPTER.validate_python(json_data)
+    else:
+        # Pertahankan perilaku lama untuk body non-objek (TypeError -> 500)
+        input_data = PredictionInput(**json_data)
+    values = input_data.features[:inference_module.N_FEATURES]
+    row[:len(values)] = values
+    return row
+
+def read_request_features(req, timer=None, service=None):
+    """
+    Baca fitur dari permintaan Flask /predict.
+    Args:
+        req: Objek request Flask.
+        timer (StageTimer): Jika diberikan, tahap "parse" ditandai setelah body didecode.
+        service (ModelInference): Model untuk record mentah. Default: model_service saat ini.
+    Returns:
+        np.array atau None: Baris 8 fitur, atau None jika tidak ada data JSON.
+    Raises:
+        ValidationError, BinaryPayloadError, RawRecordError: Jika input tidak valid (400).
+    """
+    if req.mimetype == BINARY_CONTENT_TYPE:
+        # Decode biner sekaligus validasi panjang; dihitung sebagai tahap parse
+        data = decode_binary_features(req.get_data())
+        if timer is not None:
+            timer.mark('parse')
+        return data
+    if req.is_json:
+        try:
+            json_data = json_loads(req.get_data())
+        except ValueError:
+            # Biarkan Flask menghasilkan error decode yang sama seperti sebelumnya
+            json_data = req.json
+    else:
+        json_data = req.json
+    if timer is not None:
+        timer.mark('parse')
+    if not json_data:
+        return None
+    return validate_features(json_data, service)
+
+def record_feature_metrics(data):
+    """Catat metrik fitur untuk satu baris input."""
+    # Umur adalah indeks 2, Tarif adalah indeks 5
+    if len(data) > 2:
+        FEATURE_AGE_DIST.observe(data[2])
+    if len(data) > 5:
+        FEATURE_FARE_DIST.observe(data[5])
+    if drift is not None and len(data) == inference_module.N_FEATURES:
+        drift.update(data)
+
+    INPUT_FEATURE_SUM.inc(float(np.sum(data)))
+
+def record_prediction_metrics(prediction, proba=None):
+    """Rekam metrik untuk satu hasil prediksi (dan probabilitasnya jika ada)."""
+    PREDICTION_GAUGE.set(prediction)
+    PREDICTION_OUTPUT_COUNT.labels(**{'class': str(int(prediction))}).inc()
+    if proba is not None:
+        # Kolom terakhir = kelas positif (classes_ diurutkan sklearn)
+        PREDICTION_PROBABILITY.observe(proba[-1])
+
+def wants_proba(args):
+    """True jika permintaan meminta mode respons probabilitas (?proba=true)."""
+    return args.get('proba', 'false').lower() in ('1', 'true', 'yes')
+
+def prediction_body(prediction, proba, service, with_proba):
+    """Body respons /predict; mode probabilitas menambahkan probabilitas, threshold, dan versi model."""
+    body = {'prediction': int(prediction), 'status': 'success'}
+    if with_proba:
+        body['probabilities'] = proba.tolist()
+        body['threshold'] = service.decision_threshold
+        body['model_version'] = service.model_version
+    return body
+
+def observe_many(histogram, values):
+    """
+    Rekam banyak observasi ke Histogram sekaligus.
+    Setara dengan memanggil histogram.observe(v) untuk setiap v, tetapi
+    penghitungan bucket dilakukan secara vektor dengan numpy.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    # NaN tidak masuk bucket mana pun (searchsorted menaruhnya di luar bucket +Inf)
+    values = values[~np.isnan(values)]
+    if values.size == 0:
+        return
+    # observe() menaikkan bucket pertama dengan batas atas >= nilai
+    bucket_idx = np.searchsorted(histogram._upper_bounds, values, side='left')
+    counts = np.bincount(bucket_idx, minlength=len(histogram._upper_bounds))
+    for i in np.flatnonzero(counts):
+        histogram._buckets[i].inc(int(counts[i]))
+    histogram._sum.inc(float(values.sum()))
+
+def parse_batch_features(json_data, service=None):
+    """
+    Ubah body /predict/batch menjadi matriks fitur float64 berbentuk (n, 8).
+    Record mentah diubah oleh preprocessor model `service` (default: model_service saat ini).
+    Format yang diterima:
+      - {"instances": [[...], [...]]}  -> satu baris per penumpang
+      - {"columns": {"Pclass": [...], ..., "Embarked_S": [...]}}  -> kolumnar
+      - {"records": [{"Sex": "male", "Age": null, ...}, ...]}  -> record mentah
+    Raises:
+        ValueError: Jika body tidak valid.
+    """
+    if not isinstance(json_data, dict):
+        raise ValueError("Expected a JSON object with 'instances', 'columns' or 'records'")
+
+    if 'instances' in json_data:
+        try:
+            rows = np.asarray(json_data['instances'], dtype=np.float64)
+        except (TypeError, ValueError):
+            raise ValueError("'instances' must be a rectangular array of numbers")
+        if rows.ndim != 2 or rows.shape[0] == 0:
+            raise ValueError("'instances' must be a non-empty list of feature rows")
+        if not np.isfinite(rows).all():
+            raise ValueError("'instances' must not contain null, NaN or infinite values")
+        # Pad atau potong ke 8 fitur, sama seperti /predict
+        X = np.zeros((rows.shape[0], inference_module.N_FEATURES))
+        width = min(rows.shape[1], inference_module.N_FEATURES)
+        X[:, :width] = rows[:, :width]
+        return X
+
+    if 'columns' in json_data:
+        columns = json_data['columns']
+        if not isinstance(columns, dict):
+            raise ValueError("'columns' must be an object mapping feature name to values")
+        missing = [name for name in inference_module.FEATURE_NAMES if name not in columns]
+        if missing:
+            raise ValueError(f"Missing feature columns: {missing}")
+        try:
+            X = np.column_stack([
+                np.asarray(columns[name], dtype=np.float64)
+                for name in inference_module.FEATURE_NAMES
+            ])
+        except (TypeError, ValueError):
+            raise ValueError("Feature columns must be equal-length arrays of numbers")
+        if X.ndim != 2 or X.shape[0] == 0:
+            raise ValueError("Feature columns must be non-empty arrays of numbers")
+        if not np.isfinite(X).all():
+            raise ValueError("Feature columns must not contain null, NaN or infinite values")
+        return X
+
+    if 'records' in json_data:
+        return transform_passengers(json_data['records'], service)
+
+    raise ValueError("Expected a JSON object with 'instances', 'columns' or 'records'")
+
 @app.route('/predict', methods=['POST'])
 def predict():
     """
     Prediksi Kelangsungan Hidup berdasarkan fitur Titanic.
+    Selain JSON, klien dapat mengirim application/octet-stream berisi
+    8 nilai float64 little-endian (64 byte) tanpa parsing JSON.
+    Prediksi adalah keputusan di bawah threshold model; dengan ?proba=true
+    respons juga memuat probabilitas kelas dari evaluasi forest yang sama.
     ---
     tags:
       - Prediction
+    consumes:
+      - application/json
+      - application/octet-stream
     parameters:
+      - name: proba
+        in: query
+        type: boolean
+        default: false
+        description: Sertakan probabilitas per kelas, threshold, dan versi model
       - name: body
         in: body
         required: true
@@ -83,6 +579,10 @@ def predict():
                 type: number
               example: [3, 0, 22.0, 1, 0, 7.25, 1, 0]
               description: Daftar fitur yang diproses (Pclass, Sex, Age, SibSp, Parch, Fare, Embarked_Q, Embarked_S)
+            passenger:
+              type: object
+              example: {"Pclass": 3, "Sex": "male", "Age": null, "SibSp": 1, "Parch": 0, "Fare": 7.25, "Embarked": "S"}
+              description: Record penumpang mentah (alternatif dari features), diproses dengan preprocessor model
     responses:
       200:
         description: Hasil prediksi
@@ -92,6 +592,16 @@ def predict():
             prediction:
               type: integer
               description: 0 (Meninggal) atau 1 (Selamat)
+            probabilities:
+              type: array
+              items:
+                type: number
+              description: Probabilitas [Meninggal, Selamat] (hanya dengan ?proba=true)
+            threshold:
+              type: number
+              description: Threshold probabilitas Selamat yang dipakai (hanya dengan ?proba=true)
+            model_version:
+              type: string
             status:
               type: string
       400:
@@ -99,65 +609,412 @@ def predict():
       500:
         description: Kesalahan Server Internal
     """
-    start_time = time.time()
+    timer = StageTimer()
     REQUEST_COUNT.inc()
-    update_system_metrics()
+    # Satu referensi model untuk seluruh permintaan (aman terhadap hot-swap)
+    service = model_service
     
     try:
-        # Validasi input menggunakan Pydantic
-        json_data = request.json
-        if not json_data:
+        data = read_request_features(request, timer, service)
+        timer.mark('validate')
+        if data is None:
              INVALID_REQUEST_COUNT.inc()
-             return jsonify({'error': 'No JSON data provided'}), 400
+             return respond(timer, {'error': 'No JSON data provided'}, 400, 'invalid')
              
-        input_data = PredictionInput(**json_data)
-        
-        data = input_data.features
-        
-        # Periksa apakah panjang fitur sesuai ekspektasi model (8 fitur)
-        if len(data) != 8:
-             # Jika ingin ketat, hapus komentar di bawah. Saat ini, kita izinkan jika model bisa menanganinya atau kita pad.
-             # Tapi model dummy kita mengharapkan 8.
-             # Mari pad atau potong untuk mencegah crash? 
-             # Atau kembalikan error. Mengembalikan error lebih baik untuk metrik "Permintaan Tidak Valid".
-             if len(data) < 8:
-                 data = data + [0] * (8 - len(data))
-             elif len(data) > 8:
-                 data = data[:8]
-        
-        # Catat metrik fitur
-        # Umur adalah indeks 2, Tarif adalah indeks 5
-        if len(data) > 2:
-            FEATURE_AGE_DIST.observe(data[2])
-        if len(data) > 5:
-            FEATURE_FARE_DIST.observe(data[5])
-            
-        INPUT_FEATURE_SUM.inc(sum(data))
-
-        prediction = model_service.predict(data)
+        record_feature_metrics(data)
+        timer.mark('features')
+
+        prediction, proba, hit = predict_cached(data, service)
+        timer.mark('inference')
+        record_prediction_metrics(prediction, proba)
+        if audit is not None:
+            audit.log('/predict', data, prediction, service.model_version)
+        if shadow is not None:
+            shadow.submit(data, prediction)
+        timer.mark('record')
+
+        response = jsonify(prediction_body(prediction, proba, service, wants_proba(request.args)))
+        timer.mark('serialize')
+        REQUEST_LATENCY.observe(timer.finish(200, 'cache_hit' if hit else 'cache_miss'))
+        return response
         
+    except ValidationError as e:
+        INVALID_REQUEST_COUNT.inc()
+        timer.mark('validate')
+        return respond(timer, {'error': e.errors()}, 400, 'invalid')
+    except (BinaryPayloadError, RawRecordError) as e:
+        INVALID_REQUEST_COUNT.inc()
+        timer.mark('validate')
+        return respond(timer, {'error': str(e)}, 400, 'invalid')
+    except Exception as e:
+        return respond(timer, {'error': str(e)}, 500, 'error')
+
+def respond(timer, body, status, outcome):
+    """Buat respons error JSON dan rekam tahapnya ke STAGE_LATENCY."""
+    response = jsonify(body)
+    timer.mark('serialize')
+    timer.finish(status, outcome)
+    return response, status
+
+@app.route('/predict/batch', methods=['POST'])
+def predict_batch():
+    """
+    Prediksi Kelangsungan Hidup untuk banyak penumpang sekaligus.
+    ---
+    tags:
+      - Prediction
+    parameters:
+      - name: body
+        in: body
+        required: true
+        schema:
+          type: object
+          properties:
+            instances:
+              type: array
+              items:
+                type: array
+                items:
+                  type: number
+              example: [[3, 0, 22.0, 1, 0, 7.25, 1, 0], [1, 1, 38.0, 1, 0, 71.28, 0, 0]]
+              description: Daftar baris fitur (format baris)
+            columns:
+              type: object
+              description: Nama fitur -> daftar nilai (format kolumnar, alternatif dari instances)
+            records:
+              type: array
+              items:
+                type: object
+              description: Daftar record penumpang mentah (diproses dengan preprocessor model)
+    responses:
+      200:
+        description: Hasil prediksi per baris
+        schema:
+          type: object
+          properties:
+            predictions:
+              type: array
+              items:
+                type: integer
+            probabilities:
+              type: array
+              items:
+                type: array
+                items:
+                  type: number
+            threshold:
+              type: number
+              description: Threshold probabilitas Selamat yang dipakai untuk predictions
+            count:
+              type: integer
+            status:
+              type: string
+      400:
+        description: Kesalahan Validasi
+      500:
+        description: Kesalahan Server Internal
+    """
+    start_time = time.perf_counter()
+
+    try:
+        json_data = request.json
+        if not json_data:
+            REQUEST_COUNT.inc()
+            INVALID_REQUEST_COUNT.inc()
+            return jsonify({'error': 'No JSON data provided'}), 400
+
+        # Tangkap model sekali: parsing record mentah dan penilaian memakai model yang sama
+        service = model_service
+        try:
+            X = parse_batch_features(json_data, service)
+        except ValueError as e:
+            REQUEST_COUNT.inc()
+            INVALID_REQUEST_COUNT.inc()
+            return jsonify({'error': str(e)}), 400
+
+        n_rows = X.shape[0]
+        REQUEST_COUNT.inc(n_rows)
+
+        # Catat metrik fitur untuk semua baris sekaligus
+        observe_many(FEATURE_AGE_DIST, X[:, 2])
+        observe_many(FEATURE_FARE_DIST, X[:, 5])
+        if drift is not None:
+            drift.update_many(X)
+        INPUT_FEATURE_SUM.inc(float(X.sum()))
+
+        predictions, proba = service.predict_batch(X)
+
         # Rekam metrik prediksi
-        PREDICTION_GAUGE.set(prediction)
-        PREDICTION_OUTPUT_COUNT.labels(**{'class': str(int(prediction))}).inc()
-        
-        REQUEST_LATENCY.observe(time.time() - start_time)
-        
+        PREDICTION_GAUGE.set(predictions[-1])
+        classes, counts = np.unique(predictions.astype(int), return_counts=True)
+        for cls, count in zip(classes, counts):
+            PREDICTION_OUTPUT_COUNT.labels(**{'class': str(cls)}).inc(int(count))
+        observe_many(PREDICTION_PROBABILITY, proba[:, -1])
+        if audit is not None:
+            audit.log_batch('/predict/batch', X, predictions, service.model_version)
+
+        REQUEST_LATENCY.observe(time.perf_counter() - start_time)
+
         return jsonify({
-            'prediction': int(prediction),
+            'predictions': predictions.astype(int).tolist(),
+            'probabilities': proba.tolist(),
+            'threshold': service.decision_threshold,
+            'count': n_rows,
             'status': 'success'
         })
-        
-    except ValidationError as e:
-        INVALID_REQUEST_COUNT.inc()
-        return jsonify({'error': e.errors()}), 400
+
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def check_admin_token():
+    """
+    Periksa header X-Admin-Token.
+    Returns:
+        tuple atau None: Respons error (404 jika ADMIN_TOKEN tidak diset, 403 jika salah), atau None jika valid.
+    """
+    if not ADMIN_TOKEN:
+        return jsonify({'error': 'Admin endpoints disabled; set ADMIN_TOKEN'}), 404
+    # compare_digest: waktu perbandingan tidak bergantung pada prefiks yang cocok
+    if not hmac.compare_digest(request.headers.get('X-Admin-Token', '').encode('utf-8'), ADMIN_TOKEN.encode('utf-8')):
+        return jsonify({'error': 'Invalid admin token'}), 403
+    return None
+
+def model_status():
+    """Status model yang sedang dilayani dan pemuatan terakhir."""
+    service = model_service
+    return {
+        'model_uri': service.model_uri,
+        'resolved_model_uri': service.resolved_uri,
+        'model_version': service.model_version,
+        'backend': service.backend,
+        'decision_threshold': service.decision_threshold,
+        'loading': reloader.loading,
+        'last_error': reloader.last_error,
+    }
+
+@app.route('/ready', methods=['GET'])
+def ready():
+    """
+    Readiness probe: 200 hanya setelah model dimuat dan dipanaskan di worker ini.
+    ---
+    tags:
+      - Health
+    responses:
+      200:
+        description: Worker siap melayani prediksi
+      503:
+        description: Model belum selesai dipanaskan
+    """
+    if not ready_event.is_set():
+        return jsonify({'ready': False}), 503
+    return jsonify({
+        'ready': True,
+        'model_version': model_service.model_version,
+        'startup_seconds': startup_seconds,
+    })
+
+@app.route('/admin/model', methods=['GET'])
+def admin_model():
+    """
+    Model yang sedang dilayani worker ini.
+    ---
+    tags:
+      - Admin
+    parameters:
+      - name: X-Admin-Token
+        in: header
+        type: string
+        required: true
+    responses:
+      200:
+        description: URI, versi, backend, dan status pemuatan model
+      403:
+        description: Token admin salah
+      404:
+        description: Endpoint admin tidak diaktifkan
+    """
+    error = check_admin_token()
+    if error is not None:
+        return error
+    return jsonify(model_status())
+
+@app.route('/admin/reload', methods=['POST'])
+def admin_reload():
+    """
+    Muat model baru di background, panaskan, lalu tukar tanpa menghentikan layanan.
+    Jika MODEL_POINTER_FILE diset, URI ditulis ke file tersebut setelah model
+    berhasil ditukar sehingga worker gunicorn lain ikut menukar model lewat
+    watcher; model yang gagal dimuat tidak pernah masuk ke file pointer.
+    ---
+    tags:
+      - Admin
+    parameters:
+      - name: X-Admin-Token
+        in: header
+        type: string
+        required: true
+      - name: body
+        in: body
+        schema:
+          type: object
+          properties:
+            model_uri:
+              type: string
+              description: URI MLflow atau path model. Default - URI model saat ini (muat ulang)
+            wait:
+              type: boolean
+              description: Tunggu sampai model tertukar sebelum menjawab
+    responses:
+      200:
+        description: Model sudah ditukar (wait=true)
+      202:
+        description: Pemuatan dimulai di background
+      400:
+        description: Model tidak ditemukan
+      500:
+        description: Model baru gagal dimuat atau dipanaskan; model lama tetap dilayani
+    """
+    error = check_admin_token()
+    if error is not None:
+        return error
+    body = request.get_json(silent=True) or {}
+    model_uri = body.get('model_uri') or model_service.model_uri
+    if not model_uri:
+        return jsonify({'error': 'model_uri is required when serving the built-in dummy model'}), 400
+    try:
+        model_loader.model_fingerprint(model_uri)
+    except FileNotFoundError as e:
+        return jsonify({'error': str(e)}), 400
+
+    future = reloader.reload(model_uri, publish=True)
+    if not body.get('wait'):
+        return jsonify(dict(model_status(), status='loading', requested_uri=model_uri)), 202
+    try:
+        future.result()
+    except Exception as e:
+        return jsonify(dict(model_status(), error=f"{type(e).__name__}: {e}")), 500
+    return jsonify(dict(model_status(), status='swapped'))
+
+@app.route('/debug/profile', methods=['POST'])
+def start_profile():
+    """
+    Mulai profil sampling proses worker ini di thread background.
+    Hanya aktif jika PROFILER_ENABLED=1 dan memerlukan header X-Admin-Token
+    yang sama dengan endpoint /admin (stack trace membocorkan detail internal).
+    Worker tetap melayani permintaan selama sesi (termasuk worker sync
+    threads=1); ambil hasilnya dengan GET /debug/profile setelah sesi selesai.
+    Pada gunicorn multi-worker hanya worker yang menjawab permintaan ini yang
+    diprofil. Durasi dibatasi di bawah timeout worker gunicorn.
+    ---
+    tags:
+      - Debug
+    parameters:
+      - name: X-Admin-Token
+        in: header
+        type: string
+        required: true
+      - name: seconds
+        in: query
+        type: number
+        default: 10
+      - name: interval
+        in: query
+        type: number
+        default: 0.005
+      - name: idle
+        in: query
+        type: boolean
+        default: false
+        description: Ikutkan thread yang sedang menunggu
+    responses:
+      202:
+        description: Sesi dimulai
+      400:
+        description: Parameter tidak valid
+      403:
+        description: Token admin salah
+      404:
+        description: Profiler atau ADMIN_TOKEN tidak diaktifkan
+      409:
+        description: Sesi profil lain sedang berjalan
+    """
+    if not sampling_profiler.PROFILER_ENABLED:
+        return jsonify({'error': 'Profiler disabled; set PROFILER_ENABLED=1'}), 404
+    error = check_admin_token()
+    if error is not None:
+        return error
+    try:
+        seconds = float(request.args.get('seconds', 10))
+        interval = float(request.args.get('interval', sampling_profiler.DEFAULT_INTERVAL))
+    except ValueError:
+        return jsonify({'error': 'seconds and interval must be numbers'}), 400
+    if seconds <= 0 or interval <= 0:
+        return jsonify({'error': 'seconds and interval must be positive'}), 400
+    idle = request.args.get('idle', 'false').lower() in ('1', 'true', 'yes')
+    try:
+        session = sampling_profiler.start_session(seconds, interval, idle=idle)
+    except sampling_profiler.ProfilerBusyError as e:
+        return jsonify({'error': str(e)}), 409
+    return jsonify({'status': 'running', 'pid': os.getpid(), 'seconds': session.seconds,
+                    'interval': session.interval}), 202
+
+@app.route('/debug/profile', methods=['GET'])
+def profile_result():
+    """
+    Hasil sesi profil terakhir dalam format collapsed stack (flame graph).
+    Memerlukan header X-Admin-Token seperti POST /debug/profile.
+    ---
+    tags:
+      - Debug
+    parameters:
+      - name: X-Admin-Token
+        in: header
+        type: string
+        required: true
+    responses:
+      200:
+        description: Baris "stack count" untuk flamegraph.pl / speedscope
+      202:
+        description: Sesi masih berjalan
+      403:
+        description: Token admin salah
+      404:
+        description: Profiler atau ADMIN_TOKEN tidak diaktifkan, atau belum ada sesi di worker ini
+    """
+    if not sampling_profiler.PROFILER_ENABLED:
+        return jsonify({'error': 'Profiler disabled; set PROFILER_ENABLED=1'}), 404
+    error = check_admin_token()
+    if error is not None:
+        return error
+    session = sampling_profiler.current_session()
+    if session is None:
+        return jsonify({'error': 'No profiling session in this worker; start one with POST /debug/profile',
+                        'pid': os.getpid()}), 404
+    if not session.done:
+        return jsonify({'status': 'running', 'pid': os.getpid(),
+                        'remaining_seconds': round(session.remaining, 3)}), 202
+    return sampling_profiler.to_folded(session.stacks), 200, {'Content-Type': 'text/plain; charset=utf-8'}
+
+def metrics_registry():
+    """
+    Registry yang dipakai endpoint /metrics. Pada mode multiprocess, metrik
+    dikumpulkan dari file mmap semua worker sehingga worker mana pun yang
+    menjawab memberi angka gabungan yang sama.
+    """
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
 # Tambahkan middleware wsgi prometheus untuk merutekan permintaan /metrics
 app.wsgi_app = DispatcherMiddleware(app.wsgi_app, {
-    '/metrics': make_wsgi_app()
+    '/metrics': make_wsgi_app(metrics_registry())
 })
+if FAST_START:
+    app.wsgi_app = LazySwaggerMiddleware(app, app.wsgi_app)
 
 if __name__ == '__main__':
     print("Starting Prometheus Exporter on port 5000...")
+    start_background_services()
     app.run(host='0.0.0.0', port=5001)
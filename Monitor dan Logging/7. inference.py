@@ -1,34 +1,279 @@
-import pandas as pd
 import numpy as np
-from sklearn.ensemble import RandomForestClassifier
+import importlib.util
+import json
+import logging
+import os
+import sys
+import threading
+
+# Folder ini mengandung spasi (bukan paket Python), jadi tambahkan ke sys.path
+# agar modul pendamping seperti model_loader dapat diimpor
+script_dir = os.path.dirname(os.path.abspath(__file__))
+if script_dir not in sys.path:
+    sys.path.insert(0, script_dir)
+
+import model_loader
+from compiled_forest import CompiledForest
+
+# Urutan fitur hasil preprocessing Titanic yang diharapkan model
+FEATURE_NAMES = ['Pclass', 'Sex', 'Age', 'SibSp', 'Parch', 'Fare', 'Embarked_Q', 'Embarked_S']
+N_FEATURES = len(FEATURE_NAMES)
+
+logger = logging.getLogger(__name__)
+
+# Modul preprocessing (TitanicPreprocessor) yang dipakai saat training
+PREPROCESSING_MODULE_PATH = os.path.join(
+    script_dir, "..", "Eksperimen_SML_YudhaElfransyah", "preprocessing", "automate_Yudha_Elfransyah.py")
+# Preprocessor default untuk model dummy (hasil fit pada data train repo)
+DEFAULT_PREPROCESSOR_PATH = os.path.join(os.path.dirname(PREPROCESSING_MODULE_PATH), "preprocessor.json")
+
+# Backend inferensi: "sklearn", "compiled" (CompiledForest), "auto"
+# (compiled untuk batch kecil, sklearn untuk batch besar), atau "lookup"
+# (tabel Age x Fare per kombinasi kategorikal, fallback ke CompiledForest)
+INFERENCE_BACKENDS = ("sklearn", "compiled", "auto", "lookup")
+# Jumlah baris maksimum yang dilayani CompiledForest pada backend "auto"
+AUTO_COMPILED_MAX_ROWS = 64
+# Threshold probabilitas kelas positif; 0.5 = argmax seperti RandomForestClassifier.predict
+DEFAULT_DECISION_THRESHOLD = 0.5
+
+# Modul preprocessing dimuat saat permintaan pertama, bisa dari beberapa thread sekaligus
+_preprocessing_lock = threading.Lock()
+
+def load_preprocessing_module():
+    """Muat modul preprocessing sekali (pandas hanya dibutuhkan untuk record mentah)."""
+    with _preprocessing_lock:
+        module = sys.modules.get("automate_preprocessing")
+        if module is None:
+            spec = importlib.util.spec_from_file_location("automate_preprocessing", PREPROCESSING_MODULE_PATH)
+            module = importlib.util.module_from_spec(spec)
+            sys.modules["automate_preprocessing"] = module
+            spec.loader.exec_module(module)
+        return module
 
 class ModelInference:
-    def __init__(self):
-        # Dalam skenario nyata, muat model dari artefak
-        # self.model = mlflow.sklearn.load_model("...")
-        # Untuk demonstrasi, kita akan melatih model dummy saat init
-        self.model = RandomForestClassifier(n_estimators=10, random_state=42)
-        # Fit dummy untuk memungkinkan prediksi
-        # Diperbarui ke 8 fitur untuk mencocokkan output preprocessing Titanic
-        # (Pclass, Sex, Age, SibSp, Parch, Fare, Embarked_Q, Embarked_S)
-        X_dummy = np.random.rand(10, 8) 
-        y_dummy = np.random.randint(0, 2, 10)
-        self.model.fit(X_dummy, y_dummy)
-        
-    def predict(self, data):
+    def __init__(self, model_uri=None, cache_dir=None, backend=None, preprocessor_path=None,
+                 decision_threshold=None):
         """
-        Prediksi menggunakan model yang dimuat.
+        Args:
+            model_uri (str): URI model MLflow (mis. "runs:/<run_id>/model") atau path
+                lokal. Default: variabel lingkungan MODEL_URI.
+            cache_dir (str): Folder cache model (lihat model_loader.load_model).
+            backend (str): Salah satu INFERENCE_BACKENDS. Default: variabel
+                lingkungan INFERENCE_BACKEND atau "sklearn".
+            preprocessor_path (str): File preprocessor.json untuk record mentah.
+                Default: variabel lingkungan PREPROCESSOR_PATH, lalu preprocessor.json
+                yang dilog bersama model.
+            decision_threshold (float): Threshold probabilitas kelas positif untuk
+                keputusan. Default: decision_threshold.json yang dilog bersama model
+                (ikut berganti saat model di-hot-swap), lalu variabel lingkungan
+                DECISION_THRESHOLD, lalu 0.5.
+        """
+        self.backend = backend or os.environ.get("INFERENCE_BACKEND", "sklearn")
+        if self.backend not in INFERENCE_BACKENDS:
+            raise ValueError(f"Unknown inference backend '{self.backend}', expected one of {INFERENCE_BACKENDS}")
+
+        # model_uri disimpan apa adanya (tampilan dan muat ulang); semua artefak dimuat
+        # dari resolved_uri. URI registry yang dapat berpindah (stage/alias) diubah
+        # sekali ke versi konkret, sehingga model, snapshot, preprocessor, dan
+        # threshold layanan ini pasti berasal dari versi yang sama.
+        self.model_uri = model_uri or os.environ.get("MODEL_URI")
+        self.resolved_uri = model_loader.resolve_model_uri(self.model_uri)[1] if self.model_uri else None
+        self._cache_dir = cache_dir
+        self._model = None
+        self.compiled = None
+        self.lookup = None
+        snapshot = None
+        if self.model_uri and self.backend in ("compiled", "lookup"):
+            # Snapshot CompiledForest hanya butuh NumPy; model sklearn baru dimuat
+            # (beserta impor sklearn) jika atribut model benar-benar diakses
+            snapshot = model_loader.load_compiled_snapshot(self.resolved_uri, cache_dir=cache_dir)
+        if snapshot is not None:
+            self.compiled, self.model_version = snapshot
+        elif self.model_uri:
+            # Model dideserialisasi sekali lalu dimuat dari cache joblib (mmap read-only)
+            self._model, self.model_version = model_loader.load_model(self.resolved_uri, cache_dir=cache_dir)
+        else:
+            # Tanpa artefak, latih model dummy dengan seed tetap agar setiap
+            # worker memiliki model yang identik
+            # Diperbarui ke 8 fitur untuk mencocokkan output preprocessing Titanic
+            # (Pclass, Sex, Age, SibSp, Parch, Fare, Embarked_Q, Embarked_S)
+            from sklearn.ensemble import RandomForestClassifier
+            rng = np.random.default_rng(42)
+            X_dummy = rng.random((10, N_FEATURES))
+            y_dummy = np.array([0, 1] * 5)
+            self._model = RandomForestClassifier(n_estimators=10, random_state=42)
+            self._model.fit(X_dummy, y_dummy)
+            self.model_version = "dummy"
+
+        if self.backend != "sklearn" and self.compiled is None:
+            self.compiled = CompiledForest.from_sklearn(self._model)
+            if self.model_uri:
+                model_loader.save_compiled_snapshot(self.resolved_uri, self.compiled, cache_dir=cache_dir)
+
+        # Urutan kolom persis seperti saat model dilatih
+        source = self.compiled if self._model is None else self._model
+        self.feature_columns = list(getattr(source, "feature_names_in_", FEATURE_NAMES))
+        if self.backend == "lookup":
+            self.lookup = self._load_lookup(cache_dir)
+        # Konfigurasi preprocessor dibaca sekarang, modul preprocessing (pandas)
+        # baru dimuat saat record mentah pertama datang
+        self._preprocessor_config = self._load_preprocessor_config(preprocessor_path, cache_dir)
+        self._preprocessor = None
+        self.decision_threshold = self._load_decision_threshold(decision_threshold, cache_dir)
+
+    @property
+    def model(self):
+        """Estimator sklearn; dimuat dari cache saat pertama diakses jika layanan dimulai dari snapshot."""
+        if self._model is None:
+            self._model, _ = model_loader.load_model(self.resolved_uri, cache_dir=self._cache_dir)
+        return self._model
+
+    def _load_lookup(self, cache_dir):
+        """
+        Muat atau bangun CategoricalLookup yang terverifikasi (lihat model_loader.load_lookup).
+        Jika tabel tidak identik dengan model, backend turun ke "compiled".
+        """
+        lookup = model_loader.load_lookup(self.resolved_uri, self.compiled, lambda: self.model,
+                                          self.feature_columns, cache_dir=cache_dir)
+        if lookup is None:
+            logger.warning("Falling back to the compiled backend for %s", self.model_uri)
+            self.backend = "compiled"
+        return lookup
+
+    @property
+    def cache_version(self):
+        """
+        Versi untuk cache prediksi: model dan threshold keputusan, karena
+        prediksi yang di-cache ikut berubah jika threshold diganti tanpa model baru.
+        """
+        return f"{self.model_version}:{self.decision_threshold:g}"
+
+    @property
+    def classes_(self):
+        """Label kelas model (tanpa memuat sklearn jika snapshot compiled dipakai)."""
+        return (self.compiled if self._model is None else self._model).classes_
+
+    def _load_preprocessor_config(self, preprocessor_path, cache_dir):
+        """Baca konfigurasi TitanicPreprocessor milik model; None jika tidak tersedia."""
+        preprocessor_path = preprocessor_path or os.environ.get("PREPROCESSOR_PATH")
+        if preprocessor_path:
+            with open(preprocessor_path) as f:
+                config = json.load(f)
+        elif self.model_uri:
+            config = model_loader.load_preprocessor_config(self.resolved_uri, cache_dir=cache_dir)
+        elif os.path.exists(DEFAULT_PREPROCESSOR_PATH):
+            with open(DEFAULT_PREPROCESSOR_PATH) as f:
+                config = json.load(f)
+        else:
+            config = None
+        return config
+
+    def _load_decision_threshold(self, decision_threshold, cache_dir):
+        """Tentukan threshold keputusan model ini (lihat __init__)."""
+        if decision_threshold is None and self.model_uri:
+            decision_threshold = model_loader.load_decision_threshold(self.resolved_uri, cache_dir=cache_dir)
+        if decision_threshold is None:
+            decision_threshold = os.environ.get("DECISION_THRESHOLD", DEFAULT_DECISION_THRESHOLD)
+        decision_threshold = float(decision_threshold)
+        if not 0.0 <= decision_threshold <= 1.0:
+            raise ValueError(f"Decision threshold must be between 0 and 1, got {decision_threshold}")
+        return decision_threshold
+
+    @property
+    def preprocessor(self):
+        """TitanicPreprocessor milik model (dibangun saat pertama dipakai); None jika tidak tersedia."""
+        if self._preprocessor is None and self._preprocessor_config is not None:
+            self._preprocessor = load_preprocessing_module().TitanicPreprocessor.from_dict(self._preprocessor_config)
+        return self._preprocessor
+
+    @preprocessor.setter
+    def preprocessor(self, preprocessor):
+        self._preprocessor = preprocessor
+        self._preprocessor_config = None
+
+    def transform_records(self, records):
+        """
+        Ubah record penumpang mentah menjadi matriks fitur dengan preprocessor model.
+        Args:
+            records (list): Daftar dict penumpang (Sex berupa string, Age boleh kosong).
+        Returns:
+            np.array: Matriks float64 berbentuk (n_baris, 8) sesuai urutan kolom training.
+        Raises:
+            ValueError: Jika model tidak memiliki preprocessor atau record tidak valid.
+        """
+        if self.preprocessor is None:
+            raise ValueError("Raw passenger records require a preprocessor; send encoded 'features' instead")
+        return self.preprocessor.transform_features(records, columns=self.feature_columns)
+
+    def _engine(self, n_rows):
+        """Pilih mesin inferensi untuk sejumlah baris sesuai backend."""
+        if self.backend == "compiled":
+            return self.compiled
+        if self.backend == "lookup":
+            return self.lookup
+        if self.backend == "auto" and n_rows <= AUTO_COMPILED_MAX_ROWS:
+            return self.compiled
+        return self.model
+
+    def decide(self, proba, classes=None):
+        """
+        Turunkan kelas dari probabilitas: untuk model biner, kelas positif jika
+        probabilitasnya melebihi decision_threshold; selain itu argmax.
+        Args:
+            proba (np.array): Probabilitas per kelas berbentuk (n_baris, n_kelas).
+            classes (np.array): Label kelas. Default: classes_ model.
+        Returns:
+            np.array: Label kelas berbentuk (n_baris,).
+        """
+        if classes is None:
+            classes = self.classes_
+        if self.decision_threshold == DEFAULT_DECISION_THRESHOLD or proba.shape[1] != 2:
+            # argmax persis seperti RandomForestClassifier.predict (p0 + p1 tidak selalu tepat 1.0)
+            return classes.take(np.argmax(proba, axis=1))
+        return classes.take((proba[:, 1] > self.decision_threshold).astype(np.intp))
+
+    def predict_with_proba(self, data):
+        """
+        Prediksi satu baris beserta probabilitasnya dari satu evaluasi forest.
         Args:
             data (list atau np.array): Fitur input.
         Returns:
-            int: Hasil prediksi.
+            tuple: (prediksi, np.array probabilitas per kelas).
         """
         # Pastikan input 2D
         data = np.array(data).reshape(1, -1)
-        return self.model.predict(data)[0]
+        engine = self._engine(1)
+        proba = engine.predict_proba(data)
+        return self.decide(proba, engine.classes_)[0], proba[0]
+
+    def predict(self, data):
+        """
+        Prediksi menggunakan model yang dimuat.
+        Args:
+            data (list atau np.array): Fitur input.
+        Returns:
+            int: Hasil prediksi (di bawah decision_threshold).
+        """
+        return self.predict_with_proba(data)[0]
+
+    def predict_batch(self, data):
+        """
+        Prediksi banyak baris sekaligus dengan satu panggilan model.
+        Args:
+            data (list atau np.array): Matriks fitur berbentuk (n_baris, 8).
+        Returns:
+            tuple: (np.array prediksi, np.array probabilitas per kelas).
+        """
+        X = np.asarray(data, dtype=np.float64)
+        if X.ndim != 2 or X.shape[1] != N_FEATURES:
+            raise ValueError(f"Expected feature matrix of shape (n, {N_FEATURES}), got {X.shape}")
+        # Satu evaluasi forest; prediksi kelas diturunkan dari probabilitas
+        engine = self._engine(X.shape[0])
+        proba = engine.predict_proba(X)
+        return self.decide(proba, engine.classes_), proba
 
 if __name__ == "__main__":
-    inference = ModelInference()
+    inference = ModelInference(sys.argv[1] if len(sys.argv) > 1 else None)
     # Data sampel diperbarui menjadi 8 fitur
     sample_data = [1, 0, 22.0, 1, 0, 7.25, 1, 0]
     print(f"Prediction for {sample_data}: {inference.predict(sample_data)}")
@@ -0,0 +1,297 @@
+import asyncio
+import concurrent.futures
+import importlib.util
+import json
+import os
+import sys
+import time
+from urllib.parse import parse_qs
+
+import numpy as np
+from prometheus_client import Gauge, Histogram, make_asgi_app
+from pydantic import ValidationError
+
+# Mode serving async (ASGI) untuk kontrak /predict yang sama dengan exporter Flask.
+# Permintaan yang datang bersamaan dikumpulkan oleh MicroBatcher lalu dinilai
+# dengan satu panggilan model. Jalankan dengan:
+#   uvicorn --app-dir "Monitor dan Logging" asgi_server:app --host 0.0.0.0 --port 5001
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+
+
+def _load_exporter():
+    """Muat modul exporter sekali (metrik, validasi, dan model dipakai bersama)."""
+    module = sys.modules.get("prometheus_exporter")
+    if module is None:
+        spec = importlib.util.spec_from_file_location(
+            "prometheus_exporter", os.path.join(script_dir, "3. prometheus-exporter.py"))
+        module = importlib.util.module_from_spec(spec)
+        sys.modules["prometheus_exporter"] = module
+        spec.loader.exec_module(module)
+    return module
+
+
+exporter = _load_exporter()
+
+# Konfigurasi micro-batching
+MAX_BATCH_SIZE = int(os.environ.get("MICROBATCH_MAX_SIZE", "64"))
+MAX_WAIT_SECONDS = float(os.environ.get("MICROBATCH_MAX_WAIT_MS", "2")) / 1000.0
+MAX_QUEUE_SIZE = int(os.environ.get("MICROBATCH_MAX_QUEUE", "10000"))
+
+# --- METRIK MICRO-BATCHING ---
+BATCH_SIZE = Histogram('microbatch_size', 'Jumlah permintaan per batch model',
+                       buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512))
+QUEUE_DEPTH = Gauge('microbatch_queue_depth', 'Jumlah permintaan yang menunggu di antrean batcher', multiprocess_mode='livesum')
+QUEUE_WAIT = Histogram('microbatch_queue_wait_seconds', 'Waktu tunggu permintaan di antrean sebelum dinilai',
+                       buckets=(0.0001, 0.0005, 0.001, 0.002, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0))
+
+
+class QueueFullError(Exception):
+    """Antrean batcher penuh; permintaan ditolak agar latensi tetap terbatas."""
+
+
+class MicroBatcher:
+    """
+    Kumpulkan permintaan prediksi satu baris menjadi batch.
+
+    Batch dikirim ke model saat berisi max_batch_size baris atau saat permintaan
+    pertama di batch sudah menunggu max_wait detik, mana yang lebih dulu.
+    Model dijalankan di thread terpisah agar event loop tetap menerima
+    permintaan baru; selama model bekerja, permintaan yang masuk menumpuk di
+    antrean dan otomatis membentuk batch berikutnya.
+
+    Setiap baris membawa layanan model yang ditangkap handler saat permintaan
+    dimulai. Jika model di-reload di tengah batch, baris dikelompokkan per
+    layanan sehingga hasil, cache, dan label versi selalu berasal dari model
+    yang sama.
+    """
+
+    def __init__(self, max_batch_size=MAX_BATCH_SIZE, max_wait=MAX_WAIT_SECONDS,
+                 max_queue_size=MAX_QUEUE_SIZE):
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.max_queue_size = max_queue_size
+        self._queue = None
+        self._task = None
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="microbatch")
+
+    def start(self):
+        """Mulai task batcher pada event loop yang sedang berjalan."""
+        if self._task is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Hentikan task batcher."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def submit(self, row, service):
+        """
+        Antrekan satu baris fitur dan tunggu hasil prediksinya.
+        Args:
+            row (list): Baris fitur yang sudah divalidasi.
+            service (ModelInference): Layanan model yang dipakai untuk menilai baris.
+        Returns:
+            tuple: (prediksi, probabilitas per kelas) untuk baris tersebut.
+        Raises:
+            QueueFullError: Jika antrean sudah mencapai max_queue_size.
+        """
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((row, service, future, time.perf_counter()))
+        except asyncio.QueueFull:
+            raise QueueFullError("Prediction queue is full")
+        QUEUE_DEPTH.set(self._queue.qsize())
+        return await future
+
+    async def _collect(self):
+        """Ambil satu batch dari antrean sesuai batas ukuran dan waktu tunggu."""
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            # Ambil yang sudah ada tanpa menunggu, baru tunggu sisa waktu jika perlu
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            QUEUE_DEPTH.set(self._queue.qsize())
+            BATCH_SIZE.observe(len(batch))
+            now = time.perf_counter()
+            for _, _, _, enqueued_at in batch:
+                QUEUE_WAIT.observe(now - enqueued_at)
+
+            # Biasanya satu grup; lebih dari satu hanya saat reload terjadi di tengah batch
+            groups = {}
+            for item in batch:
+                groups.setdefault(id(item[1]), []).append(item)
+            for items in groups.values():
+                await self._score(loop, items)
+
+    async def _score(self, loop, items):
+        """Nilai sekelompok baris dengan layanan model yang sama dan selesaikan future-nya."""
+        service = items[0][1]
+        X = np.array([row for row, _, _, _ in items], dtype=np.float64)
+        try:
+            predictions, proba = await loop.run_in_executor(self._executor, service.predict_batch, X)
+        except Exception as e:
+            for _, _, future, _ in items:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, _, future, _), prediction, row_proba in zip(items, predictions, proba):
+            if not future.done():
+                future.set_result((prediction, row_proba))
+
+
+batcher = MicroBatcher()
+metrics_app = make_asgi_app(exporter.metrics_registry())
+
+
+async def _read_body(receive):
+    body = b""
+    more_body = True
+    while more_body:
+        message = await receive()
+        body += message.get("body", b"")
+        more_body = message.get("more_body", False)
+    return body
+
+
+async def _send_json(send, status, payload):
+    body = json.dumps(payload, default=str).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _respond(send, timer, status, payload, outcome):
+    """Kirim respons JSON lalu rekam tahap-tahap permintaan ke STAGE_LATENCY."""
+    await _send_json(send, status, payload)
+    timer.mark("serialize")
+    return timer.finish(status, outcome)
+
+
+async def predict(scope, receive, send):
+    """Handler /predict dengan kontrak dan metrik yang sama seperti versi Flask."""
+    timer = exporter.StageTimer()
+    exporter.REQUEST_COUNT.inc()
+    # Tangkap layanan sekali: validasi, penilaian, cache, dan respons memakai model yang sama
+    service = exporter.model_service
+
+    try:
+        body = await _read_body(receive)
+        headers = dict(scope.get("headers") or [])
+        content_type = headers.get(b"content-type", b"").split(b";")[0].strip().decode("latin-1")
+        if content_type == exporter.BINARY_CONTENT_TYPE:
+            data = exporter.decode_binary_features(body)
+            timer.mark("parse")
+        else:
+            try:
+                json_data = exporter.json_loads(body) if body else None
+            except ValueError as e:
+                return await _respond(send, timer, 500, {'error': f"Failed to decode JSON object: {e}"}, "error")
+            timer.mark("parse")
+            if not json_data:
+                exporter.INVALID_REQUEST_COUNT.inc()
+                return await _respond(send, timer, 400, {'error': 'No JSON data provided'}, "invalid")
+            data = exporter.validate_features(json_data, service)
+        timer.mark("validate")
+
+        exporter.record_feature_metrics(data)
+        timer.mark("features")
+
+        # Baris yang sudah pernah dinilai dilayani dari cache tanpa masuk antrean;
+        # tahap inference mencakup waktu tunggu di antrean micro-batch
+        key = exporter.prediction_cache.make_key(data)
+        cached = exporter.result_cache.get(key, service.cache_version)
+        hit = cached is not None
+        if not hit:
+            try:
+                cached = await batcher.submit(data, service)
+            except QueueFullError as e:
+                timer.mark("inference")
+                return await _respond(send, timer, 503, {'error': str(e)}, "rejected")
+            exporter.result_cache.put(key, cached, service.cache_version)
+        prediction, proba = cached
+        timer.mark("inference")
+        exporter.record_prediction_metrics(prediction, proba)
+        if exporter.audit is not None:
+            # Jangan pernah menunggu antrean di event loop (policy block hanya untuk WSGI)
+            exporter.audit.log('/predict', data, prediction, service.model_version, blocking=False)
+        if exporter.shadow is not None:
+            exporter.shadow.submit(data, prediction)
+        timer.mark("record")
+
+        query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+        args = {name: values[-1] for name, values in query.items()}
+        total = await _respond(send, timer, 200,
+                               exporter.prediction_body(prediction, proba, service, exporter.wants_proba(args)),
+                               "cache_hit" if hit else "cache_miss")
+        exporter.REQUEST_LATENCY.observe(total)
+
+    except ValidationError as e:
+        exporter.INVALID_REQUEST_COUNT.inc()
+        timer.mark("validate")
+        return await _respond(send, timer, 400, {'error': e.errors()}, "invalid")
+    except (exporter.BinaryPayloadError, exporter.RawRecordError) as e:
+        exporter.INVALID_REQUEST_COUNT.inc()
+        timer.mark("validate")
+        return await _respond(send, timer, 400, {'error': str(e)}, "invalid")
+    except Exception as e:
+        return await _respond(send, timer, 500, {'error': str(e)}, "error")
+
+
+async def app(scope, receive, send):
+    """Aplikasi ASGI: /predict (micro-batched) dan /metrics."""
+    if scope["type"] == "lifespan":
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                exporter.start_background_services()
+                batcher.start()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await batcher.stop()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    path = scope["path"]
+    if path.startswith("/metrics"):
+        return await metrics_app(scope, receive, send)
+    if path == "/predict":
+        if scope["method"] != "POST":
+            return await _send_json(send, 405, {'error': 'Method not allowed'})
+        return await predict(scope, receive, send)
+    return await _send_json(send, 404, {'error': 'Not found'})
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    print("Starting async (ASGI) Prometheus Exporter on port 5001...")
+    uvicorn.run(app, host="0.0.0.0", port=5001)
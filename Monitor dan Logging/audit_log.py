@@ -0,0 +1,253 @@
+import glob
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+
+import numpy as np
+from prometheus_client import Counter, Gauge
+
+try:
+    # orjson jauh lebih cepat untuk serialisasi banyak record kecil; opsional
+    import orjson
+
+    def dumps(record):
+        return orjson.dumps(record, option=orjson.OPT_SERIALIZE_NUMPY)
+except ImportError:
+    def dumps(record):
+        return json.dumps(record, separators=(",", ":")).encode("utf-8")
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+
+# --- KONFIGURASI AUDIT LOG ---
+AUDIT_LOG_ENABLED = os.environ.get("AUDIT_LOG_ENABLED", "1") == "1"
+AUDIT_LOG_DIR = os.environ.get("AUDIT_LOG_DIR", os.path.join(script_dir, "audit_logs"))
+# Fraksi permintaan yang dicatat (1.0 = semua)
+AUDIT_LOG_SAMPLE_RATE = float(os.environ.get("AUDIT_LOG_SAMPLE_RATE", "1.0"))
+# Kapasitas antrean (jumlah item; satu item = satu /predict atau satu /predict/batch)
+AUDIT_LOG_QUEUE_SIZE = int(os.environ.get("AUDIT_LOG_QUEUE_SIZE", "10000"))
+# Kebijakan saat antrean penuh: "drop" (buang dan hitung) atau "block" (tunggu
+# hingga AUDIT_LOG_BLOCK_TIMEOUT detik, lalu buang dan hitung). Jalur async
+# (event loop ASGI) selalu memakai "drop" agar loop tidak pernah menunggu.
+AUDIT_LOG_POLICY = os.environ.get("AUDIT_LOG_POLICY", "drop")
+AUDIT_LOG_BLOCK_TIMEOUT = float(os.environ.get("AUDIT_LOG_BLOCK_TIMEOUT", "0.05"))
+# Batch ditulis jika berisi sejumlah record ini atau setelah interval flush
+AUDIT_LOG_BATCH_SIZE = int(os.environ.get("AUDIT_LOG_BATCH_SIZE", "512"))
+AUDIT_LOG_FLUSH_INTERVAL = float(os.environ.get("AUDIT_LOG_FLUSH_INTERVAL", "1.0"))
+# Rotasi file berdasarkan ukuran dan umur; file tertua di folder (semua worker dan
+# run sebelumnya) dihapus di atas AUDIT_LOG_MAX_FILES (0 = simpan semua)
+AUDIT_LOG_MAX_BYTES = int(os.environ.get("AUDIT_LOG_MAX_BYTES", str(64 * 1024 * 1024)))
+AUDIT_LOG_ROTATE_SECONDS = float(os.environ.get("AUDIT_LOG_ROTATE_SECONDS", "3600"))
+AUDIT_LOG_MAX_FILES = int(os.environ.get("AUDIT_LOG_MAX_FILES", "48"))
+
+POLICIES = ("drop", "block")
+
+# --- METRIK AUDIT LOG ---
+AUDIT_DROPPED = Counter('audit_log_dropped_total', 'Record audit (baris prediksi) yang dibuang karena antrean penuh')
+AUDIT_WRITTEN = Counter('audit_log_records_written_total', 'Record audit yang ditulis ke file')
+AUDIT_QUEUE_DEPTH = Gauge('audit_log_queue_depth', 'Jumlah item di antrean audit log',
+                          multiprocess_mode='livesum')
+
+logger = logging.getLogger(__name__)
+
+# Penanda berhenti untuk thread penulis
+_STOP = object()
+
+
+def _file_pid(path):
+    """Ambil PID penulis dari nama file audit-<tanggal>-<jam>-<pid>-<seq>.jsonl (None jika tidak cocok)."""
+    parts = os.path.basename(path).split("-")
+    try:
+        return int(parts[3])
+    except (IndexError, ValueError):
+        return None
+
+
+def _pid_alive(pid):
+    """Periksa apakah proses dengan PID tersebut masih berjalan."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Proses ada tetapi milik pengguna lain
+        return True
+    except OSError:
+        return False
+    return True
+
+
+class AuditLogger:
+    """
+    Pencatat prediksi asinkron: jalur permintaan hanya memasukkan tuple ke
+    antrean terbatas, sedangkan thread penulis membentuk record JSON,
+    menulisnya per batch, dan merotasi file JSONL berdasarkan ukuran dan umur.
+    """
+
+    def __init__(self, directory=AUDIT_LOG_DIR, sample_rate=AUDIT_LOG_SAMPLE_RATE,
+                 queue_size=AUDIT_LOG_QUEUE_SIZE, policy=AUDIT_LOG_POLICY,
+                 block_timeout=AUDIT_LOG_BLOCK_TIMEOUT, batch_size=AUDIT_LOG_BATCH_SIZE,
+                 flush_interval=AUDIT_LOG_FLUSH_INTERVAL, max_bytes=AUDIT_LOG_MAX_BYTES,
+                 rotate_seconds=AUDIT_LOG_ROTATE_SECONDS, max_files=AUDIT_LOG_MAX_FILES):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown audit log policy {policy!r}, expected one of {POLICIES}")
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.rotate_seconds = rotate_seconds
+        self.max_files = max_files
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = None
+        self._file = None
+        self._file_opened = 0.0
+        self._sequence = 0
+
+    # --- Jalur permintaan ---
+    def _enqueue(self, item, n_records, blocking):
+        try:
+            if blocking and self.policy == "block":
+                self._queue.put(item, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(item)
+        except queue.Full:
+            AUDIT_DROPPED.inc(n_records)
+
+    def log(self, endpoint, features, prediction, model_version, blocking=True):
+        """
+        Catat satu prediksi (disampel dengan sample_rate).
+        Args:
+            blocking (bool): False = jangan pernah menunggu antrean meskipun
+                policy "block" (dipakai dari event loop ASGI).
+        """
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return
+        self._enqueue((time.time(), endpoint, model_version, features, prediction), 1, blocking)
+
+    def log_batch(self, endpoint, X, predictions, model_version, blocking=True):
+        """
+        Catat prediksi satu batch sebagai satu item antrean. Sampling per baris
+        dilakukan di thread penulis agar jalur permintaan tetap O(1).
+        """
+        if self.sample_rate <= 0.0:
+            return
+        self._enqueue((time.time(), endpoint, model_version, X, predictions), len(predictions), blocking)
+
+    # --- Thread penulis ---
+    def _records(self, item):
+        ts, endpoint, version, features, prediction = item
+        if np.ndim(prediction) == 0:
+            yield {"ts": ts, "endpoint": endpoint, "model_version": version,
+                   "features": [float(v) for v in features], "prediction": int(prediction)}
+            return
+        X = np.asarray(features, dtype=np.float64)
+        predictions = np.asarray(prediction).astype(int)
+        rows = range(len(predictions))
+        if self.sample_rate < 1.0:
+            rows = np.flatnonzero(np.random.random(len(predictions)) < self.sample_rate)
+        for i in rows:
+            yield {"ts": ts, "endpoint": endpoint, "model_version": version,
+                   "features": X[i].tolist(), "prediction": int(predictions[i])}
+
+    def _open(self):
+        os.makedirs(self.directory, exist_ok=True)
+        # PID di nama file: setiap worker gunicorn menulis ke filenya sendiri
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        self._sequence += 1
+        path = os.path.join(self.directory, f"audit-{stamp}-{os.getpid()}-{self._sequence:04d}.jsonl")
+        self._file = open(path, "ab")
+        self._file_opened = time.monotonic()
+        self._prune()
+
+    def _mtime(self, path):
+        try:
+            return os.path.getmtime(path)
+        except OSError:
+            return 0.0
+
+    def _prune(self):
+        # Hapus file tertua di seluruh folder di atas batas max_files, termasuk file
+        # worker yang sudah didaur ulang dan run sebelumnya. File aktif proses ini dan
+        # file terbaru setiap worker lain yang masih hidup dilewati: worker bertrafik
+        # rendah bisa memegang file lama yang masih terbuka.
+        if self.max_files <= 0:
+            return
+        files = sorted(glob.glob(os.path.join(self.directory, "audit-*.jsonl")), key=self._mtime)
+        newest = {}
+        for path in files:
+            newest[_file_pid(path)] = path
+        active = {path for pid, path in newest.items() if pid is not None and _pid_alive(pid)}
+        for path in files[:-self.max_files]:
+            if path == self._file.name or path in active:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _write(self, batch):
+        """Tulis satu batch item ke file aktif, rotasi dulu jika perlu."""
+        lines = [dumps(record) for item in batch for record in self._records(item)]
+        if not lines:
+            return
+        if self._file is not None and (self._file.tell() >= self.max_bytes
+                                       or time.monotonic() - self._file_opened >= self.rotate_seconds):
+            self._close()
+        if self._file is not None and not os.path.exists(self._file.name):
+            # File aktif dihapus dari luar (mis. pembersihan manual); buka file baru
+            # agar record tidak ditulis ke inode yang sudah tidak terlihat
+            self._close()
+        if self._file is None:
+            self._open()
+        self._file.write(b"\n".join(lines) + b"\n")
+        self._file.flush()
+        AUDIT_WRITTEN.inc(len(lines))
+
+    def _run(self):
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        stopping = False
+        while not stopping:
+            try:
+                item = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+                if item is _STOP:
+                    stopping = True
+                else:
+                    batch.append(item)
+            except queue.Empty:
+                pass
+            if stopping or len(batch) >= self.batch_size or time.monotonic() >= deadline:
+                AUDIT_QUEUE_DEPTH.set(self._queue.qsize())
+                if batch:
+                    try:
+                        self._write(batch)
+                    except Exception:
+                        logger.exception("Failed to write %d audit log items", len(batch))
+                    batch = []
+                deadline = time.monotonic() + self.flush_interval
+        self._close()
+
+    def start(self):
+        """Mulai thread penulis (sekali per proses, setelah fork)."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="audit-log-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=5.0):
+        """Tulis sisa antrean lalu hentikan thread penulis."""
+        if self._thread is None:
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        self._thread = None
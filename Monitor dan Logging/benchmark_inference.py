@@ -0,0 +1,77 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+if script_dir not in sys.path:
+    sys.path.insert(0, script_dir)
+
+import model_loader
+from compiled_forest import CompiledForest
+
+BATCH_SIZES = [1, 32, 1024]
+DATA_PATH = os.path.join(script_dir, "..", "Membangun_model", "titanic_preprocessing.csv")
+
+
+def time_call(fn, X, repeat):
+    """Kembalikan median waktu (detik) dari `repeat` pemanggilan fn(X)."""
+    fn(X)  # pemanasan
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(X)
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings))
+
+
+def run_benchmark(model, X_pool, repeat=50):
+    """
+    Bandingkan sklearn dan CompiledForest pada beberapa ukuran batch.
+    Returns:
+        list: Satu dict hasil per ukuran batch.
+    """
+    compiled = CompiledForest.from_sklearn(model)
+    results = []
+    for batch_size in BATCH_SIZES:
+        X = X_pool[np.arange(batch_size) % len(X_pool)]
+        # Pastikan kedua backend memberi hasil yang identik sebelum diukur
+        if not np.array_equal(compiled.predict_proba(X), model.predict_proba(X)):
+            raise AssertionError(f"CompiledForest output differs from sklearn at batch size {batch_size}")
+        sklearn_time = time_call(model.predict_proba, X, repeat)
+        compiled_time = time_call(compiled.predict_proba, X, repeat)
+        results.append({
+            "batch_size": batch_size,
+            "sklearn_ms": sklearn_time * 1e3,
+            "compiled_ms": compiled_time * 1e3,
+            "speedup": sklearn_time / compiled_time,
+        })
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark sklearn vs CompiledForest inference")
+    parser.add_argument("--model-uri", default=os.environ.get("MODEL_URI"), help="Model to benchmark (default: train one)")
+    parser.add_argument("--n-estimators", type=int, default=100)
+    parser.add_argument("--max-depth", type=int, default=None)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    df = pd.read_csv(DATA_PATH)
+    X_pool = df.drop("Survived", axis=1).to_numpy(dtype=np.float64)
+
+    if args.model_uri:
+        model, version = model_loader.load_model(args.model_uri)
+        print(f"Benchmarking model {args.model_uri} (version {version})")
+    else:
+        model = RandomForestClassifier(n_estimators=args.n_estimators, max_depth=args.max_depth, random_state=42)
+        model.fit(X_pool, df["Survived"])
+        print(f"Benchmarking RandomForestClassifier(n_estimators={args.n_estimators}, max_depth={args.max_depth})")
+
+    print(f"{'batch':>6} {'sklearn (ms)':>13} {'compiled (ms)':>14} {'speedup':>8}")
+    for row in run_benchmark(model, X_pool, repeat=args.repeat):
+        print(f"{row['batch_size']:>6} {row['sklearn_ms']:>13.3f} {row['compiled_ms']:>14.3f} {row['speedup']:>7.1f}x")
@@ -0,0 +1,300 @@
+import os
+import warnings
+
+import numpy as np
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+
+# Fitur kontinu yang menjadi sumbu tabel; fitur lain (Pclass, Sex, SibSp, Parch,
+# Embarked_Q, Embarked_S) berupa integer kecil dan menjadi kunci tabel
+CONTINUOUS_FEATURES = ("Age", "Fare")
+# Data training yang menentukan kombinasi kategorikal yang ditabelkan
+LOOKUP_DATA_PATH = os.environ.get("LOOKUP_DATA_PATH", os.path.join(
+    script_dir, "..", "Eksperimen_SML_YudhaElfransyah", "preprocessing", "train_processed.csv"))
+
+
+def cell_representatives(edges):
+    """
+    Satu nilai float32 per sel dari threshold terurut: sel k memuat nilai v
+    dengan edges[k-1] < v <= edges[k], sel terakhir v > edges[-1]. Perwakilan
+    sel k adalah float32 terbesar <= edges[k]; sel tanpa float32 sama sekali
+    tidak pernah dicapai input dan nilainya di tabel tidak pernah dibaca.
+    Args:
+        edges (np.array): Threshold float64 unik dan terurut.
+    Returns:
+        np.array: float32 berbentuk (len(edges) + 1,).
+    """
+    if edges.size == 0:
+        return np.zeros(1, dtype=np.float32)
+    upper = edges.astype(np.float32)
+    upper = np.where(upper.astype(np.float64) > edges, np.nextafter(upper, np.float32(-np.inf)), upper)
+    last = np.nextafter(upper[-1], np.float32(np.inf))
+    if last <= edges[-1]:
+        last = np.nextafter(last, np.float32(np.inf))
+    return np.append(upper, last).astype(np.float32)
+
+
+def split_features(feature_names, continuous=CONTINUOUS_FEATURES):
+    """
+    Returns:
+        tuple: (indeks kolom kategorikal, indeks kolom kontinu sesuai urutan continuous).
+    """
+    feature_names = list(feature_names)
+    axis_idx = tuple(feature_names.index(name) for name in continuous)
+    return np.array([i for i in range(len(feature_names)) if i not in axis_idx]), axis_idx
+
+
+def categorical_combinations(X_train, categorical_idx):
+    """Kombinasi kategorikal unik (float32, -0.0 disamakan dengan 0.0) di data training."""
+    return np.unique(np.asarray(X_train, dtype=np.float32)[:, categorical_idx] + np.float32(0), axis=0)
+
+
+class CategoricalLookup:
+    """
+    Akselerator inferensi untuk forest dengan dua fitur kontinu.
+
+    Untuk setiap kombinasi fitur kategorikal yang muncul di data training,
+    forest direduksi ke bidang Age x Fare: hanya node yang dapat dicapai
+    kombinasi tersebut yang disimpan, dan threshold Age/Fare-nya membagi
+    bidang menjadi sel persegi dengan probabilitas konstan. Probabilitas
+    setiap sel dihitung sekali lewat CompiledForest, sehingga prediksi menjadi
+    satu lookup dict, dua binary search, dan satu indeks tabel.
+
+    Input dibandingkan dalam float32 seperti di sklearn, jadi hasilnya identik
+    dengan model asalnya. Kombinasi yang tidak ditabelkan atau nilai Age/Fare
+    yang tidak finite dilayani oleh mesin fallback (forest lengkap).
+    """
+
+    def __init__(self, tables, categorical_idx, axis_idx, classes, n_features, fallback, verified=False):
+        """
+        Args:
+            tables (dict): Kunci kombinasi (bytes float32) -> (edges Age, edges Fare, tabel probabilitas).
+            categorical_idx (np.array): Indeks kolom kategorikal.
+            axis_idx (tuple): Indeks kolom (Age, Fare).
+            classes (np.array): Label kelas.
+            n_features (int): Jumlah fitur input.
+            fallback: Mesin dengan predict_proba untuk baris di luar tabel.
+            verified (bool): True jika tabel sudah lolos verify() terhadap model asal.
+        """
+        self.tables = tables
+        self.categorical_idx = categorical_idx
+        self.axis_idx = axis_idx
+        self.classes_ = classes
+        self.n_features_in_ = n_features
+        self.fallback = fallback
+        self.verified = verified
+
+    @classmethod
+    def from_forest(cls, forest, X_train, feature_names, continuous=CONTINUOUS_FEATURES, fallback=None):
+        """
+        Bangun tabel untuk setiap kombinasi kategorikal di X_train.
+        Args:
+            forest (CompiledForest): Forest yang ditabelkan.
+            X_train (np.array): Baris training (n, n_fitur) dengan urutan feature_names.
+            feature_names (list): Nama fitur sesuai urutan kolom.
+            continuous (tuple): Dua fitur kontinu yang menjadi sumbu tabel.
+            fallback: Mesin untuk baris di luar tabel. Default: forest.
+        Returns:
+            CategoricalLookup
+        """
+        categorical_idx, axis_idx = split_features(feature_names, continuous)
+        lookup = cls({}, categorical_idx, axis_idx, forest.classes_, len(feature_names),
+                     fallback if fallback is not None else forest)
+        for combo in categorical_combinations(X_train, categorical_idx):
+            lookup.tables[combo.tobytes()] = lookup._build_table(forest, combo)
+        return lookup
+
+    def save(self, path):
+        """Simpan semua tabel ke file .npz agar start berikutnya tidak perlu membangun ulang."""
+        arrays = dict(categorical_idx=self.categorical_idx, axis_idx=np.asarray(self.axis_idx),
+                      classes=self.classes_, n_features=np.int64(self.n_features_in_),
+                      verified=np.bool_(self.verified),
+                      keys=np.array([np.frombuffer(key, dtype=np.float32) for key in self.tables]))
+        for i, (age_edges, fare_edges, table) in enumerate(self.tables.values()):
+            arrays[f"age_{i}"], arrays[f"fare_{i}"], arrays[f"table_{i}"] = age_edges, fare_edges, table
+        with open(path, "wb") as f:
+            np.savez(f, **arrays)
+
+    @classmethod
+    def load(cls, path, fallback):
+        """
+        Muat tabel hasil save().
+        Args:
+            path (str): File .npz.
+            fallback: Mesin untuk baris di luar tabel (forest lengkap).
+        Returns:
+            CategoricalLookup
+        """
+        with np.load(path, allow_pickle=False) as data:
+            tables = {key.tobytes(): (data[f"age_{i}"], data[f"fare_{i}"], data[f"table_{i}"])
+                      for i, key in enumerate(data["keys"])}
+            # Tabel lama tanpa penanda dianggap belum diverifikasi
+            verified = "verified" in data.files and bool(data["verified"])
+            return cls(tables, data["categorical_idx"], tuple(int(i) for i in data["axis_idx"]),
+                       data["classes"], int(data["n_features"]), fallback, verified)
+
+    def _reachable_thresholds(self, forest, row):
+        """
+        Threshold Age dan Fare di node yang dapat dicapai baris kategorikal ini.
+        Returns:
+            list: Per sumbu (Age, Fare), pasangan array (indeks pohon, threshold).
+        """
+        tree_of_node = np.repeat(np.arange(forest.n_estimators), np.diff(np.append(forest.roots, len(forest.left))))
+        node = forest.roots
+        found = [[], []]
+        # Telusuri semua pohon per level: node kategorikal mengikuti satu cabang,
+        # node Age/Fare mengikuti kedua cabang
+        while node.size:
+            node = node[~forest.is_leaf[node]]
+            feature = forest.feature[node]
+            on_axis = np.zeros(len(node), dtype=bool)
+            for i, axis in enumerate(self.axis_idx):
+                mask = feature == axis
+                found[i].append((tree_of_node[node[mask]], forest.threshold[node[mask]]))
+                on_axis |= mask
+            categorical = node[~on_axis]
+            go_left = row[forest.feature[categorical]] <= forest.threshold[categorical]
+            axis_nodes = node[on_axis]
+            node = np.concatenate([np.where(go_left, forest.left[categorical], forest.right[categorical]),
+                                   forest.left[axis_nodes], forest.right[axis_nodes]])
+        return [(np.concatenate([t for t, _ in pairs]), np.concatenate([v for _, v in pairs])) for pairs in found]
+
+    @staticmethod
+    def _tree_leaf_values(forest, root, X):
+        """Nilai daun (probabilitas per kelas) satu pohon untuk setiap baris X (float32)."""
+        node = np.full(len(X), root)
+        rows = np.arange(len(X))
+        active = rows[~forest.is_leaf[node]]
+        while active.size:
+            current = node[active]
+            go_left = X[active, forest.feature[current]] <= forest.threshold[current]
+            current = np.where(go_left, forest.left[current], forest.right[current])
+            node[active] = current
+            active = active[~forest.is_leaf[current]]
+        return forest.value[node]
+
+    def _build_table(self, forest, combo):
+        """
+        Tabel probabilitas satu kombinasi pada grid gabungan threshold semua pohon.
+        Setiap pohon dievaluasi pada grid kecil dari threshold-nya sendiri lalu
+        dipetakan ke grid gabungan; penjumlahan pohon berurutan lalu dibagi
+        jumlah pohon, sama persis dengan CompiledForest dan sklearn.
+        """
+        age, fare = self.axis_idx
+        row = np.zeros(self.n_features_in_, dtype=np.float32)
+        row[self.categorical_idx] = combo
+        (age_trees, age_thresholds), (fare_trees, fare_thresholds) = self._reachable_thresholds(forest, row)
+        age_edges, fare_edges = np.unique(age_thresholds), np.unique(fare_thresholds)
+        age_values, fare_values = cell_representatives(age_edges), cell_representatives(fare_edges)
+
+        table = np.zeros((len(age_values), len(fare_values), len(forest.classes_)))
+        for tree, root in enumerate(forest.roots):
+            tree_age = np.unique(age_thresholds[age_trees == tree])
+            tree_fare = np.unique(fare_thresholds[fare_trees == tree])
+            # Perwakilan grid gabungan jatuh ke sel yang sama di grid pohon
+            age_cells = np.searchsorted(tree_age, age_values)
+            fare_cells = np.searchsorted(tree_fare, fare_values)
+            tree_age_values, tree_fare_values = cell_representatives(tree_age), cell_representatives(tree_fare)
+            X = np.tile(row, (len(tree_age_values) * len(tree_fare_values), 1))
+            X[:, age] = np.repeat(tree_age_values, len(tree_fare_values))
+            X[:, fare] = np.tile(tree_fare_values, len(tree_age_values))
+            values = self._tree_leaf_values(forest, root, X).reshape(len(tree_age_values), len(tree_fare_values), -1)
+            # Dua take per sumbu jauh lebih cepat daripada fancy indexing 2D
+            table += np.take(np.take(values, age_cells, axis=0), fare_cells, axis=1)
+        table /= forest.n_estimators
+        return age_edges, fare_edges, table
+
+    @property
+    def n_cells(self):
+        """Jumlah sel di semua tabel."""
+        return sum(table.shape[0] * table.shape[1] for _, _, table in self.tables.values())
+
+    def predict_proba(self, X):
+        """
+        Probabilitas kelas; baris di luar tabel dinilai oleh fallback.
+        Returns:
+            np.array: Probabilitas berbentuk (n_baris, n_kelas).
+        """
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        X32 = X.astype(np.float32)
+        age, fare = self.axis_idx
+        # + 0 menyamakan -0.0 dengan 0.0 pada kunci
+        keys = np.ascontiguousarray(X32[:, self.categorical_idx] + np.float32(0))
+        finite = np.isfinite(X32[:, age]) & np.isfinite(X32[:, fare])
+        proba = np.empty((X.shape[0], len(self.classes_)))
+        missing = []
+        if X.shape[0] == 1:
+            entry = self.tables.get(keys[0].tobytes()) if finite[0] else None
+            if entry is None:
+                missing.append(0)
+            else:
+                age_edges, fare_edges, table = entry
+                proba[0] = table[np.searchsorted(age_edges, X32[0, age]), np.searchsorted(fare_edges, X32[0, fare])]
+        else:
+            # Kelompokkan baris per kombinasi agar binary search berjalan per kelompok
+            combos, inverse = np.unique(keys, axis=0, return_inverse=True)
+            inverse = inverse.reshape(-1)
+            order = np.argsort(inverse, kind="stable")
+            bounds = np.cumsum(np.bincount(inverse, minlength=len(combos)))
+            start = 0
+            for combo, end in zip(combos, bounds):
+                rows = order[start:end]
+                start = end
+                entry = self.tables.get(combo.tobytes())
+                if entry is None:
+                    missing.extend(rows.tolist())
+                    continue
+                missing.extend(rows[~finite[rows]].tolist())
+                rows = rows[finite[rows]]
+                age_edges, fare_edges, table = entry
+                proba[rows] = table[np.searchsorted(age_edges, X32[rows, age]),
+                                    np.searchsorted(fare_edges, X32[rows, fare])]
+        if missing:
+            missing = np.sort(np.asarray(missing, dtype=np.intp))
+            proba[missing] = self.fallback.predict_proba(X[missing])
+        return proba
+
+    def predict(self, X):
+        """Prediksi kelas (argmax probabilitas, sama seperti sklearn)."""
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1))
+
+    def verify(self, reference):
+        """
+        Bandingkan tabel dengan model acuan pada setiap sel setiap kombinasi,
+        ditambah nilai float32 tepat di kedua sisi setiap threshold. Jika
+        semua cocok, tabel ditandai verified (ikut tersimpan oleh save()).
+        Args:
+            reference: Estimator dengan predict_proba (mis. RandomForestClassifier asal).
+        Returns:
+            int: Jumlah baris yang diuji.
+        Raises:
+            AssertionError: Jika ada probabilitas yang berbeda.
+        """
+        age, fare = self.axis_idx
+        checked = 0
+        for key, (age_edges, fare_edges, _) in self.tables.items():
+            row = np.zeros(self.n_features_in_, dtype=np.float32)
+            row[self.categorical_idx] = np.frombuffer(key, dtype=np.float32)
+            axis_values = []
+            for edges in (age_edges, fare_edges):
+                probes = np.concatenate([cell_representatives(edges), edges.astype(np.float32),
+                                         np.nextafter(edges.astype(np.float32), np.float32(np.inf)),
+                                         np.nextafter(edges.astype(np.float32), np.float32(-np.inf))])
+                axis_values.append(np.unique(probes))
+            X = np.tile(row, (len(axis_values[0]) * len(axis_values[1]), 1)).astype(np.float64)
+            X[:, age] = np.repeat(axis_values[0], len(axis_values[1]))
+            X[:, fare] = np.tile(axis_values[1], len(axis_values[0]))
+            with warnings.catch_warnings():
+                # Model yang dilatih dengan DataFrame memperingatkan input array; urutan kolomnya sama
+                warnings.filterwarnings("ignore", message="X does not have valid feature names")
+                expected = reference.predict_proba(X)
+            actual = self.predict_proba(X)
+            mismatched = np.flatnonzero((actual != expected).any(axis=1))
+            if mismatched.size:
+                raise AssertionError(f"Lookup differs from the reference model on {mismatched.size} rows, "
+                                     f"first {X[mismatched[0]].tolist()}")
+            checked += len(X)
+        self.verified = True
+        return checked
@@ -0,0 +1,170 @@
+import numpy as np
+
+# Nilai fitur pada node daun sklearn (TREE_UNDEFINED)
+_LEAF_FEATURE = -2
+
+
+class CompiledForest:
+    """
+    RandomForestClassifier yang diratakan menjadi array node NumPy yang kontigu.
+
+    Semua pohon disimpan dalam satu set array (feature, threshold, left, right,
+    value) dengan indeks node absolut, sehingga seluruh ensemble dapat ditelusuri
+    bersamaan: setiap iterasi memajukan semua pasangan (pohon, baris) yang belum
+    mencapai daun satu level sekaligus.
+    Ini menghindari overhead per panggilan sklearn (validasi input, dispatch
+    joblib per estimator, alokasi array) yang mendominasi latensi satu baris.
+
+    Hasil predict/predict_proba identik dengan model sklearn asalnya: input
+    dibandingkan dalam float32 seperti di sklearn dan probabilitas per pohon
+    dijumlahkan dalam urutan estimator yang sama.
+    """
+
+    def __init__(self, feature, threshold, left, right, value, roots, classes, max_depth):
+        self.is_leaf = left == np.arange(len(left), dtype=left.dtype)
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.classes_ = classes
+        self.max_depth = max_depth
+        self.n_estimators = len(roots)
+        self.n_features_in_ = None
+
+    @classmethod
+    def from_sklearn(cls, model):
+        """
+        Ratakan RandomForestClassifier (atau DecisionTreeClassifier) yang sudah di-fit.
+        Args:
+            model: Estimator sklearn dengan atribut estimators_ atau tree_.
+        Returns:
+            CompiledForest: Mesin inferensi dengan antarmuka predict/predict_proba.
+        """
+        estimators = getattr(model, "estimators_", [model])
+        if getattr(model, "n_outputs_", 1) != 1:
+            raise ValueError("Only single-output classifiers can be compiled")
+        n_classes = int(model.n_classes_)
+
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for estimator in estimators:
+            tree = estimator.tree_
+            node_ids = np.arange(tree.node_count, dtype=np.int32)
+            is_leaf = tree.children_left == -1
+
+            # Daun menunjuk ke dirinya sendiri; ini juga menjadi penanda daun (is_leaf)
+            left = np.where(is_leaf, node_ids, tree.children_left).astype(np.int32) + offset
+            right = np.where(is_leaf, node_ids, tree.children_right).astype(np.int32) + offset
+            feature = np.where(tree.feature == _LEAF_FEATURE, 0, tree.feature).astype(np.intp)
+
+            # Normalisasi seperti DecisionTreeClassifier.predict_proba
+            value = tree.value[:, 0, :n_classes].astype(np.float64)
+            normalizer = value.sum(axis=1, keepdims=True)
+            normalizer[normalizer == 0.0] = 1.0
+            value = value / normalizer
+
+            features.append(feature)
+            thresholds.append(tree.threshold.astype(np.float64))
+            lefts.append(left)
+            rights.append(right)
+            values.append(value)
+            roots.append(offset)
+            offset += tree.node_count
+            max_depth = max(max_depth, tree.max_depth)
+
+        compiled = cls(
+            feature=np.ascontiguousarray(np.concatenate(features)),
+            threshold=np.ascontiguousarray(np.concatenate(thresholds)),
+            left=np.ascontiguousarray(np.concatenate(lefts)),
+            right=np.ascontiguousarray(np.concatenate(rights)),
+            value=np.ascontiguousarray(np.concatenate(values)),
+            roots=np.asarray(roots, dtype=np.int32),
+            classes=np.asarray(model.classes_),
+            max_depth=max_depth,
+        )
+        compiled.n_features_in_ = model.n_features_in_
+        if hasattr(model, "feature_names_in_"):
+            compiled.feature_names_in_ = np.asarray(model.feature_names_in_)
+        return compiled
+
+    def save(self, path):
+        """
+        Simpan array forest ke file .npz (snapshot startup). Memuat snapshot
+        hanya butuh NumPy, tanpa mengimpor sklearn atau unpickle estimator.
+        """
+        arrays = dict(feature=self.feature, threshold=self.threshold, left=self.left, right=self.right,
+                      value=self.value, roots=self.roots, classes=self.classes_,
+                      max_depth=np.int64(self.max_depth), n_features_in=np.int64(self.n_features_in_ or -1))
+        if hasattr(self, "feature_names_in_"):
+            arrays["feature_names_in"] = self.feature_names_in_.astype(str)
+        with open(path, "wb") as f:
+            np.savez(f, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Muat snapshot hasil save().
+        Returns:
+            CompiledForest: Mesin inferensi yang identik dengan saat disimpan.
+        """
+        with np.load(path, allow_pickle=False) as data:
+            compiled = cls(feature=data["feature"], threshold=data["threshold"], left=data["left"],
+                           right=data["right"], value=data["value"], roots=data["roots"],
+                           classes=data["classes"], max_depth=int(data["max_depth"]))
+            n_features = int(data["n_features_in"])
+            compiled.n_features_in_ = n_features if n_features >= 0 else None
+            if "feature_names_in" in data:
+                compiled.feature_names_in_ = data["feature_names_in"].astype(object)
+        return compiled
+
+    def apply(self, X):
+        """
+        Telusuri semua pohon untuk setiap baris.
+        Args:
+            X (np.array): Matriks fitur (n_baris, n_fitur).
+        Returns:
+            np.array: Indeks node daun absolut berbentuk (n_pohon, n_baris).
+        """
+        # sklearn membandingkan fitur dalam float32 dengan threshold float64
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        n_rows, n_features = X.shape
+        X_flat = X.ravel()
+
+        # Posisi (pohon, baris) diratakan; hanya posisi yang belum mencapai daun
+        # yang diproses pada tiap level sehingga pohon dangkal selesai lebih awal
+        node = np.repeat(self.roots, n_rows)
+        row_offset = np.tile(np.arange(n_rows) * n_features, self.n_estimators)
+        active = np.flatnonzero(~self.is_leaf[node])
+        while active.size:
+            current = node[active]
+            go_left = X_flat[row_offset[active] + self.feature[current]] <= self.threshold[current]
+            current = np.where(go_left, self.left[current], self.right[current])
+            node[active] = current
+            active = active[~self.is_leaf[current]]
+        return node.reshape(self.n_estimators, n_rows)
+
+    def predict_proba(self, X):
+        """
+        Probabilitas kelas rata-rata seluruh pohon.
+        Returns:
+            np.array: Probabilitas berbentuk (n_baris, n_kelas).
+        """
+        leaves = self.apply(X)
+        # Reduksi pada sumbu 0 menjumlahkan pohon satu per satu secara berurutan,
+        # sama seperti akumulasi di RandomForestClassifier.predict_proba
+        proba = self.value[leaves].sum(axis=0)
+        proba /= self.n_estimators
+        return proba
+
+    def predict(self, X):
+        """
+        Prediksi kelas (argmax probabilitas, sama seperti sklearn).
+        Returns:
+            np.array: Label kelas berbentuk (n_baris,).
+        """
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1))
@@ -0,0 +1,216 @@
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+from prometheus_client import Gauge
+
+from feature_csv import read_feature_csv
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+
+# Profil referensi: data hasil preprocessing yang dipakai untuk training
+DEFAULT_REFERENCE_PATH = os.environ.get("DRIFT_REFERENCE_PATH", os.path.join(
+    script_dir, "..", "Eksperimen_SML_YudhaElfransyah", "preprocessing", "train_processed.csv"))
+
+# Konfigurasi jendela geser: WINDOW_SECONDS dibagi menjadi WINDOW_BUCKETS sub-bucket;
+# sub-bucket tertua dibuang utuh sehingga memori tetap konstan
+WINDOW_SECONDS = float(os.environ.get("DRIFT_WINDOW_SECONDS", "600"))
+WINDOW_BUCKETS = int(os.environ.get("DRIFT_WINDOW_BUCKETS", "10"))
+N_BINS = int(os.environ.get("DRIFT_BINS", "10"))
+# Skor drift baru dihitung jika jendela berisi minimal sejumlah baris ini
+MIN_SAMPLES = int(os.environ.get("DRIFT_MIN_SAMPLES", "50"))
+# Smoothing proporsi bin kosong agar PSI tetap terhingga
+PSI_EPSILON = 1e-4
+
+# --- METRIK DRIFT FITUR ---
+# Pada mode multiprocess setiap worker memiliki jendelanya sendiri; livemax
+# melaporkan drift terburuk di antara worker yang hidup
+DRIFT_PSI = Gauge('feature_drift_psi', 'Population Stability Index fitur terhadap data training',
+                  ['feature'], multiprocess_mode='livemax')
+DRIFT_KS = Gauge('feature_drift_ks', 'Statistik Kolmogorov-Smirnov (dari bin) fitur terhadap data training',
+                 ['feature'], multiprocess_mode='livemax')
+DRIFT_MEAN_SHIFT = Gauge('feature_drift_mean_shift', 'Selisih rata-rata fitur dalam satuan std data training',
+                         ['feature'], multiprocess_mode='livemax')
+DRIFT_WINDOW_SAMPLES = Gauge('feature_drift_window_samples', 'Jumlah baris di jendela drift',
+                             multiprocess_mode='livesum')
+
+logger = logging.getLogger(__name__)
+
+
+def bin_index(X, edges):
+    """
+    Nomor bin untuk setiap nilai: jumlah batas bin yang lebih kecil dari nilai.
+    Args:
+        X (np.array): Matriks (n, n_fitur).
+        edges (np.array): Batas bin (n_fitur, n_bins - 1), dipad dengan +inf.
+    Returns:
+        np.array: Indeks bin int (n, n_fitur).
+    """
+    return (X[:, :, None] > edges[None, :, :]).sum(axis=2)
+
+
+class ReferenceProfile:
+    """Distribusi fitur data training: batas bin kuantil, proporsi per bin, rata-rata dan std."""
+
+    def __init__(self, feature_names, edges, proportions, mean, std):
+        self.feature_names = list(feature_names)
+        self.edges = edges
+        self.proportions = proportions
+        self.mean = mean
+        self.std = std
+
+    @classmethod
+    def from_data(cls, X, feature_names, n_bins=N_BINS):
+        """
+        Bangun profil dari matriks fitur referensi. Batas bin adalah kuantil
+        referensi; untuk fitur diskrit (mis. Sex, Pclass) batas yang kembar
+        digabung sehingga setiap nilai mendapat bin sendiri.
+        """
+        X = np.asarray(X, dtype=np.float64)
+        n_features = X.shape[1]
+        quantiles = np.linspace(0, 1, n_bins + 1)[1:-1]
+        edges = np.full((n_features, n_bins - 1), np.inf)
+        for j in range(n_features):
+            unique_edges = np.unique(np.quantile(X[:, j], quantiles))
+            edges[j, :len(unique_edges)] = unique_edges
+
+        idx = bin_index(X, edges)
+        counts = np.zeros((n_features, n_bins))
+        np.add.at(counts, (np.broadcast_to(np.arange(n_features), idx.shape), idx), 1)
+        std = X.std(axis=0)
+        return cls(feature_names, edges, counts / len(X), X.mean(axis=0), np.where(std > 0, std, 1.0))
+
+    @classmethod
+    def from_csv(cls, path, feature_names, n_bins=N_BINS):
+        """Bangun profil dari CSV hasil preprocessing (kolom diurutkan sesuai feature_names)."""
+        return cls.from_data(read_feature_csv(path, feature_names), feature_names, n_bins)
+
+
+class DriftMonitor:
+    """
+    Sketch streaming per fitur dalam jendela waktu geser.
+
+    Setiap sub-bucket menyimpan hitungan per bin (bin = kuantil data training),
+    jumlah baris, serta jumlah dan jumlah kuadrat per fitur (rata-rata dan
+    varians berjalan). Update hanya beberapa operasi numpy kecil di bawah lock
+    sehingga aman dipanggil di jalur permintaan; skor drift dihitung terpisah
+    oleh export(), mis. pada tick sampler metrik sistem.
+    """
+
+    def __init__(self, reference, window_seconds=WINDOW_SECONDS, n_buckets=WINDOW_BUCKETS,
+                 min_samples=MIN_SAMPLES, clock=time.monotonic):
+        self.reference = reference
+        self.bucket_seconds = window_seconds / n_buckets
+        self.n_buckets = n_buckets
+        self.min_samples = min_samples
+        self._clock = clock
+        n_features, n_bins = reference.proportions.shape
+        self._features = np.arange(n_features)
+        self._counts = np.zeros((n_buckets, n_features, n_bins), dtype=np.int64)
+        self._n = np.zeros(n_buckets, dtype=np.int64)
+        self._sum = np.zeros((n_buckets, n_features))
+        self._sumsq = np.zeros((n_buckets, n_features))
+        self._epochs = np.full(n_buckets, -1, dtype=np.int64)
+        self._lock = threading.Lock()
+
+    def _bucket(self, epoch):
+        # Dipanggil dengan lock dipegang: kosongkan sub-bucket jika berisi epoch lama
+        slot = epoch % self.n_buckets
+        if self._epochs[slot] != epoch:
+            self._counts[slot] = 0
+            self._n[slot] = 0
+            self._sum[slot] = 0.0
+            self._sumsq[slot] = 0.0
+            self._epochs[slot] = epoch
+        return slot
+
+    def update(self, row):
+        """Tambahkan satu baris fitur (jalur /predict)."""
+        row = np.asarray(row, dtype=np.float64)
+        idx = (row[:, None] > self.reference.edges).sum(axis=1)
+        epoch = int(self._clock() // self.bucket_seconds)
+        with self._lock:
+            slot = self._bucket(epoch)
+            self._counts[slot, self._features, idx] += 1
+            self._n[slot] += 1
+            self._sum[slot] += row
+            self._sumsq[slot] += row * row
+
+    def update_many(self, X):
+        """Tambahkan banyak baris sekaligus (jalur /predict/batch)."""
+        X = np.asarray(X, dtype=np.float64)
+        if X.size == 0:
+            return
+        idx = bin_index(X, self.reference.edges)
+        n_bins = self._counts.shape[2]
+        # Hitungan per (fitur, bin) lewat satu bincount pada indeks datar
+        counts = np.bincount((self._features * n_bins + idx).ravel(),
+                             minlength=len(self._features) * n_bins).reshape(-1, n_bins)
+        epoch = int(self._clock() // self.bucket_seconds)
+        with self._lock:
+            slot = self._bucket(epoch)
+            self._counts[slot] += counts
+            self._n[slot] += X.shape[0]
+            self._sum[slot] += X.sum(axis=0)
+            self._sumsq[slot] += (X * X).sum(axis=0)
+
+    def window(self):
+        """
+        Gabungkan sub-bucket yang masih di dalam jendela.
+        Returns:
+            tuple: (hitungan per bin, jumlah baris, jumlah, jumlah kuadrat).
+        """
+        current = int(self._clock() // self.bucket_seconds)
+        with self._lock:
+            live = self._epochs > current - self.n_buckets
+            return (self._counts[live].sum(axis=0), int(self._n[live].sum()),
+                    self._sum[live].sum(axis=0), self._sumsq[live].sum(axis=0))
+
+    def scores(self):
+        """
+        Hitung skor drift per fitur dari isi jendela.
+        Returns:
+            dict atau None: {"n", "psi", "ks", "mean", "std", "mean_shift"} (array per fitur),
+                atau None jika jendela berisi kurang dari min_samples baris.
+        """
+        counts, n, total, total_sq = self.window()
+        if n < self.min_samples:
+            return None
+        ref = self.reference
+        live = counts / n
+        p = np.clip(live, PSI_EPSILON, None)
+        q = np.clip(ref.proportions, PSI_EPSILON, None)
+        psi = ((p - q) * np.log(p / q)).sum(axis=1)
+        ks = np.abs(np.cumsum(live, axis=1) - np.cumsum(ref.proportions, axis=1)).max(axis=1)
+        mean = total / n
+        std = np.sqrt(np.maximum(total_sq / n - mean * mean, 0.0))
+        return {"n": n, "psi": psi, "ks": ks, "mean": mean, "std": std,
+                "mean_shift": (mean - ref.mean) / ref.std}
+
+    def export(self):
+        """Perbarui gauge drift dari isi jendela (0 jika sampel belum cukup)."""
+        result = self.scores()
+        n_features = len(self.reference.feature_names)
+        zeros = np.zeros(n_features)
+        psi, ks, shift = (zeros, zeros, zeros) if result is None else (
+            result["psi"], result["ks"], result["mean_shift"])
+        for j, name in enumerate(self.reference.feature_names):
+            DRIFT_PSI.labels(feature=name).set(float(psi[j]))
+            DRIFT_KS.labels(feature=name).set(float(ks[j]))
+            DRIFT_MEAN_SHIFT.labels(feature=name).set(float(shift[j]))
+        DRIFT_WINDOW_SAMPLES.set(0 if result is None else result["n"])
+        return result
+
+
+def load_default_monitor(feature_names, reference_path=DEFAULT_REFERENCE_PATH):
+    """
+    Buat DriftMonitor dengan profil referensi dari data training.
+    Returns:
+        DriftMonitor atau None: None jika file referensi tidak ditemukan.
+    """
+    if not os.path.exists(reference_path):
+        logger.warning("Drift reference %s not found, drift monitoring disabled", reference_path)
+        return None
+    return DriftMonitor(ReferenceProfile.from_csv(reference_path, feature_names))
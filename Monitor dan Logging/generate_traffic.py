@@ -1,3 +1,4 @@
+# Generator trafik ringan untuk demo dashboard; untuk uji beban gunakan load_test.py
 import requests
 import time
 import random
@@ -9,8 +10,10 @@ print("Press Ctrl+C to stop.")
 
 try:
     while True:
-        # Fitur dummy sesuai 7.inference.py (5 fitur)
-        features = [random.random() for _ in range(5)]
+        # 8 fitur sesuai 7. inference.py: Pclass, Sex, Age, SibSp, Parch, Fare, Embarked_Q, Embarked_S
+        embarked = random.choice([(0, 0), (1, 0), (0, 1)])
+        features = [random.choice([1, 2, 3]), random.choice([0, 1]), round(random.uniform(1, 80), 1),
+                    random.randint(0, 3), random.randint(0, 2), round(random.uniform(5, 250), 2), *embarked]
         payload = {"features": features}
         
         try:
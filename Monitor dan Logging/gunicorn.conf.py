@@ -0,0 +1,60 @@
+import gc
+import glob
+import multiprocessing
+import os
+import tempfile
+
+# Konfigurasi gunicorn untuk mode produksi multi-worker:
+#   gunicorn --chdir "Monitor dan Logging" -c gunicorn.conf.py wsgi:app
+#
+# - preload_app: model dimuat sekali di master lalu dibagi ke worker lewat fork
+#   (copy-on-write), sehingga memori tidak tumbuh sebanding jumlah worker.
+# - PROMETHEUS_MULTIPROC_DIR: setiap worker menulis metrik ke file mmap dan
+#   /metrics menggabungkannya, jadi angka tidak tergantung worker yang menjawab.
+
+bind = os.environ.get("BIND", "0.0.0.0:5001")
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+# Diekspor agar aplikasi tahu jumlah worker (mis. membagi anggaran CPU shadow scoring)
+os.environ["WEB_CONCURRENCY"] = str(workers)
+threads = int(os.environ.get("GUNICORN_THREADS", "1"))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "30"))
+# Diekspor agar aplikasi (mis. batas sesi /debug/profile) tahu timeout worker
+os.environ["GUNICORN_TIMEOUT"] = str(timeout)
+preload_app = True
+
+# Harus diset sebelum prometheus_client membuat metrik pertama (saat preload)
+if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = os.path.join(tempfile.gettempdir(), "prometheus_multiproc")
+_multiproc_dir = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+os.makedirs(_multiproc_dir, exist_ok=True)
+
+
+def on_starting(server):
+    # Bersihkan file metrik dari run sebelumnya agar counter tidak ikut terjumlah.
+    # Hook ini hanya berjalan sekali saat master mulai (file config dieksekusi
+    # ulang pada reload SIGHUP), dan hanya file *.db yang dihapus. Dengan
+    # preload_app, master sudah membuat file metriknya sendiri sebelum hook ini
+    # dipanggil, jadi file milik PID master dipertahankan.
+    for path in glob.glob(os.path.join(_multiproc_dir, "*.db")):
+        if not path.endswith(f"_{os.getpid()}.db"):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+def pre_fork(server, worker):
+    # Pindahkan objek yang sudah ada (termasuk model) ke generasi permanen agar
+    # garbage collector di worker tidak menyentuhnya dan memicu copy-on-write
+    gc.freeze()
+
+
+def post_worker_init(worker):
+    # Thread background tidak ikut ter-fork, jadi dimulai di setiap worker
+    import wsgi
+    wsgi.exporter.start_background_services()
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
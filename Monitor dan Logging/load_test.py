@@ -0,0 +1,305 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+import numpy as np
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+
+DEFAULT_URL = "http://localhost:5001"
+# Baris valid diambil dari data hasil preprocessing agar distribusi fitur realistis
+DATA_PATH = os.path.join(script_dir, "..", "Eksperimen_SML_YudhaElfransyah", "preprocessing", "train_processed.csv")
+FEATURE_NAMES = ['Pclass', 'Sex', 'Age', 'SibSp', 'Parch', 'Fare', 'Embarked_Q', 'Embarked_S']
+PERCENTILES = (50, 90, 95, 99, 99.9)
+
+# Payload tidak valid yang harus dijawab 400 oleh exporter
+INVALID_PAYLOADS = [
+    {},                                              # body kosong
+    {"wrong_key": [1, 2, 3]},                        # kunci salah
+    {"features": ["abc", 0, 22.0, 1, 0, 7.25, 0, 1]},  # fitur bukan angka
+]
+
+
+class LatencyHistogram:
+    """
+    Histogram latensi log-linear ala HDR Histogram.
+    Nilai disimpan dalam mikrodetik; setiap rentang pangkat dua dibagi menjadi
+    sub-bucket linear sehingga galat relatif maksimum 2^-(sub_bits-1)
+    (sub_bits=11 -> ~0.1%, tiga digit signifikan) dengan memori tetap.
+    """
+
+    def __init__(self, max_value_us=60_000_000, sub_bits=11):
+        self.sub_bits = sub_bits
+        self.sub_count = 1 << sub_bits
+        self.half = self.sub_count // 2
+        self.max_value_us = max_value_us
+        self.counts = np.zeros(self._index(max_value_us) + 1, dtype=np.int64)
+        self.total = 0
+        self.sum_us = 0
+        self.min_us = None
+        self.max_us = 0
+
+    def _index(self, value):
+        magnitude = max(value.bit_length() - self.sub_bits, 0)
+        return magnitude * self.half + (value >> magnitude)
+
+    def _value(self, index):
+        # Nilai tertinggi yang setara dengan bucket (seperti HDR Histogram)
+        if index < self.sub_count:
+            return index
+        magnitude = (index - self.sub_count) // self.half + 1
+        sub = (index - self.sub_count) % self.half + self.half
+        return ((sub + 1) << magnitude) - 1
+
+    def record(self, seconds):
+        """Rekam satu latensi (detik); nilai di atas max_value_us dipotong."""
+        value = min(max(int(seconds * 1e6), 0), self.max_value_us)
+        self.counts[self._index(value)] += 1
+        self.total += 1
+        self.sum_us += value
+        self.max_us = max(self.max_us, value)
+        self.min_us = value if self.min_us is None else min(self.min_us, value)
+
+    def merge(self, other):
+        """Gabungkan histogram lain (dengan konfigurasi sama) ke histogram ini."""
+        self.counts += other.counts
+        self.total += other.total
+        self.sum_us += other.sum_us
+        self.max_us = max(self.max_us, other.max_us)
+        if other.min_us is not None:
+            self.min_us = other.min_us if self.min_us is None else min(self.min_us, other.min_us)
+
+    def percentile(self, p):
+        """Latensi (mikrodetik) pada persentil p (0-100)."""
+        if self.total == 0:
+            return 0
+        rank = max(int(np.ceil(p / 100 * self.total)), 1)
+        index = int(np.searchsorted(np.cumsum(self.counts), rank))
+        return min(self._value(index), self.max_us)
+
+    def summary(self, percentiles=PERCENTILES):
+        """Ringkasan latensi dalam milidetik."""
+        result = {"count": self.total,
+                  "mean_ms": self.sum_us / self.total / 1000 if self.total else 0.0,
+                  "min_ms": (self.min_us or 0) / 1000,
+                  "max_ms": self.max_us / 1000}
+        for p in percentiles:
+            result[f"p{p:g}_ms"] = self.percentile(p) / 1000
+        return result
+
+
+class PayloadMix:
+    """Pembuat payload: baris valid dari data training dan payload tidak valid sesuai rasio."""
+
+    def __init__(self, rows, invalid_ratio=0.0, batch_size=1, jitter=0.0, seed=None):
+        self.rows = [list(map(float, row)) for row in rows]
+        self.invalid_ratio = invalid_ratio
+        self.batch_size = batch_size
+        self.jitter = jitter
+        self.random = random.Random(seed)
+
+    def _row(self):
+        row = list(self.random.choice(self.rows))
+        if self.jitter:
+            # Geser Umur dan Tarif agar cache prediksi tidak selalu kena
+            row[2] = max(row[2] + self.random.uniform(-self.jitter, self.jitter), 0.0)
+            row[5] = max(row[5] * (1 + self.random.uniform(-self.jitter, self.jitter) / 100), 0.0)
+        return row
+
+    def next(self):
+        """
+        Returns:
+            tuple: (payload, valid) dengan valid=False untuk payload yang seharusnya ditolak.
+        """
+        if self.random.random() < self.invalid_ratio:
+            return self.random.choice(INVALID_PAYLOADS), False
+        if self.batch_size > 1:
+            return {"instances": [self._row() for _ in range(self.batch_size)]}, True
+        return {"features": self._row()}, True
+
+
+def load_rows(path=DATA_PATH):
+    """Muat baris fitur dari CSV hasil preprocessing (tanpa kolom target)."""
+    import pandas as pd
+    return pd.read_csv(path)[FEATURE_NAMES].to_numpy(dtype=np.float64)
+
+
+class LoadTestResult:
+    """Hasil agregat satu run: histogram latensi per kelompok dan hitungan status."""
+
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        self.valid_latency = LatencyHistogram()
+        self.status_counts = {}
+        self.unexpected = 0
+        self.errors = 0
+        self.elapsed = 0.0
+
+    def record(self, valid, status, seconds):
+        self.latency.record(seconds)
+        if valid:
+            self.valid_latency.record(seconds)
+        self.status_counts[str(status)] = self.status_counts.get(str(status), 0) + 1
+        # Payload valid harus 200, payload tidak valid harus 4xx
+        if (valid and status != 200) or (not valid and not 400 <= status < 500):
+            self.unexpected += 1
+
+    def to_dict(self):
+        total = self.latency.total + self.errors
+        return {
+            "requests": total,
+            "elapsed_seconds": self.elapsed,
+            "throughput_rps": total / self.elapsed if self.elapsed else 0.0,
+            "status_counts": self.status_counts,
+            "unexpected_status": self.unexpected,
+            "connection_errors": self.errors,
+            "latency": self.latency.summary(),
+            "valid_latency": self.valid_latency.summary(),
+        }
+
+
+async def _send(session, url, payload, valid, result, scheduled=None):
+    # Untuk mode laju tetap latensi diukur dari waktu kirim terjadwal sehingga
+    # antrean di sisi klien ikut terhitung (koreksi coordinated omission)
+    start = scheduled if scheduled is not None else time.perf_counter()
+    try:
+        async with session.post(url, json=payload) as response:
+            await response.read()
+            status = response.status
+    except Exception:
+        result.errors += 1
+        return
+    result.record(valid, status, time.perf_counter() - start)
+
+
+async def run_load_test(url, mix, duration, concurrency=10, rps=None, warmup=0.0, max_requests=None):
+    """
+    Jalankan uji beban terhadap satu endpoint.
+    Args:
+        url (str): URL endpoint lengkap (mis. http://localhost:5001/predict).
+        mix (PayloadMix): Sumber payload.
+        duration (float): Lama pengukuran (detik).
+        concurrency (int): Jumlah worker (mode tertutup) atau batas request in-flight (mode laju tetap).
+        rps (float): Jika diset, kirim dengan laju tetap (mode terbuka) alih-alih back-to-back.
+        warmup (float): Lama pemanasan (detik) yang tidak ikut diukur.
+        max_requests (int): Berhenti lebih awal setelah sejumlah request.
+    Returns:
+        LoadTestResult: Hasil pengukuran.
+    """
+    import aiohttp
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    timeout = aiohttp.ClientTimeout(total=30)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        if warmup > 0:
+            await _run_phase(session, url, mix, warmup, concurrency, rps, LoadTestResult(), None)
+        result = LoadTestResult()
+        start = time.perf_counter()
+        await _run_phase(session, url, mix, duration, concurrency, rps, result, max_requests)
+        result.elapsed = time.perf_counter() - start
+    return result
+
+
+async def _run_phase(session, url, mix, duration, concurrency, rps, result, max_requests):
+    deadline = time.perf_counter() + duration
+    budget = [max_requests if max_requests is not None else float("inf")]
+
+    def take():
+        if budget[0] <= 0 or time.perf_counter() >= deadline:
+            return False
+        budget[0] -= 1
+        return True
+
+    if rps is None:
+        async def worker():
+            while take():
+                payload, valid = mix.next()
+                await _send(session, url, payload, valid, result)
+        await asyncio.gather(*[worker() for _ in range(concurrency)])
+        return
+
+    # Mode laju tetap: jadwal kirim tidak bergantung pada respons sebelumnya
+    in_flight = asyncio.Semaphore(concurrency)
+    interval = 1.0 / rps
+    scheduled = time.perf_counter()
+    tasks = set()
+
+    async def fire(payload, valid, at):
+        async with in_flight:
+            await _send(session, url, payload, valid, result, scheduled=at)
+
+    while take():
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        payload, valid = mix.next()
+        task = asyncio.create_task(fire(payload, valid, scheduled))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+        scheduled += interval
+    if tasks:
+        await asyncio.gather(*tasks)
+
+
+def print_summary(report):
+    """Cetak ringkasan hasil ke stdout."""
+    print(f"Requests: {report['requests']} in {report['elapsed_seconds']:.2f}s "
+          f"({report['throughput_rps']:.1f} req/s)")
+    print(f"Status: {report['status_counts']} | unexpected: {report['unexpected_status']} "
+          f"| connection errors: {report['connection_errors']}")
+    latency = report['latency']
+    print("Latency (ms): " + " ".join(
+        f"{key[:-3]}={value:.3f}" for key, value in latency.items() if key.endswith("_ms")))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Async load generator for the prediction exporter")
+    parser.add_argument("--url", default=DEFAULT_URL, help="Base URL of the exporter")
+    parser.add_argument("--endpoint", choices=["predict", "batch"], default="predict",
+                        help="predict = /predict, batch = /predict/batch")
+    parser.add_argument("--batch-size", type=int, default=32, help="Rows per /predict/batch request")
+    parser.add_argument("--duration", type=float, default=30.0, help="Measurement duration in seconds")
+    parser.add_argument("--warmup", type=float, default=2.0, help="Warmup duration in seconds (not measured)")
+    parser.add_argument("--requests", type=int, default=None, help="Stop after this many requests")
+    parser.add_argument("--concurrency", type=int, default=32,
+                        help="Concurrent workers (closed loop) or max in-flight requests (with --rps)")
+    parser.add_argument("--rps", type=float, default=None, help="Target request rate (open loop)")
+    parser.add_argument("--invalid-ratio", type=float, default=0.0, help="Fraction of invalid payloads")
+    parser.add_argument("--jitter", type=float, default=0.0,
+                        help="Random perturbation of Age (years) and Fare (percent) to bypass the prediction cache")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed for the payload mix")
+    parser.add_argument("--json", dest="json_path", default=None, help="Write the report as JSON to this file")
+    args = parser.parse_args(argv)
+
+    path = "/predict" if args.endpoint == "predict" else "/predict/batch"
+    batch_size = args.batch_size if args.endpoint == "batch" else 1
+    mix = PayloadMix(load_rows(), args.invalid_ratio, batch_size, args.jitter, args.seed)
+
+    mode = f"{args.rps:g} req/s" if args.rps else f"concurrency {args.concurrency}"
+    print(f"Load testing {args.url.rstrip('/')}{path} ({mode}, {args.duration:g}s)...")
+    result = asyncio.run(run_load_test(args.url.rstrip('/') + path, mix, args.duration, args.concurrency,
+                                       args.rps, args.warmup, args.requests))
+    report = result.to_dict()
+    report["config"] = {
+        "url": args.url, "endpoint": path, "batch_size": batch_size, "duration": args.duration,
+        "warmup": args.warmup, "concurrency": args.concurrency, "rps": args.rps,
+        "invalid_ratio": args.invalid_ratio, "jitter": args.jitter, "seed": args.seed,
+    }
+    report["timestamp"] = time.strftime("%Y-%m-%dT%H:%M:%S%z")
+    report["host"] = platform.node()
+    print_summary(report)
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.json_path}")
+    return 0 if result.errors == 0 and result.unexpected == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
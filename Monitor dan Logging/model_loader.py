@@ -0,0 +1,348 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import sys
+import time
+
+import joblib
+import numpy as np
+
+import categorical_lookup
+from compiled_forest import CompiledForest
+from feature_csv import read_feature_csv
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+
+# Lokasi cache model hasil deserialisasi (format joblib tanpa kompresi agar bisa di-mmap)
+DEFAULT_CACHE_DIR = os.environ.get("MODEL_CACHE_DIR", os.path.join(script_dir, ".model_cache"))
+
+# Nama file preprocessor yang dilog di samping artefak model
+PREPROCESSOR_FILENAME = "preprocessor.json"
+# Threshold keputusan hasil tuning ({"threshold": 0.42}) yang dilog di samping artefak model
+THRESHOLD_FILENAME = "decision_threshold.json"
+# Snapshot CompiledForest di cache (dimuat tanpa sklearn)
+COMPILED_SNAPSHOT_NAME = "compiled.npz"
+
+# Skema URI yang ditangani oleh MLflow
+MLFLOW_SCHEMES = ("runs:/", "models:/", "mlflow-artifacts:/", "file://", "s3://", "gs://", "dbfs:/")
+
+logger = logging.getLogger(__name__)
+
+
+def _registry_client():
+    # Impor mlflow hanya jika benar-benar dibutuhkan karena impornya mahal
+    from mlflow.tracking import MlflowClient
+    return MlflowClient()
+
+
+def resolve_registry_uri(model_uri):
+    """
+    Ubah URI registry yang dapat berpindah (models:/<nama>/<stage>, models:/<nama>/latest,
+    models:/<nama>@<alias>) menjadi versi konkret models:/<nama>/<versi>.
+    Versi model di registry bersifat immutable, jadi URI hasilnya aman dijadikan
+    kunci cache; URI yang sudah menyebut nomor versi dikembalikan apa adanya.
+    Raises:
+        FileNotFoundError: Jika stage tidak memiliki versi model.
+    """
+    reference = model_uri[len("models:/"):].strip("/")
+    if "@" in reference:
+        name, alias = reference.split("@", 1)
+        version = _registry_client().get_model_version_by_alias(name, alias).version
+    else:
+        name, _, stage = reference.partition("/")
+        if stage.isdigit():
+            return model_uri
+        # "latest" = versi tertinggi di semua stage
+        stages = None if stage.lower() == "latest" else [stage]
+        versions = _registry_client().get_latest_versions(name, stages=stages)
+        if not versions:
+            raise FileNotFoundError(f"No version of registered model '{name}' in stage '{stage}'")
+        version = max(int(v.version) for v in versions)
+    resolved = f"models:/{name}/{version}"
+    logger.debug("Resolved %s to %s", model_uri, resolved)
+    return resolved
+
+
+def resolve_model_uri(model_uri):
+    """
+    Tentukan cara memuat sebuah URI model.
+    Args:
+        model_uri (str): URI MLflow (mis. "runs:/<run_id>/model"), folder model MLflow
+            (berisi file MLmodel), atau file .joblib/.pkl lokal.
+    Returns:
+        tuple: (jenis, lokasi) dengan jenis "mlflow" atau "joblib"; URI registry
+            sudah diubah ke versi konkret (lihat resolve_registry_uri).
+    Raises:
+        FileNotFoundError: Jika path lokal atau versi registry tidak ditemukan.
+    """
+    if model_uri.startswith("models:/"):
+        return "mlflow", resolve_registry_uri(model_uri)
+    if model_uri.startswith(MLFLOW_SCHEMES):
+        return "mlflow", model_uri
+
+    path = os.path.abspath(model_uri)
+    if os.path.isdir(path):
+        if not os.path.exists(os.path.join(path, "MLmodel")):
+            raise FileNotFoundError(f"No MLmodel file found in {path}")
+        return "mlflow", path
+    if os.path.isfile(path):
+        return "joblib", path
+    raise FileNotFoundError(f"Model not found: {model_uri}")
+
+
+def _fingerprint(kind, location):
+    """
+    Hitung kunci cache untuk sebuah model.
+    Artefak run MLflow dan versi registry (URI stage/alias sudah diubah ke versi
+    konkret oleh resolve_model_uri) bersifat immutable sehingga URI sudah cukup; untuk path
+    lokal, waktu modifikasi ikut dihitung agar cache diperbarui saat file berubah.
+    """
+    key = f"{kind}:{location}"
+    if os.path.exists(location):
+        if os.path.isdir(location):
+            mtimes = [os.path.getmtime(os.path.join(root, f))
+                      for root, _, files in os.walk(location) for f in files]
+            key += f":{max(mtimes, default=0)}"
+        else:
+            key += f":{os.path.getmtime(location)}:{os.path.getsize(location)}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+def model_fingerprint(model_uri):
+    """
+    Versi model untuk sebuah URI tanpa memuatnya (sama dengan versi dari load_model).
+    Raises:
+        FileNotFoundError: Jika path lokal tidak ditemukan.
+    """
+    return _fingerprint(*resolve_model_uri(model_uri))[:12]
+
+
+def _deserialize(kind, location):
+    """Deserialisasi model dari sumber aslinya (lambat, hanya saat cache belum ada)."""
+    if kind == "mlflow":
+        # Impor mlflow hanya jika benar-benar dibutuhkan karena impornya mahal
+        import mlflow.sklearn
+        return mlflow.sklearn.load_model(location)
+    return joblib.load(location)
+
+
+def load_model(model_uri, cache_dir=None, mmap_mode="r"):
+    """
+    Muat model sekali, simpan di cache disk, lalu muat ulang dari cache dengan mmap.
+    Args:
+        model_uri (str): URI atau path model (lihat resolve_model_uri).
+        cache_dir (str): Folder cache. Default: MODEL_CACHE_DIR atau .model_cache.
+        mmap_mode (str): Mode mmap untuk joblib.load. "r" = read-only dan dapat dibagi
+            antar worker; None = muat penuh ke memori.
+    Returns:
+        tuple: (model, versi) dengan versi berupa 12 karakter pertama kunci cache.
+    """
+    cache_dir = cache_dir or DEFAULT_CACHE_DIR
+    kind, location = resolve_model_uri(model_uri)
+    key = _fingerprint(kind, location)
+    cache_path = os.path.join(cache_dir, f"{key}.joblib")
+
+    if not os.path.exists(cache_path):
+        start = time.perf_counter()
+        model = _deserialize(kind, location)
+        os.makedirs(cache_dir, exist_ok=True)
+        # Tulis ke file sementara lalu rename agar worker lain tidak membaca file setengah jadi
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        joblib.dump(model, tmp_path)
+        os.replace(tmp_path, cache_path)
+        logger.info("Cached model %s at %s in %.3fs", model_uri, cache_path, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    model = joblib.load(cache_path, mmap_mode=mmap_mode)
+    logger.info("Loaded model %s from cache in %.3fs", model_uri, time.perf_counter() - start)
+    return model, key[:12]
+
+
+def snapshot_path(model_uri, name, cache_dir=None):
+    """Path file turunan sebuah model di cache (mis. name="compiled.npz")."""
+    return os.path.join(cache_dir or DEFAULT_CACHE_DIR, f"{_fingerprint(*resolve_model_uri(model_uri))}.{name}")
+
+
+def save_snapshot(model_uri, snapshot, name, cache_dir=None):
+    """
+    Simpan objek turunan model (apa pun dengan metode save(path)) ke cache.
+    Gagal menulis (mis. filesystem read-only) hanya dicatat sebagai peringatan.
+    """
+    path = snapshot_path(model_uri, name, cache_dir)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        snapshot.save(tmp_path)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning("Could not write snapshot %s: %s", path, e)
+
+
+def save_compiled_snapshot(model_uri, compiled, cache_dir=None):
+    """Simpan CompiledForest sebuah model ke cache sebagai snapshot startup."""
+    save_snapshot(model_uri, compiled, COMPILED_SNAPSHOT_NAME, cache_dir=cache_dir)
+
+
+def load_compiled_snapshot(model_uri, cache_dir=None):
+    """
+    Muat snapshot CompiledForest dari cache tanpa mengimpor sklearn.
+    Returns:
+        tuple atau None: (CompiledForest, versi), atau None jika snapshot belum ada.
+    """
+    path = snapshot_path(model_uri, COMPILED_SNAPSHOT_NAME, cache_dir)
+    if not os.path.exists(path):
+        return None
+    start = time.perf_counter()
+    compiled = CompiledForest.load(path)
+    logger.info("Loaded compiled snapshot of %s in %.3fs", model_uri, time.perf_counter() - start)
+    return compiled, os.path.basename(path)[:12]
+
+
+def load_lookup(model_uri, compiled, reference, feature_names, data_path=None, cache_dir=None):
+    """
+    Muat CategoricalLookup yang sudah diverifikasi dari cache, atau bangun tabel
+    untuk kombinasi kategorikal di data training lalu verifikasi terhadap model
+    sklearn asal sebelum disimpan. Verifikasi menyeluruh mahal (menit untuk
+    ratusan pohon), jadi jalankan `python model_loader.py <uri>` dengan
+    INFERENCE_BACKEND=lookup saat build image agar worker hanya memuat tabel.
+    Args:
+        model_uri (str): URI model; None = tabel tidak di-cache.
+        compiled (CompiledForest): Forest yang ditabelkan (juga fallback).
+        reference (callable): Mengembalikan model sklearn acuan verifikasi
+            (hanya dipanggil jika tabel perlu diverifikasi).
+        feature_names (list): Nama fitur sesuai urutan kolom model.
+        data_path (str): CSV training. Default: categorical_lookup.LOOKUP_DATA_PATH.
+        cache_dir (str): Folder cache model.
+    Returns:
+        CategoricalLookup atau None: None jika tabel tidak identik dengan model.
+    """
+    data_path = data_path or categorical_lookup.LOOKUP_DATA_PATH
+    categorical_idx, _ = categorical_lookup.split_features(feature_names)
+    X_train = (read_feature_csv(data_path, feature_names) if os.path.exists(data_path)
+               else np.empty((0, len(feature_names))))
+    combos = categorical_lookup.categorical_combinations(X_train, categorical_idx)
+    # Nama file memuat sidik jari kombinasi, jadi data training baru membangun tabel baru
+    name = f"lookup-{hashlib.sha1(combos.tobytes()).hexdigest()[:12]}.npz"
+    path = snapshot_path(model_uri, name, cache_dir) if model_uri else None
+    if path is not None and os.path.exists(path):
+        lookup = categorical_lookup.CategoricalLookup.load(path, fallback=compiled)
+        if lookup.verified:
+            return lookup
+    else:
+        lookup = categorical_lookup.CategoricalLookup.from_forest(compiled, X_train, feature_names)
+
+    start = time.perf_counter()
+    try:
+        checked = lookup.verify(reference())
+    except AssertionError as e:
+        # Tabel yang salah tidak pernah di-cache; pemanggil memakai forest lengkap
+        logger.error("Lookup tables for %s do not match the model: %s", model_uri, e)
+        return None
+    logger.info("Verified %d lookup cells of %s on %d rows in %.1fs",
+                lookup.n_cells, model_uri, checked, time.perf_counter() - start)
+    if model_uri:
+        save_snapshot(model_uri, lookup, name, cache_dir=cache_dir)
+    return lookup
+
+
+def _find_artifact(kind, location, filename):
+    """Cari file pendamping di samping artefak model; kembalikan path lokal atau None."""
+    if kind == "joblib":
+        path = os.path.join(os.path.dirname(location), filename)
+        return path if os.path.exists(path) else None
+    if os.path.isdir(location):
+        path = os.path.join(location, filename)
+        return path if os.path.exists(path) else None
+    import mlflow.artifacts
+    try:
+        return mlflow.artifacts.download_artifacts(artifact_uri=f"{location.rstrip('/')}/{filename}")
+    except Exception:
+        return None
+
+
+def load_model_json(model_uri, filename, cache_dir=None):
+    """
+    Muat file JSON pendamping sebuah model (mis. preprocessor.json).
+    File di samping model lokal selalu dibaca langsung: file ini bisa diganti
+    tanpa mengubah model (mis. threshold di-tuning ulang), sedangkan kunci cache
+    hanya mencakup model. Artefak MLflow jarak jauh (immutable per run/versi)
+    disalin ke cache model sehingga start berikutnya tidak perlu ke MLflow.
+    Returns:
+        dict atau None: Isi file, atau None jika model tidak memilikinya.
+    """
+    cache_dir = cache_dir or DEFAULT_CACHE_DIR
+    kind, location = resolve_model_uri(model_uri)
+    if kind == "joblib" or os.path.isdir(location):
+        source = _find_artifact(kind, location, filename)
+        if source is None:
+            return None
+        with open(source) as f:
+            return json.load(f)
+
+    cache_path = os.path.join(cache_dir, f"{_fingerprint(kind, location)}.{filename}")
+
+    if not os.path.exists(cache_path):
+        source = _find_artifact(kind, location, filename)
+        if source is None:
+            return None
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        shutil.copyfile(source, tmp_path)
+        os.replace(tmp_path, cache_path)
+
+    with open(cache_path) as f:
+        return json.load(f)
+
+
+def load_preprocessor_config(model_uri, cache_dir=None):
+    """
+    Muat konfigurasi preprocessor (hasil TitanicPreprocessor.to_dict) milik sebuah model.
+    Returns:
+        dict atau None: Konfigurasi preprocessor, atau None jika model tidak memilikinya.
+    """
+    return load_model_json(model_uri, PREPROCESSOR_FILENAME, cache_dir=cache_dir)
+
+
+def load_decision_threshold(model_uri, cache_dir=None):
+    """
+    Muat threshold keputusan yang dilog bersama model.
+    Returns:
+        float atau None: Threshold probabilitas kelas positif, atau None jika tidak ada.
+    Raises:
+        ValueError: Jika threshold tidak berada di antara 0 dan 1.
+    """
+    config = load_model_json(model_uri, THRESHOLD_FILENAME, cache_dir=cache_dir)
+    if config is None:
+        return None
+    threshold = float(config["threshold"])
+    if not 0.0 <= threshold <= 1.0:
+        raise ValueError(f"Decision threshold must be between 0 and 1, got {threshold}")
+    return threshold
+
+
+if __name__ == "__main__":
+    # Bangun cache lebih awal (mis. saat build image) agar start exporter cepat
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    if len(sys.argv) != 2:
+        print("Usage: python model_loader.py <model_uri>")
+        sys.exit(1)
+    model, version = load_model(sys.argv[1])
+    has_preprocessor = load_preprocessor_config(sys.argv[1]) is not None
+    threshold = load_decision_threshold(sys.argv[1])
+    # Snapshot untuk INFERENCE_BACKEND=compiled: start berikutnya tidak perlu sklearn
+    compiled = CompiledForest.from_sklearn(model)
+    save_compiled_snapshot(sys.argv[1], compiled)
+    lookup_status = "skipped"
+    if os.environ.get("INFERENCE_BACKEND") == "lookup":
+        # Tabel dibangun dan diverifikasi sekali di sini, bukan saat worker start
+        feature_names = getattr(model, "feature_names_in_", None)
+        if feature_names is None:
+            lookup_status = "skipped (model has no feature names)"
+        else:
+            lookup = load_lookup(sys.argv[1], compiled, lambda: model, list(feature_names))
+            lookup_status = "verified" if lookup is not None else "FAILED verification (serving falls back to compiled)"
+    print(f"Model cached with version {version} (preprocessor: {'yes' if has_preprocessor else 'no'}, "
+          f"decision threshold: {threshold if threshold is not None else 'default'}, compiled snapshot: yes, "
+          f"lookup tables: {lookup_status})")
@@ -0,0 +1,212 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from prometheus_client import Gauge, Histogram
+
+import model_loader
+from feature_csv import read_feature_csv
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+
+# File berisi URI model yang harus dilayani; setiap worker memantaunya sehingga
+# satu perubahan (mis. lewat /admin/reload) diikuti semua worker gunicorn
+MODEL_POINTER_FILE = os.environ.get("MODEL_POINTER_FILE")
+# Interval (detik) pemeriksaan file pointer dan artefak model
+MODEL_WATCH_INTERVAL = float(os.environ.get("MODEL_WATCH_INTERVAL", "5"))
+# Baris representatif untuk pemanasan model baru sebelum ditukar
+WARMUP_DATA_PATH = os.environ.get("WARMUP_DATA_PATH", os.path.join(
+    script_dir, "..", "Eksperimen_SML_YudhaElfransyah", "preprocessing", "train_processed.csv"))
+WARMUP_ROWS = int(os.environ.get("WARMUP_ROWS", "64"))
+WARMUP_ROUNDS = 3
+
+# --- METRIK HOT-SWAP MODEL ---
+# livesum: nilai per versi = jumlah worker hidup yang sedang melayani versi itu
+MODEL_VERSION_INFO = Gauge('model_version_info', 'Versi model yang sedang dilayani (jumlah worker)',
+                           ['version'], multiprocess_mode='livesum')
+MODEL_SWAP_DURATION = Histogram('model_swap_duration_seconds',
+                                'Durasi memuat, memanaskan, dan menukar model baru', ['result'],
+                                buckets=(.05, .1, .25, .5, 1, 2.5, 5, 10, 30, 60, 120))
+
+logger = logging.getLogger(__name__)
+
+
+def load_warmup_rows(path=WARMUP_DATA_PATH, n_rows=WARMUP_ROWS, feature_names=None):
+    """
+    Muat beberapa baris fitur hasil preprocessing untuk pemanasan model.
+    Returns:
+        np.array atau None: Matriks float64 (n, 8), atau None jika file tidak ada.
+    """
+    if not os.path.exists(path):
+        return None
+    return read_feature_csv(path, feature_names, n_rows=n_rows)
+
+
+def read_pointer(path):
+    """Baca URI model dari file pointer; None jika file tidak ada atau kosong."""
+    try:
+        with open(path) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def write_pointer(path, model_uri):
+    """Tulis URI model ke file pointer secara atomik (tulis file sementara lalu rename)."""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(model_uri + "\n")
+    os.replace(tmp_path, path)
+
+
+def warm_up(service, rows):
+    """
+    Panaskan model baru dan pastikan keluarannya masuk akal sebelum ditukar.
+    Raises:
+        ValueError: Jika prediksi tidak berbentuk atau berkelas seperti yang diharapkan.
+    """
+    if rows is None or len(rows) == 0:
+        return
+    for row in rows[:8]:
+        service.predict(row)
+    for _ in range(WARMUP_ROUNDS):
+        predictions, proba = service.predict_batch(rows)
+    if predictions.shape != (len(rows),) or proba.shape[0] != len(rows):
+        raise ValueError(f"Warm-up produced unexpected shapes {predictions.shape}, {proba.shape}")
+    if not np.isin(predictions, service.classes_).all():
+        raise ValueError("Warm-up produced predictions outside the model classes")
+
+
+class ModelReloader:
+    """
+    Memuat model baru di background lalu menukarnya tanpa lock di jalur baca.
+
+    Model baru dimuat dan dipanaskan di thread terpisah sementara model lama
+    tetap melayani; setelah siap, swap(service) mengganti referensi global
+    dengan satu assignment (atomik di bawah GIL). Permintaan yang sedang
+    berjalan tetap memakai referensi lama yang sudah diambilnya. Pemuatan
+    dijalankan berurutan oleh executor satu thread.
+    """
+
+    def __init__(self, factory, swap, current, warmup_rows=None, pointer_file=MODEL_POINTER_FILE,
+                 interval=MODEL_WATCH_INTERVAL):
+        """
+        Args:
+            factory (callable): model_uri -> ModelInference baru.
+            swap (callable): Dipanggil dengan ModelInference baru untuk menukar referensi.
+            current (callable): Mengembalikan ModelInference yang sedang dilayani.
+            warmup_rows (np.array): Baris representatif untuk pemanasan.
+            pointer_file (str): File pointer yang dipantau (None = tanpa watcher).
+            interval (float): Interval pemeriksaan watcher (detik).
+        """
+        self.factory = factory
+        self.swap = swap
+        self.current = current
+        self.warmup_rows = warmup_rows
+        self.pointer_file = pointer_file
+        self.interval = interval
+        self.last_error = None
+        # Versi dari file pointer yang gagal dimuat; tidak dicoba ulang sampai berubah
+        self._failed_version = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="model-reloader")
+        self._pending = None
+        self._watcher = None
+        self._stop_event = threading.Event()
+
+    @staticmethod
+    def publish_version(version, previous=None):
+        """Perbarui model_version_info: versi lama 0, versi baru 1 (per worker)."""
+        if previous is not None and previous != version:
+            MODEL_VERSION_INFO.labels(version=previous).set(0)
+        MODEL_VERSION_INFO.labels(version=version).set(1)
+
+    def _load_and_swap(self, model_uri, publish=False):
+        start = time.perf_counter()
+        try:
+            service = self.factory(model_uri)
+            warm_up(service, self.warmup_rows)
+        except Exception as e:
+            MODEL_SWAP_DURATION.labels(result="failure").observe(time.perf_counter() - start)
+            self.last_error = f"{type(e).__name__}: {e}"
+            logger.exception("Failed to load model %s; keeping the current model", model_uri)
+            raise
+        previous = self.current().model_version
+        self.swap(service)
+        if publish and self.pointer_file is not None:
+            # Pointer baru ditulis setelah model terbukti bisa dimuat dan dipanaskan,
+            # jadi artefak rusak tidak pernah menjadi model awal saat restart. Masih di
+            # dalam pemuatan (loading=True), sehingga watcher proses ini tidak membaca
+            # pointer lama setelah swap.
+            try:
+                write_pointer(self.pointer_file, model_uri)
+            except OSError:
+                logger.exception("Swapped to %s but could not update pointer file %s", model_uri, self.pointer_file)
+        duration = time.perf_counter() - start
+        MODEL_SWAP_DURATION.labels(result="success").observe(duration)
+        self.publish_version(service.model_version, previous)
+        self.last_error = None
+        logger.info("Swapped model %s -> %s (%s) in %.3fs", previous, service.model_version, model_uri, duration)
+        return service
+
+    def reload(self, model_uri, publish=False):
+        """
+        Jadwalkan pemuatan model_uri di background.
+        Args:
+            model_uri (str): URI model baru.
+            publish (bool): Tulis model_uri ke file pointer setelah berhasil ditukar
+                agar worker lain ikut menukar model.
+        Returns:
+            concurrent.futures.Future: Selesai dengan ModelInference baru, atau exception jika gagal.
+        """
+        self._pending = self._executor.submit(self._load_and_swap, model_uri, publish)
+        return self._pending
+
+    @property
+    def loading(self):
+        """True jika ada pemuatan model yang belum selesai."""
+        return self._pending is not None and not self._pending.done()
+
+    def check_pointer(self):
+        """
+        Bandingkan model di file pointer dengan model yang sedang dilayani.
+        Returns:
+            Future atau None: Future pemuatan jika model perlu diganti.
+        """
+        if self.pointer_file is None or self.loading:
+            return None
+        model_uri = read_pointer(self.pointer_file)
+        if model_uri is None:
+            return None
+        try:
+            # Versi = sidik jari URI (+ mtime untuk path lokal), sama seperti ModelInference.model_version
+            version = model_loader.model_fingerprint(model_uri)
+        except FileNotFoundError:
+            logger.warning("Model in pointer file %s not found: %s", self.pointer_file, model_uri)
+            return None
+        if version in (self.current().model_version, self._failed_version):
+            return None
+        future = self.reload(model_uri)
+        future.add_done_callback(
+            lambda f: setattr(self, "_failed_version", version if f.exception() else None))
+        return future
+
+    def _watch(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.check_pointer()
+            except Exception:
+                logger.exception("Model watcher check failed")
+
+    def start(self):
+        """Publikasikan versi model dan mulai watcher file pointer (sekali per proses, setelah fork)."""
+        self.publish_version(self.current().model_version)
+        if self.pointer_file is not None and self._watcher is None:
+            self._watcher = threading.Thread(target=self._watch, name="model-watcher", daemon=True)
+            self._watcher.start()
+
+    def stop(self):
+        self._stop_event.set()
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,98 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+from prometheus_client import Counter, Gauge
+
+# Konfigurasi cache (ukuran 0 = cache nonaktif)
+CACHE_MAX_SIZE = int(os.environ.get("PREDICTION_CACHE_SIZE", "10000"))
+CACHE_TTL_SECONDS = float(os.environ.get("PREDICTION_CACHE_TTL", "300"))
+
+# --- METRIK CACHE PREDIKSI ---
+CACHE_HITS = Counter('prediction_cache_hits', 'Jumlah prediksi yang dilayani dari cache')
+CACHE_MISSES = Counter('prediction_cache_misses', 'Jumlah prediksi yang tidak ada di cache')
+CACHE_EVICTIONS = Counter('prediction_cache_evictions', 'Jumlah entri cache yang dibuang', ['reason'])
+CACHE_SIZE = Gauge('prediction_cache_size', 'Jumlah entri di cache prediksi', multiprocess_mode='livesum')
+
+_MISSING = object()
+
+
+def make_key(features):
+    """
+    Encoding kanonik dan hashable untuk satu baris fitur.
+    Fitur diubah ke float64 sehingga 3, 3.0 dan True menjadi kunci yang sama;
+    penambahan 0.0 menyamakan -0.0 dengan 0.0.
+    """
+    return (np.asarray(features, dtype=np.float64) + 0.0).tobytes()
+
+
+class PredictionCache:
+    """
+    Cache LRU dengan TTL untuk hasil prediksi, dikunci pada versi model.
+
+    Setiap operasi menyertakan versi model yang sedang dipakai; jika versi
+    berbeda dari isi cache, seluruh cache dikosongkan sehingga hasil dari model
+    lama tidak pernah dilayani setelah model diganti.
+    """
+
+    def __init__(self, max_size=CACHE_MAX_SIZE, ttl=CACHE_TTL_SECONDS):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.model_version = None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.max_size > 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _check_version(self, model_version):
+        # Dipanggil dengan lock dipegang
+        if model_version != self.model_version:
+            if self._entries:
+                CACHE_EVICTIONS.labels(reason='model_version').inc(len(self._entries))
+                self._entries.clear()
+                CACHE_SIZE.set(0)
+            self.model_version = model_version
+
+    def get(self, key, model_version, default=None):
+        """Ambil hasil untuk key; kembalikan default jika tidak ada atau kedaluwarsa."""
+        if not self.enabled:
+            return default
+        with self._lock:
+            self._check_version(model_version)
+            entry = self._entries.get(key, _MISSING)
+            if entry is not _MISSING:
+                value, expires_at = entry
+                if expires_at >= time.monotonic():
+                    self._entries.move_to_end(key)
+                    CACHE_HITS.inc()
+                    return value
+                del self._entries[key]
+                CACHE_EVICTIONS.labels(reason='ttl').inc()
+                CACHE_SIZE.set(len(self._entries))
+        CACHE_MISSES.inc()
+        return default
+
+    def put(self, key, value, model_version):
+        """Simpan hasil untuk key; buang entri paling lama dipakai jika cache penuh."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._check_version(model_version)
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                CACHE_EVICTIONS.labels(reason='capacity').inc()
+            CACHE_SIZE.set(len(self._entries))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            CACHE_SIZE.set(0)
@@ -0,0 +1,142 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+# Profiler hanya bisa dipanggil lewat HTTP jika PROFILER_ENABLED=1
+PROFILER_ENABLED = os.environ.get("PROFILER_ENABLED", "0") == "1"
+# Timeout worker gunicorn (diekspor gunicorn.conf.py); sesi profil dibatasi di bawahnya
+GUNICORN_TIMEOUT = float(os.environ.get("GUNICORN_TIMEOUT", "30"))
+# Batas durasi satu sesi profil (detik), selalu di bawah timeout worker gunicorn
+MAX_PROFILE_SECONDS = min(float(os.environ.get("PROFILER_MAX_SECONDS", "20")), GUNICORN_TIMEOUT * 0.8)
+DEFAULT_INTERVAL = 0.005
+# Fungsi Python terdalam yang menandakan thread sedang menunggu (Condition/Event,
+# selector server, accept/read socket); sampel seperti ini dilewati kecuali idle=True
+IDLE_FUNCTIONS = frozenset({"wait", "select", "poll", "accept", "readinto"})
+
+# Hanya satu sesi profil per proses pada satu waktu
+_session_lock = threading.Lock()
+# Sesi background terakhir (lihat start_session)
+_start_lock = threading.Lock()
+_current = None
+
+
+class ProfilerBusyError(RuntimeError):
+    """Sesi profil lain sedang berjalan di proses ini."""
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _stack(frame):
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+def sample_stacks(seconds, interval=DEFAULT_INTERVAL, idle=False):
+    """
+    Profil sampling semua thread di proses ini.
+    Setiap interval, stack setiap thread (kecuali thread profiler) diambil
+    lewat sys._current_frames() dan dihitung. Overhead hanya ada selama sesi.
+    Args:
+        seconds (float): Lama sesi (dibatasi MAX_PROFILE_SECONDS).
+        interval (float): Jeda antar sampel (detik).
+        idle (bool): Ikutkan thread yang sedang menunggu (wait/select/sleep).
+    Returns:
+        Counter: Stack berformat "thread;fungsi_luar;...;fungsi_dalam" -> jumlah sampel.
+    Raises:
+        ProfilerBusyError: Jika sesi lain sedang berjalan.
+    """
+    if not _session_lock.acquire(blocking=False):
+        raise ProfilerBusyError("Another profiling session is already running in this process")
+    try:
+        own_id = threading.get_ident()
+        names = {}
+        stacks = Counter()
+        deadline = time.perf_counter() + min(seconds, MAX_PROFILE_SECONDS)
+        while time.perf_counter() < deadline:
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                if not idle and frame.f_code.co_name in IDLE_FUNCTIONS:
+                    continue
+                if thread_id not in names:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                stacks[f"{names.get(thread_id, thread_id)};{_stack(frame)}"] += 1
+            time.sleep(interval)
+        return stacks
+    finally:
+        _session_lock.release()
+
+
+class ProfileSession:
+    """
+    Sesi sampling yang berjalan di thread background. Dengan worker gunicorn
+    sync (threads=1), permintaan yang menjalankan profil secara sinkron akan
+    memakai satu-satunya thread permintaan sehingga /predict tidak pernah
+    tersampel; thread background membiarkan worker tetap melayani permintaan
+    selama sesi, lalu hasilnya diambil setelah selesai.
+    """
+
+    def __init__(self, seconds, interval=DEFAULT_INTERVAL, idle=False):
+        self.seconds = min(seconds, MAX_PROFILE_SECONDS)
+        self.interval = interval
+        self.idle = idle
+        self.started = time.time()
+        self.stacks = None
+        self._finished = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+
+    def _run(self):
+        try:
+            self.stacks = sample_stacks(self.seconds, self.interval, idle=self.idle)
+        finally:
+            self._finished.set()
+
+    @property
+    def done(self):
+        return self._finished.is_set()
+
+    @property
+    def remaining(self):
+        """Sisa durasi sesi (detik)."""
+        return max(self.started + self.seconds - time.time(), 0.0)
+
+    def wait(self, timeout=None):
+        return self._finished.wait(timeout)
+
+
+def start_session(seconds, interval=DEFAULT_INTERVAL, idle=False):
+    """
+    Mulai sesi profil di background.
+    Returns:
+        ProfileSession
+    Raises:
+        ProfilerBusyError: Jika sesi sebelumnya belum selesai.
+    """
+    global _current
+    with _start_lock:
+        if _current is not None and not _current.done:
+            raise ProfilerBusyError("Another profiling session is already running in this process")
+        _current = ProfileSession(seconds, interval, idle)
+        _current._thread.start()
+        return _current
+
+
+def current_session():
+    """Sesi profil terakhir di proses ini (berjalan atau selesai), atau None."""
+    return _current
+
+
+def to_folded(stacks):
+    """
+    Format collapsed stack ("a;b;c 12" per baris) yang dibaca langsung oleh
+    flamegraph.pl, speedscope, atau inferno untuk membuat flame graph.
+    """
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
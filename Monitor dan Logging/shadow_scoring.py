@@ -0,0 +1,159 @@
+import logging
+import os
+import queue
+import random
+import threading
+import time
+
+from prometheus_client import Counter, Histogram
+
+# --- KONFIGURASI SHADOW SCORING ---
+# Model kandidat yang dinilai di belakang layar (kosong = shadow nonaktif)
+SHADOW_MODEL_URI = os.environ.get("SHADOW_MODEL_URI")
+# Fraksi permintaan /predict yang dicerminkan ke model kandidat
+SHADOW_SAMPLE_RATE = float(os.environ.get("SHADOW_SAMPLE_RATE", "0.1"))
+# Batas CPU jalur shadow sebagai fraksi satu core untuk seluruh server (0.1 = maksimal
+# 10% satu CPU total); dibagi rata ke SERVER_PROCESSES proses sehingga setiap worker
+# gunicorn mendapat SHADOW_CPU_BUDGET / WEB_CONCURRENCY
+SHADOW_CPU_BUDGET = float(os.environ.get("SHADOW_CPU_BUDGET", "0.1"))
+# Jumlah proses server yang berbagi anggaran (diekspor gunicorn.conf.py)
+SERVER_PROCESSES = max(int(os.environ.get("WEB_CONCURRENCY", "1")), 1)
+# Kredit CPU maksimum yang boleh terkumpul saat idle (detik kerja pada laju SHADOW_CPU_BUDGET)
+SHADOW_BURST_SECONDS = float(os.environ.get("SHADOW_BURST_SECONDS", "1.0"))
+SHADOW_WORKERS = int(os.environ.get("SHADOW_WORKERS", "1"))
+SHADOW_QUEUE_SIZE = int(os.environ.get("SHADOW_QUEUE_SIZE", "1000"))
+
+# --- METRIK SHADOW ---
+# Tingkat kesepakatan = sum(rate(shadow_predictions_total{agree="true"})) / sum(rate(shadow_predictions_total))
+SHADOW_PREDICTIONS = Counter('shadow_predictions_total', 'Perbandingan prediksi model live dan kandidat',
+                             ['live_class', 'candidate_class', 'agree'])
+SHADOW_SKIPPED = Counter('shadow_skipped_total', 'Permintaan tersampel yang tidak dinilai model kandidat',
+                         ['reason'])
+SHADOW_LATENCY = Histogram('shadow_candidate_latency_seconds', 'Latensi prediksi satu baris model kandidat',
+                           buckets=(.0001, .00025, .0005, .001, .0025, .005, .01, .025, .05, .1, .25))
+SHADOW_CPU_SECONDS = Counter('shadow_cpu_seconds_total', 'Waktu CPU yang dipakai jalur shadow')
+
+logger = logging.getLogger(__name__)
+
+
+class CpuBudget:
+    """
+    Token bucket waktu CPU: kredit bertambah cpu_fraction detik per detik
+    jam dinding hingga batas burst, dan berkurang sebesar waktu CPU thread
+    (time.thread_time) yang benar-benar dipakai. Total CPU jalur shadow tidak
+    melebihi cpu_fraction * durasi + burst (+ satu prediksi per worker).
+    """
+
+    def __init__(self, cpu_fraction, burst_seconds=SHADOW_BURST_SECONDS, clock=time.monotonic):
+        self.cpu_fraction = cpu_fraction
+        self.burst = cpu_fraction * burst_seconds
+        self._tokens = self.burst
+        self._clock = clock
+        self._last = clock()
+        self._lock = threading.Lock()
+
+    def available(self):
+        """Isi ulang kredit dan kembalikan True jika masih ada kredit CPU."""
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.cpu_fraction)
+            self._last = now
+            return self._tokens > 0
+
+    def charge(self, cpu_seconds):
+        with self._lock:
+            self._tokens -= cpu_seconds
+
+
+class ShadowScorer:
+    """
+    Mencerminkan sebagian permintaan /predict ke model kandidat di thread
+    background. Jalur respons hanya melakukan sampling dan put_nowait ke antrean
+    terbatas; penilaian, perbandingan, dan metrik dikerjakan worker shadow
+    dalam batas CpuBudget.
+    """
+
+    def __init__(self, candidate, sample_rate=SHADOW_SAMPLE_RATE, cpu_budget=SHADOW_CPU_BUDGET,
+                 workers=SHADOW_WORKERS, queue_size=SHADOW_QUEUE_SIZE, burst_seconds=SHADOW_BURST_SECONDS,
+                 processes=SERVER_PROCESSES):
+        """
+        Args:
+            cpu_budget (float): Anggaran CPU seluruh server (fraksi satu core).
+            processes (int): Jumlah proses yang berbagi anggaran; proses ini
+                mendapat cpu_budget / processes.
+        """
+        self.candidate = candidate
+        self.sample_rate = sample_rate
+        self.budget = CpuBudget(cpu_budget / processes, burst_seconds)
+        self.workers = workers
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._threads = []
+
+    def submit(self, row, live_prediction):
+        """Cerminkan satu baris ke model kandidat (disampel dengan sample_rate)."""
+        if random.random() >= self.sample_rate:
+            return
+        try:
+            self._queue.put_nowait((row, live_prediction))
+        except queue.Full:
+            SHADOW_SKIPPED.labels(reason='queue_full').inc()
+
+    def score(self, row, live_prediction):
+        """Nilai satu baris dengan model kandidat dan rekam perbandingannya."""
+        if not self.budget.available():
+            SHADOW_SKIPPED.labels(reason='cpu_budget').inc()
+            return None
+        cpu_start = time.thread_time()
+        start = time.perf_counter()
+        try:
+            candidate_prediction = self.candidate.predict(row)
+        finally:
+            cpu = time.thread_time() - cpu_start
+            self.budget.charge(cpu)
+            SHADOW_CPU_SECONDS.inc(cpu)
+        SHADOW_LATENCY.observe(time.perf_counter() - start)
+        live_class, candidate_class = int(live_prediction), int(candidate_prediction)
+        SHADOW_PREDICTIONS.labels(str(live_class), str(candidate_class),
+                                  'true' if live_class == candidate_class else 'false').inc()
+        return candidate_class
+
+    def _run(self):
+        while True:
+            row, live_prediction = self._queue.get()
+            try:
+                self.score(row, live_prediction)
+            except Exception:
+                SHADOW_SKIPPED.labels(reason='error').inc()
+                logger.exception("Shadow scoring failed")
+            finally:
+                self._queue.task_done()
+
+    def start(self):
+        """Mulai worker shadow (sekali per proses, setelah fork)."""
+        if not self._threads:
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._run, name=f"shadow-scorer-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def wait_idle(self):
+        """Tunggu sampai semua baris di antrean selesai diproses."""
+        self._queue.join()
+
+
+def load_shadow_scorer(factory, model_uri=SHADOW_MODEL_URI):
+    """
+    Buat ShadowScorer untuk model kandidat.
+    Args:
+        factory (callable): model_uri -> ModelInference.
+        model_uri (str): URI model kandidat; None = shadow nonaktif.
+    Returns:
+        ShadowScorer atau None.
+    """
+    if not model_uri:
+        return None
+    candidate = factory(model_uri)
+    logger.info("Shadow scoring %s (version %s) on %.0f%% of traffic with a %.0f%% CPU budget "
+                "shared by %d processes", model_uri, candidate.model_version, SHADOW_SAMPLE_RATE * 100,
+                SHADOW_CPU_BUDGET * 100, SERVER_PROCESSES)
+    return ShadowScorer(candidate)
@@ -0,0 +1,19 @@
+import importlib.util
+import os
+import sys
+
+# Entry point WSGI untuk server produksi (gunicorn). Nama file exporter
+# mengandung spasi dan titik sehingga tidak bisa dirujuk sebagai "modul:app".
+#   gunicorn --chdir "Monitor dan Logging" -c gunicorn.conf.py wsgi:app
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+
+exporter = sys.modules.get("prometheus_exporter")
+if exporter is None:
+    spec = importlib.util.spec_from_file_location(
+        "prometheus_exporter", os.path.join(script_dir, "3. prometheus-exporter.py"))
+    exporter = importlib.util.module_from_spec(spec)
+    sys.modules["prometheus_exporter"] = exporter
+    spec.loader.exec_module(exporter)
+
+app = exporter.app
@@ -0,0 +1,69 @@
+import os
+
+import numpy as np
+import pytest
+
+from conftest import load_module
+
+SAMPLE_ROW = [3, 0, 22.0, 1, 0, 7.25, 0, 1]
+
+
+@pytest.fixture(scope='module')
+def exporter(tmp_path_factory):
+    """Exporter dengan audit log aktif di folder sementara (seperti saat dilayani)."""
+    os.environ.setdefault('AUDIT_LOG_DIR', str(tmp_path_factory.mktemp('audit_logs')))
+    module = load_module('prometheus_exporter', '3. prometheus-exporter.py')
+    if module.audit is not None:
+        module.audit.start()
+    yield module
+    if module.audit is not None:
+        module.audit.stop()
+
+
+@pytest.fixture(scope='module')
+def client(exporter):
+    exporter.app.config['TESTING'] = True
+    return exporter.app.test_client()
+
+
+def post_ok(client, *args, **kwargs):
+    response = client.post(*args, **kwargs)
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return response
+
+
+def test_predict_json_cached(benchmark, client):
+    """/predict JSON dengan baris yang sama (dilayani dari cache prediksi)."""
+    benchmark.group = 'predict view'
+    benchmark(post_ok, client, '/predict', json={'features': SAMPLE_ROW})
+
+
+def test_predict_json_uncached(benchmark, client, exporter):
+    """/predict JSON dengan cache dikosongkan sebelum setiap panggilan (inferensi penuh)."""
+    benchmark.group = 'predict view'
+    benchmark.pedantic(post_ok, args=(client, '/predict'), kwargs={'json': {'features': SAMPLE_ROW}},
+                       setup=exporter.result_cache.clear, rounds=300, warmup_rounds=10)
+
+
+def test_predict_binary(benchmark, client, exporter):
+    """/predict dengan payload biner 8 double."""
+    benchmark.group = 'predict view'
+    body = np.asarray(SAMPLE_ROW, dtype=exporter.BINARY_FEATURES_DTYPE).tobytes()
+    benchmark(post_ok, client, '/predict', data=body, content_type=exporter.BINARY_CONTENT_TYPE)
+
+
+def test_predict_invalid(benchmark, client):
+    """/predict dengan payload tidak valid (jalur 400)."""
+    benchmark.group = 'predict view'
+
+    def post_invalid():
+        assert client.post('/predict', json={'wrong_key': [1, 2, 3]}).status_code == 400
+    benchmark(post_invalid)
+
+
+@pytest.mark.parametrize('batch_size', [32, 1024])
+def test_predict_batch_view(benchmark, client, batch_size):
+    """/predict/batch format baris."""
+    benchmark.group = f'predict/batch view[{batch_size}]'
+    rows = [SAMPLE_ROW] * batch_size
+    benchmark(post_ok, client, '/predict/batch', json={'instances': rows})
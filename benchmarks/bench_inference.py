@@ -0,0 +1,68 @@
+import joblib
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from conftest import load_module
+
+FOREST_SIZES = [10, 100, 300]
+BATCH_SIZES = [1, 32, 1024]
+BACKENDS = ['sklearn', 'compiled', 'lookup']
+# Tabel lookup dibangun dan diverifikasi menyeluruh saat fixture dibuat (menit
+# untuk ratusan pohon), jadi backend lookup hanya diukur sampai ukuran ini
+LOOKUP_MAX_TREES = 100
+
+
+@pytest.fixture(scope='session')
+def inference_module():
+    return load_module('inference_module', '7. inference.py')
+
+
+@pytest.fixture(scope='session')
+def model_paths(feature_pool, tmp_path_factory):
+    """Latih satu forest per ukuran dan simpan sebagai joblib (seperti artefak model)."""
+    X, y = feature_pool
+    directory = tmp_path_factory.mktemp('models')
+    paths = {}
+    for n_trees in FOREST_SIZES:
+        model = RandomForestClassifier(n_estimators=n_trees, random_state=42).fit(X, y)
+        paths[n_trees] = str(directory / f'forest_{n_trees}.joblib')
+        joblib.dump(model, paths[n_trees])
+    return paths
+
+
+@pytest.fixture(scope='session')
+def services(inference_module, model_paths, tmp_path_factory):
+    """ModelInference per (ukuran forest, backend), dimuat lewat cache mmap seperti di produksi."""
+    cache_dir = str(tmp_path_factory.mktemp('model_cache'))
+    return {(n_trees, backend): inference_module.ModelInference(path, cache_dir=cache_dir, backend=backend)
+            for n_trees, path in model_paths.items() for backend in BACKENDS
+            if backend != 'lookup' or n_trees <= LOOKUP_MAX_TREES}
+
+
+def get_service(services, n_trees, backend):
+    if (n_trees, backend) not in services:
+        pytest.skip(f'{backend} backend is not benchmarked above {LOOKUP_MAX_TREES} trees')
+    return services[(n_trees, backend)]
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+@pytest.mark.parametrize('n_trees', FOREST_SIZES)
+def test_predict_single(benchmark, services, feature_pool, n_trees, backend):
+    """ModelInference.predict untuk satu baris."""
+    benchmark.group = 'ModelInference.predict'
+    service = get_service(services, n_trees, backend)
+    row = feature_pool[0][0].tolist()
+    assert benchmark(service.predict, row) in (0, 1)
+
+
+@pytest.mark.parametrize('batch_size', BATCH_SIZES)
+@pytest.mark.parametrize('backend', BACKENDS)
+@pytest.mark.parametrize('n_trees', FOREST_SIZES)
+def test_predict_batch(benchmark, services, feature_pool, n_trees, backend, batch_size):
+    """ModelInference.predict_batch per ukuran batch."""
+    benchmark.group = f'ModelInference.predict_batch[{batch_size}]'
+    service = get_service(services, n_trees, backend)
+    X = feature_pool[0][np.arange(batch_size) % len(feature_pool[0])]
+    predictions, _ = benchmark(service.predict_batch, X)
+    assert len(predictions) == batch_size
@@ -0,0 +1,38 @@
+import pytest
+
+from conftest import LARGE
+from Eksperimen_SML_YudhaElfransyah.preprocessing.automate_Yudha_Elfransyah import (
+    preprocess_data,
+    preprocess_data_streaming,
+)
+
+# Ukuran manifest; 1 juta dan 10 juta baris hanya dengan BENCH_LARGE=1
+SIZES = [1_000, 100_000] + ([1_000_000, 10_000_000] if LARGE else [])
+# preprocess_data memuat seluruh manifest ke memori, jadi dibatasi hingga 1 juta baris
+IN_MEMORY_MAX_ROWS = 1_000_000
+
+
+@pytest.mark.parametrize('n_rows', SIZES)
+def test_preprocess_data(benchmark, raw_manifest, tmp_path, n_rows):
+    """preprocess_data (in-memory) termasuk penulisan CSV dan Feather."""
+    if n_rows > IN_MEMORY_MAX_ROWS:
+        pytest.skip('in-memory preprocessing limited to 1M rows')
+    benchmark.group = f'preprocess[{n_rows}]'
+    manifest = raw_manifest(n_rows)
+    output = str(tmp_path / 'processed.csv')
+    df = benchmark.pedantic(preprocess_data, args=(manifest, output),
+                            kwargs={'columnar_path': str(tmp_path / 'processed.feather')},
+                            rounds=3 if n_rows <= 100_000 else 1, iterations=1)
+    assert len(df) == n_rows
+
+
+@pytest.mark.parametrize('n_rows', SIZES)
+def test_preprocess_data_streaming(benchmark, raw_manifest, tmp_path, n_rows):
+    """preprocess_data_streaming (memori terbatas) termasuk penulisan CSV dan Feather."""
+    benchmark.group = f'preprocess[{n_rows}]'
+    manifest = raw_manifest(n_rows)
+    output = str(tmp_path / 'processed.csv')
+    stats = benchmark.pedantic(preprocess_data_streaming, args=(manifest, output),
+                               kwargs={'columnar_path': str(tmp_path / 'processed.feather')},
+                               rounds=3 if n_rows <= 100_000 else 1, iterations=1)
+    assert stats['rows'] == n_rows
@@ -0,0 +1,80 @@
+import glob
+import importlib.util
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+root_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+monitor_dir = os.path.join(root_dir, 'Monitor dan Logging')
+sys.path.insert(0, root_dir)
+
+RAW_DATA_PATH = os.path.join(root_dir, 'Eksperimen_SML_YudhaElfransyah', 'titanic_raw', 'train.csv')
+PROCESSED_DATA_PATH = os.path.join(root_dir, 'Eksperimen_SML_YudhaElfransyah', 'preprocessing', 'train_processed.csv')
+STORAGE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.benchmarks')
+
+# Manifest besar hanya dijalankan jika BENCH_LARGE=1 (butuh beberapa GB disk/RAM dan beberapa menit)
+LARGE = os.environ.get('BENCH_LARGE') == '1'
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_configure(config):
+    # Simpan hasil di benchmarks/.benchmarks, tidak tergantung direktori kerja
+    if getattr(config.option, 'benchmark_storage', None) == 'file://./.benchmarks':
+        config.option.benchmark_storage = f'file://{STORAGE_DIR}'
+
+    # Tanpa baseline untuk mesin ini, jalankan tanpa perbandingan (bukan error)
+    compare = getattr(config.option, 'benchmark_compare', None)
+    if compare == '*_baseline':
+        from pytest_benchmark.utils import get_machine_id
+        machine_dir = os.path.join(STORAGE_DIR, get_machine_id())
+        if not glob.glob(os.path.join(machine_dir, '*_baseline*.json')):
+            config.option.benchmark_compare = []
+            config.option.benchmark_compare_fail = None
+            print(f'No benchmark baseline in {machine_dir}; save one with --benchmark-save=baseline')
+
+
+def load_module(name, filename):
+    """Muat modul dari folder "Monitor dan Logging" (nama folder mengandung spasi)."""
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.spec_from_file_location(name, os.path.join(monitor_dir, filename))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture(scope='session')
+def feature_pool():
+    """Baris fitur hasil preprocessing (float64) dan targetnya."""
+    df = pd.read_csv(PROCESSED_DATA_PATH)
+    y = df.pop('Survived').to_numpy()
+    return df.to_numpy(dtype=np.float64), y
+
+
+@pytest.fixture(scope='session')
+def raw_manifest(tmp_path_factory):
+    """
+    Pabrik manifest mentah sintetis: baris train.csv di-resample dengan
+    pengembalian hingga n baris. File dibuat sekali per ukuran per sesi.
+    """
+    raw = pd.read_csv(RAW_DATA_PATH)
+    directory = tmp_path_factory.mktemp('manifests')
+    paths = {}
+
+    def make(n_rows):
+        if n_rows not in paths:
+            rng = np.random.default_rng(n_rows)
+            path = directory / f'train_{n_rows}.csv'
+            # Ditulis per blok agar manifest 10 juta baris tidak perlu dimuat sekaligus
+            block = 1_000_000
+            for start in range(0, n_rows, block):
+                sample = raw.iloc[rng.integers(0, len(raw), min(block, n_rows - start))]
+                sample.to_csv(path, mode='w' if start == 0 else 'a', header=(start == 0), index=False)
+            paths[n_rows] = str(path)
+        return paths[n_rows]
+
+    return make
@@ -0,0 +1,688 @@
+import pytest
+import numpy as np
+import asyncio
+import importlib.util
+import json
+import os
+import sys
+import threading
+import time
+
+# Folder "Monitor dan Logging" mengandung spasi, jadi modul dimuat lewat path file
+monitor_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'Monitor dan Logging'))
+
+def load_module(name, filename):
+    # Simpan di sys.modules agar modul lain (mis. asgi_server) memakai instance yang sama
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.spec_from_file_location(name, os.path.join(monitor_dir, filename))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+@pytest.fixture(scope="module")
+def exporter():
+    """Muat exporter sekali per modul (metrik Prometheus hanya boleh didaftarkan sekali)."""
+    return load_module("prometheus_exporter", "3. prometheus-exporter.py")
+
+@pytest.fixture
+def client(exporter):
+    exporter.app.config['TESTING'] = True
+    return exporter.app.test_client()
+
+SAMPLE_ROWS = [
+    [3, 0, 22.0, 1, 0, 7.25, 0, 1],
+    [1, 1, 38.0, 1, 0, 71.2833, 0, 0],
+    [3, 1, 26.0, 0, 0, 7.925, 0, 1],
+]
+
+def test_predict_single(client):
+    """Uji endpoint /predict untuk satu baris fitur."""
+    response = client.post('/predict', json={'features': SAMPLE_ROWS[0]})
+    assert response.status_code == 200
+    assert response.get_json()['prediction'] in (0, 1)
+
+def test_predict_batch_matches_single(client):
+    """Uji bahwa /predict/batch memberi hasil yang sama dengan /predict per baris."""
+    response = client.post('/predict/batch', json={'instances': SAMPLE_ROWS})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['count'] == len(SAMPLE_ROWS)
+    singles = [client.post('/predict', json={'features': row}).get_json()['prediction'] for row in SAMPLE_ROWS]
+    assert body['predictions'] == singles
+
+def test_predict_batch_columnar(client, exporter):
+    """Uji bahwa format kolumnar setara dengan format baris."""
+    columns = {name: [row[i] for row in SAMPLE_ROWS] for i, name in enumerate(exporter.inference_module.FEATURE_NAMES)}
+    by_columns = client.post('/predict/batch', json={'columns': columns}).get_json()
+    by_rows = client.post('/predict/batch', json={'instances': SAMPLE_ROWS}).get_json()
+    assert by_columns['predictions'] == by_rows['predictions']
+
+def test_predict_batch_invalid(client, exporter):
+    """Uji bahwa body batch yang tidak valid ditolak dengan 400 dan dihitung."""
+    before = exporter.INVALID_REQUEST_COUNT._value.get()
+    assert client.post('/predict/batch', json={'instances': [[1, 2], [1]]}).status_code == 400
+    assert client.post('/predict/batch', json={'columns': {'Pclass': [1]}}).status_code == 400
+    assert client.post('/predict/batch', json={'wrong_key': []}).status_code == 400
+    assert client.post('/predict/batch', json={'instances': [SAMPLE_ROWS[0], [None] * 8]}).status_code == 400
+    assert exporter.INVALID_REQUEST_COUNT._value.get() == before + 4
+
+def test_observe_many_matches_observe(exporter):
+    """Uji bahwa observe_many menghasilkan bucket yang sama dengan observe per nilai."""
+    from prometheus_client import CollectorRegistry, Histogram
+    registry = CollectorRegistry()
+    bulk = Histogram('bulk_hist', 'bulk', registry=registry)
+    single = Histogram('single_hist', 'single', registry=registry)
+    values = np.array([0.001, 0.005, 0.3, 7.5, 12.0, 80.0])
+    exporter.observe_many(bulk, values)
+    for v in values:
+        single.observe(v)
+    assert [b.get() for b in bulk._buckets] == [b.get() for b in single._buckets]
+    assert bulk._sum.get() == pytest.approx(single._sum.get())
+
+def call_asgi(app, method, path, payload=None, query_string=b""):
+    """Panggil aplikasi ASGI secara langsung dan kembalikan (status, body JSON)."""
+    body = json.dumps(payload).encode() if payload is not None else b""
+    scope = {"type": "http", "method": method, "path": path, "headers": [], "query_string": query_string}
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    async def run():
+        await app(scope, receive, send)
+        status = messages[0]["status"]
+        return status, json.loads(b"".join(m.get("body", b"") for m in messages[1:]))
+    return run()
+
+def test_asgi_microbatching(exporter):
+    """Uji bahwa permintaan ASGI bersamaan dinilai dalam batch dengan hasil yang sama."""
+    asgi_server = load_module("asgi_server", "asgi_server.py")
+    exporter.result_cache.clear()
+    batches_before = asgi_server.BATCH_SIZE._sum.get()
+
+    async def scenario():
+        responses = await asyncio.gather(*[
+            call_asgi(asgi_server.app, "POST", "/predict", {"features": SAMPLE_ROWS[i % 3]})
+            for i in range(30)
+        ])
+        await asgi_server.batcher.stop()
+        return responses
+
+    responses = asyncio.run(scenario())
+    expected = [exporter.model_service.predict(row) for row in SAMPLE_ROWS]
+    for i, (status, body) in enumerate(responses):
+        assert status == 200
+        assert body["prediction"] == expected[i % 3]
+    # Semua 30 permintaan tercatat di histogram ukuran batch, dalam batch lebih sedikit dari 30
+    assert asgi_server.BATCH_SIZE._sum.get() - batches_before == 30
+    assert sum(b.get() for b in asgi_server.BATCH_SIZE._buckets) < 30
+
+def test_microbatcher_scores_with_submitted_service(exporter):
+    """Uji bahwa batch campuran dari dua model (reload di tengah batch) dinilai per model."""
+    asgi_server = load_module("asgi_server", "asgi_server.py")
+
+    class FixedService:
+        def __init__(self, label):
+            self.label = label
+            self.batches = []
+
+        def predict_batch(self, X):
+            self.batches.append(len(X))
+            return np.full(len(X), self.label), np.full((len(X), 2), 0.5)
+
+    old, new = FixedService(0), FixedService(1)
+    batcher = asgi_server.MicroBatcher(max_wait=0.05)
+
+    async def scenario():
+        results = await asyncio.gather(*[
+            batcher.submit(SAMPLE_ROWS[0], old if i % 2 == 0 else new) for i in range(6)
+        ])
+        await batcher.stop()
+        return results
+
+    results = asyncio.run(scenario())
+    assert [int(prediction) for prediction, _ in results] == [0, 1, 0, 1, 0, 1]
+    assert sum(old.batches) == 3 and sum(new.batches) == 3
+
+def test_asgi_invalid_request(exporter):
+    """Uji bahwa mode ASGI menghasilkan 400 dan menghitung permintaan tidak valid."""
+    asgi_server = load_module("asgi_server", "asgi_server.py")
+    before = exporter.INVALID_REQUEST_COUNT._value.get()
+    status, _ = asyncio.run(call_asgi(asgi_server.app, "POST", "/predict", {"wrong_key": [1, 2, 3]}))
+    assert status == 400
+    status, body = asyncio.run(call_asgi(asgi_server.app, "POST", "/predict", {}))
+    assert status == 400 and body == {'error': 'No JSON data provided'}
+    assert exporter.INVALID_REQUEST_COUNT._value.get() == before + 2
+
+def test_predict_does_not_sample_system_metrics(client, exporter, monkeypatch):
+    """Uji bahwa /predict tidak lagi memanggil psutil di jalur permintaan."""
+    def fail(*args, **kwargs):
+        raise AssertionError("psutil called on the request path")
+    monkeypatch.setattr(exporter.psutil, 'cpu_percent', fail)
+    monkeypatch.setattr(exporter.psutil, 'virtual_memory', fail)
+    assert client.post('/predict', json={'features': SAMPLE_ROWS[0]}).status_code == 200
+    assert client.post('/predict/batch', json={'instances': SAMPLE_ROWS}).status_code == 200
+
+def test_system_metrics_sampler(exporter):
+    """Uji bahwa sampler background memperbarui metrik sistem dan proses."""
+    sampler = exporter.SystemMetricsSampler(interval=0.01)
+    sampler.sample()
+    assert exporter.SYSTEM_MEMORY_USAGE._value.get() > 0
+    assert exporter.PROCESS_RSS._value.get() > 0
+    assert exporter.PROCESS_THREADS._value.get() >= 1
+    assert exporter.PROCESS_OPEN_FDS._value.get() >= 1
+
+def test_multiprocess_metrics(tmp_path):
+    """Uji bahwa mode multiprocess menggabungkan metrik dari beberapa proses."""
+    import subprocess
+    script = (
+        "import sys; sys.path.insert(0, sys.argv[1]); import wsgi; "
+        "client = wsgi.app.test_client(); "
+        "[client.post('/predict', json={'features': [3, 0, 22.0, 1, 0, 7.25, 0, 1]}) for _ in range(2)]"
+    )
+    env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=str(tmp_path))
+    # Dua proses terpisah, masing-masing mengirim dua permintaan
+    for _ in range(2):
+        subprocess.run([sys.executable, "-c", script, monitor_dir], env=env, check=True)
+
+    reader = (
+        "import sys; sys.path.insert(0, sys.argv[1]); import wsgi; "
+        "print(wsgi.app.test_client().get('/metrics').get_data(as_text=True))"
+    )
+    output = subprocess.run([sys.executable, "-c", reader, monitor_dir], env=env, check=True,
+                            capture_output=True, text=True).stdout
+    assert "prediction_requests_total 4.0" in output
+    assert "last_prediction_value" in output
+
+def test_prediction_cache_hits(client, exporter):
+    """Uji bahwa baris yang berulang dilayani dari cache dengan hasil yang sama."""
+    cache = exporter.prediction_cache
+    exporter.result_cache.clear()
+    hits_before = cache.CACHE_HITS._value.get()
+    first = client.post('/predict', json={'features': SAMPLE_ROWS[1]}).get_json()
+    # 1 dan 1.0 serta padding nol menghasilkan kunci kanonik yang sama
+    second = client.post('/predict', json={'features': [1, 1, 38, 1, 0, 71.2833]}).get_json()
+    assert first == second
+    assert cache.CACHE_HITS._value.get() == hits_before + 1
+
+def test_predict_proba_mode(client, exporter):
+    """Uji bahwa ?proba=true memberi probabilitas dari evaluasi yang sama dan merekam histogramnya."""
+    asgi_server = load_module("asgi_server", "asgi_server.py")
+    service = exporter.model_service
+    exporter.result_cache.clear()
+    count_before = exporter.PREDICTION_PROBABILITY._sum.get()
+    predictions, proba = service.predict_batch(np.array(SAMPLE_ROWS, dtype=np.float64))
+
+    plain = client.post('/predict', json={'features': SAMPLE_ROWS[0]}).get_json()
+    assert plain == {'prediction': int(predictions[0]), 'status': 'success'}
+    for _ in range(2):  # cache miss lalu cache hit
+        body = client.post('/predict?proba=true', json={'features': SAMPLE_ROWS[1]}).get_json()
+        assert body['prediction'] == int(predictions[1])
+        assert body['probabilities'] == proba[1].tolist()
+        assert body['threshold'] == service.decision_threshold
+        assert body['model_version'] == service.model_version
+    status, body = asyncio.run(call_asgi(asgi_server.app, "POST", "/predict", {"features": SAMPLE_ROWS[2]},
+                                         query_string=b"proba=1"))
+    assert status == 200 and body['probabilities'] == proba[2].tolist()
+    asyncio.run(asgi_server.batcher.stop())
+    expected = proba[0, 1] + 2 * proba[1, 1] + proba[2, 1]
+    assert exporter.PREDICTION_PROBABILITY._sum.get() - count_before == pytest.approx(expected)
+
+def test_prediction_cache_policies(exporter):
+    """Uji eviksi LRU, TTL, dan invalidasi saat versi model berubah."""
+    cache_module = exporter.prediction_cache
+    cache = cache_module.PredictionCache(max_size=2, ttl=60)
+    keys = [cache_module.make_key([float(i)] * 8) for i in range(3)]
+    for key in keys:
+        cache.put(key, 1, "v1")
+    assert len(cache) == 2
+    assert cache.get(keys[0], "v1") is None          # dibuang karena kapasitas
+    assert cache.get(keys[2], "v1") == 1
+    assert cache.get(keys[2], "v2") is None          # versi model baru mengosongkan cache
+    assert len(cache) == 0
+
+    expired = cache_module.PredictionCache(max_size=2, ttl=-1)
+    expired.put(keys[0], 1, "v1")
+    assert expired.get(keys[0], "v1") is None
+    assert cache_module.make_key([-0.0] * 8) == cache_module.make_key([0] * 8)
+
+@pytest.mark.parametrize("features", [
+    [3, 0, 22.0, 1, 0, 7.25, 0, 1],
+    [3, 0, 22.0],                        # dipad dengan nol
+    [3, 0, 22.0, 1, 0, 7.25, 0, 1, 9],   # dipotong
+    ["3", "0", "22.5", 1, 0, 7.25, 0, 1],  # string angka lewat jalur Pydantic
+])
+def test_fast_validation_matches_pydantic(exporter, features):
+    """Uji bahwa jalur validasi cepat memberi baris yang sama dengan Pydantic."""
+    reference = exporter.PredictionInput(features=features).features[:8]
+    reference = reference + [0.0] * (8 - len(reference))
+    row = exporter.validate_features({'features': features})
+    assert row.dtype == np.float64
+    np.testing.assert_array_equal(row, reference)
+
+def test_fast_validation_same_errors(client, exporter):
+    """Uji bahwa input tidak valid menghasilkan error 400 yang sama dengan Pydantic."""
+    for payload in [{'features': 'abc'}, {'features': [1, 'x']}, {'wrong_key': [1, 2, 3]}]:
+        with pytest.raises(exporter.ValidationError) as expected:
+            exporter.PredictionInput(**payload)
+        response = client.post('/predict', json=payload)
+        assert response.status_code == 400
+        assert response.get_json()['error'] == json.loads(json.dumps(expected.value.errors(), default=str))
+
+def test_predict_binary_payload(client, exporter):
+    """Uji content type biner (8 double little-endian) dan penolakan panjang yang salah."""
+    row = np.array(SAMPLE_ROWS[2], dtype='<f8')
+    binary = client.post('/predict', data=row.tobytes(), content_type='application/octet-stream')
+    assert binary.status_code == 200
+    assert binary.get_json() == client.post('/predict', json={'features': SAMPLE_ROWS[2]}).get_json()
+
+    before = exporter.INVALID_REQUEST_COUNT._value.get()
+    short = client.post('/predict', data=row[:5].tobytes(), content_type='application/octet-stream')
+    assert short.status_code == 400
+    assert exporter.INVALID_REQUEST_COUNT._value.get() == before + 1
+
+RAW_PASSENGER = {'Pclass': 3, 'Sex': 'male', 'Age': None, 'SibSp': 1, 'Parch': 0, 'Fare': 7.25, 'Embarked': 'S'}
+
+def test_predict_raw_passenger(client, exporter):
+    """Uji bahwa record mentah diproses dengan preprocessor model dan setara fitur ter-encode."""
+    preprocessor = exporter.model_service.preprocessor
+    assert preprocessor is not None
+    encoded = [3, 0, preprocessor.age_median_, 1, 0, 7.25, 0, 1]
+    raw = client.post('/predict', json={'passenger': RAW_PASSENGER})
+    assert raw.status_code == 200
+    assert raw.get_json() == client.post('/predict', json={'features': encoded}).get_json()
+
+    batch = client.post('/predict/batch', json={'records': [RAW_PASSENGER, RAW_PASSENGER]}).get_json()
+    assert batch['predictions'] == [raw.get_json()['prediction']] * 2
+
+def test_predict_raw_passenger_invalid(client, exporter, monkeypatch):
+    """Uji bahwa record mentah tidak valid atau tanpa preprocessor menghasilkan 400."""
+    before = exporter.INVALID_REQUEST_COUNT._value.get()
+    bad = dict(RAW_PASSENGER, Fare='abc')
+    assert client.post('/predict', json={'passenger': bad}).status_code == 400
+    monkeypatch.setattr(exporter.model_service, 'preprocessor', None)
+    assert client.post('/predict', json={'passenger': RAW_PASSENGER}).status_code == 400
+    assert client.post('/predict/batch', json={'records': [RAW_PASSENGER]}).status_code == 400
+    assert exporter.INVALID_REQUEST_COUNT._value.get() == before + 3
+
+def test_drift_monitor_window(exporter):
+    """Uji skor drift: data training tidak drift, data bergeser terdeteksi, jendela kedaluwarsa."""
+    import pandas as pd
+    drift_module = exporter.drift_monitor
+    names = exporter.inference_module.FEATURE_NAMES
+    reference = pd.read_csv(drift_module.DEFAULT_REFERENCE_PATH)[names].to_numpy(dtype=np.float64)
+    profile = drift_module.ReferenceProfile.from_data(reference, names)
+
+    now = [0.0]
+    monitor = drift_module.DriftMonitor(profile, window_seconds=60, n_buckets=6, min_samples=10,
+                                        clock=lambda: now[0])
+    assert monitor.scores() is None
+    for row in reference:
+        monitor.update(row)
+    single = monitor.scores()
+    assert np.allclose(single['psi'], 0) and np.allclose(single['ks'], 0)
+    assert np.allclose(single['mean'], reference.mean(axis=0))
+    assert np.allclose(single['std'], reference.std(axis=0))
+
+    # Sub-bucket lama keluar dari jendela; update_many mengisi jendela baru
+    now[0] = 1000.0
+    shifted = reference.copy()
+    shifted[:, 5] *= 3  # Tarif naik tiga kali lipat
+    monitor.update_many(shifted)
+    scores = monitor.scores()
+    assert scores['n'] == len(reference)
+    assert scores['psi'][5] > 0.25 and scores['ks'][5] > 0.2
+    assert np.allclose(np.delete(scores['psi'], 5), 0)
+
+    now[0] = 1061.0
+    assert monitor.scores() is None
+
+def test_predict_updates_drift_window(client, exporter):
+    """Uji bahwa /predict dan /predict/batch mengisi jendela drift."""
+    before = exporter.drift.window()[1]
+    client.post('/predict', json={'features': SAMPLE_ROWS[0]})
+    client.post('/predict/batch', json={'instances': SAMPLE_ROWS})
+    assert exporter.drift.window()[1] == before + 1 + len(SAMPLE_ROWS)
+
+def test_audit_log_writes_rotated_jsonl(exporter, tmp_path):
+    """Uji bahwa audit log menulis record JSONL per batch dan merotasi file berdasarkan ukuran."""
+    audit_module = exporter.audit_log
+    logger = audit_module.AuditLogger(directory=str(tmp_path), batch_size=3, flush_interval=0.05, max_bytes=1)
+    logger.start()
+    logger.log('/predict', SAMPLE_ROWS[0], np.int64(1), 'v1')
+    logger.log_batch('/predict/batch', np.array(SAMPLE_ROWS), np.array([0, 1, 0]), 'v1')
+    time.sleep(0.2)
+    logger.log('/predict', SAMPLE_ROWS[1], 0, 'v2')
+    logger.stop()
+
+    files = sorted(tmp_path.glob('audit-*.jsonl'))
+    assert len(files) == 2
+    records = [json.loads(line) for f in files for line in f.read_text().splitlines()]
+    assert [r['prediction'] for r in records] == [1, 0, 1, 0, 0]
+    assert records[0]['features'] == SAMPLE_ROWS[0]
+    assert records[3]['endpoint'] == '/predict/batch' and records[3]['features'] == SAMPLE_ROWS[2]
+    assert records[-1]['model_version'] == 'v2'
+
+def test_audit_log_prunes_files_of_all_processes(exporter, tmp_path):
+    """Uji bahwa max_files membatasi seluruh folder, termasuk file worker lain dan run sebelumnya."""
+    audit_module = exporter.audit_log
+    for i, pid in enumerate([111, 222, 333]):
+        old = tmp_path / f'audit-20240101-000000-{pid}-0001.jsonl'
+        old.write_text('{}\n')
+        os.utime(old, (1000 + i, 1000 + i))
+    logger = audit_module.AuditLogger(directory=str(tmp_path), max_files=2)
+    logger._open()
+    logger._close()
+    remaining = sorted(p.name for p in tmp_path.glob('audit-*.jsonl'))
+    assert len(remaining) == 2
+    assert remaining[0] == 'audit-20240101-000000-333-0001.jsonl'
+
+def test_audit_log_keeps_active_file_of_live_worker(exporter, tmp_path):
+    """Uji bahwa file aktif worker lain yang masih hidup tidak dihapus meskipun paling tua."""
+    import subprocess
+    audit_module = exporter.audit_log
+    worker = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(60)'])
+    try:
+        names = [f'audit-20240101-000000-{worker.pid}-0001.jsonl',  # file rotasi lama worker hidup
+                 f'audit-20240101-000000-{worker.pid}-0002.jsonl',  # file aktif worker hidup
+                 'audit-20240101-000000-111-0001.jsonl']
+        for i, name in enumerate(names):
+            (tmp_path / name).write_text('{}\n')
+            os.utime(tmp_path / name, (1000 + i, 1000 + i))
+        logger = audit_module.AuditLogger(directory=str(tmp_path), max_files=1)
+        logger._open()
+        own = os.path.basename(logger._file.name)
+        # File yang dihapus dari luar dibuka ulang sebelum batch berikutnya ditulis
+        os.remove(logger._file.name)
+        logger._write([(time.time(), '/predict', 'v1', SAMPLE_ROWS[0], 1)])
+        logger._close()
+    finally:
+        worker.kill()
+        worker.wait()
+    remaining = sorted(p.name for p in tmp_path.glob('audit-*.jsonl'))
+    assert names[1] in remaining
+    assert names[0] not in remaining and names[2] not in remaining
+    assert own not in remaining and len(remaining) == 2
+
+def test_audit_log_backpressure_and_sampling(client, exporter, tmp_path):
+    """Uji kebijakan drop saat antrean penuh, sampling, dan pengisian antrean oleh /predict."""
+    audit_module = exporter.audit_log
+    dropped = audit_module.AUDIT_DROPPED._value.get()
+    full = audit_module.AuditLogger(directory=str(tmp_path), queue_size=1)
+    for _ in range(3):
+        full.log('/predict', SAMPLE_ROWS[0], 1, 'v1')
+    assert audit_module.AUDIT_DROPPED._value.get() == dropped + 2
+    # Batch yang dibuang dihitung per baris; blocking=False tidak menunggu meskipun policy block
+    full.log_batch('/predict/batch', np.array(SAMPLE_ROWS), np.array([0, 1, 0]), 'v1')
+    assert audit_module.AUDIT_DROPPED._value.get() == dropped + 5
+    blocking = audit_module.AuditLogger(directory=str(tmp_path), queue_size=1, policy='block', block_timeout=5)
+    blocking.log('/predict', SAMPLE_ROWS[0], 1, 'v1')
+    start = time.perf_counter()
+    blocking.log('/predict', SAMPLE_ROWS[0], 1, 'v1', blocking=False)
+    assert time.perf_counter() - start < 1
+    assert audit_module.AUDIT_DROPPED._value.get() == dropped + 6
+
+    skipped = audit_module.AuditLogger(directory=str(tmp_path), sample_rate=0.0)
+    skipped.log('/predict', SAMPLE_ROWS[0], 1, 'v1')
+    skipped.log_batch('/predict/batch', np.array(SAMPLE_ROWS), np.array([0, 1, 0]), 'v1')
+    assert skipped._queue.qsize() == 0
+
+    with pytest.raises(ValueError):
+        audit_module.AuditLogger(directory=str(tmp_path), policy='wait')
+
+    before = exporter.audit._queue.qsize()
+    client.post('/predict', json={'features': SAMPLE_ROWS[0]})
+    client.post('/predict/batch', json={'instances': SAMPLE_ROWS})
+    assert exporter.audit._queue.qsize() == before + 2
+
+def stage_count(exporter, stage, status, outcome):
+    """Jumlah observasi STAGE_LATENCY untuk satu kombinasi label."""
+    for metric in exporter.STAGE_LATENCY.collect():
+        for sample in metric.samples:
+            if sample.name.endswith('_count') and sample.labels == {'stage': stage, 'status': status, 'outcome': outcome}:
+                return sample.value
+    return 0.0
+
+def test_predict_stage_latency(client, exporter):
+    """Uji bahwa setiap tahap /predict diukur, termasuk permintaan yang gagal."""
+    exporter.result_cache.clear()
+    stages = ['parse', 'validate', 'features', 'inference', 'record', 'serialize', 'total']
+    before = {s: stage_count(exporter, s, '200', 'cache_miss') for s in stages}
+    hits = stage_count(exporter, 'total', '200', 'cache_hit')
+    invalid = stage_count(exporter, 'total', '400', 'invalid')
+
+    client.post('/predict', json={'features': SAMPLE_ROWS[1]})
+    client.post('/predict', json={'features': SAMPLE_ROWS[1]})
+    client.post('/predict', json={'wrong_key': [1, 2, 3]})
+
+    assert all(stage_count(exporter, s, '200', 'cache_miss') == before[s] + 1 for s in stages)
+    assert stage_count(exporter, 'total', '200', 'cache_hit') == hits + 1
+    assert stage_count(exporter, 'total', '400', 'invalid') == invalid + 1
+    assert stage_count(exporter, 'inference', '400', 'invalid') == 0
+
+def test_debug_profile(client, exporter, monkeypatch):
+    """Uji endpoint profil: nonaktif secara default, butuh token admin, sesi background lalu collapsed stack."""
+    assert client.post('/debug/profile?seconds=0.05').status_code == 404
+    monkeypatch.setattr(exporter.sampling_profiler, 'PROFILER_ENABLED', True)
+    monkeypatch.setattr(exporter, 'ADMIN_TOKEN', None)
+    assert client.post('/debug/profile?seconds=0.05').status_code == 404
+    monkeypatch.setattr(exporter, 'ADMIN_TOKEN', 'secret')
+    assert client.post('/debug/profile?seconds=0.05').status_code == 403
+    assert client.get('/debug/profile', headers={'X-Admin-Token': 'wrong'}).status_code == 403
+    headers = {'X-Admin-Token': 'secret'}
+    assert client.post('/debug/profile?seconds=abc', headers=headers).status_code == 400
+
+    busy = threading.Event()
+    stop = threading.Event()
+    def spin():
+        busy.set()
+        while not stop.is_set():
+            sum(range(1000))
+    worker = threading.Thread(target=spin, name='busy-worker')
+    worker.start()
+    busy.wait()
+    try:
+        assert client.post('/debug/profile?seconds=0.3&interval=0.002', headers=headers).status_code == 202
+        # Thread permintaan tetap bebas melayani /predict selama sesi berjalan
+        assert client.get('/debug/profile', headers=headers).status_code == 202
+        assert client.post('/debug/profile?seconds=0.3', headers=headers).status_code == 409
+        assert client.post('/predict', json={'features': SAMPLE_ROWS[0]}).status_code == 200
+        exporter.sampling_profiler.current_session().wait(5)
+    finally:
+        stop.set()
+        worker.join()
+    response = client.get('/debug/profile', headers=headers)
+    assert response.status_code == 200
+    lines = response.get_data(as_text=True).splitlines()
+    assert any(line.startswith('busy-worker;') and 'spin (' in line for line in lines)
+    assert all(line.rsplit(' ', 1)[1].isdigit() for line in lines)
+    assert exporter.sampling_profiler.MAX_PROFILE_SECONDS < exporter.sampling_profiler.GUNICORN_TIMEOUT
+
+@pytest.fixture
+def restore_model(exporter, tmp_path, monkeypatch):
+    """Kembalikan model awal setelah uji hot-swap; cache model di folder sementara."""
+    monkeypatch.setattr(exporter.model_reloader.model_loader, 'DEFAULT_CACHE_DIR', str(tmp_path / 'cache'))
+    monkeypatch.setattr(exporter, 'ADMIN_TOKEN', 'secret')
+    original = exporter.model_service
+    yield original
+    exporter.swap_model_service(original)
+
+def save_forest(path, predicted_class):
+    """Simpan forest kecil yang selalu memprediksi satu kelas tertentu."""
+    import joblib
+    from sklearn.ensemble import RandomForestClassifier
+    X = np.array(SAMPLE_ROWS * 4, dtype=np.float64)
+    y = np.array([predicted_class] * (len(X) - 1) + [1 - predicted_class])
+    model = RandomForestClassifier(n_estimators=3, max_depth=1, random_state=0).fit(X, y)
+    joblib.dump(model, path)
+    return str(path)
+
+def test_admin_reload_swaps_model(client, exporter, restore_model, tmp_path, monkeypatch):
+    """Uji hot-swap lewat /admin/reload: model baru dilayani, metrik versi dan durasi diperbarui."""
+    pointer = tmp_path / 'model.uri'
+    monkeypatch.setattr(exporter.reloader, 'pointer_file', str(pointer))
+    assert client.post('/admin/reload', json={}).status_code == 403
+    assert client.post('/admin/reload', json={}, headers={'X-Admin-Token': 'secre'}).status_code == 403
+    headers = {'X-Admin-Token': 'secret'}
+    model_path = save_forest(tmp_path / 'model_one.joblib', 1)
+    swaps = exporter.model_reloader.MODEL_SWAP_DURATION.labels(result='success')._sum.get()
+
+    response = client.post('/admin/reload', json={'model_uri': model_path, 'wait': True}, headers=headers)
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['status'] == 'swapped' and body['model_uri'] == model_path
+    assert exporter.model_service is not restore_model
+    assert client.get('/admin/model', headers=headers).get_json()['model_version'] == body['model_version']
+    assert client.post('/predict', json={'features': SAMPLE_ROWS[0]}).get_json()['prediction'] == 1
+    assert exporter.model_reloader.MODEL_SWAP_DURATION.labels(result='success')._sum.get() > swaps
+    assert exporter.model_reloader.MODEL_VERSION_INFO.labels(version=body['model_version'])._value.get() == 1
+    assert exporter.model_reloader.MODEL_VERSION_INFO.labels(version=restore_model.model_version)._value.get() == 0
+    assert exporter.model_reloader.read_pointer(str(pointer)) == model_path
+
+    # Model rusak: pemuatan gagal dan model yang sedang dilayani tidak berubah
+    broken = tmp_path / 'broken.joblib'
+    broken.write_bytes(b'not a model')
+    current = exporter.model_service
+    response = client.post('/admin/reload', json={'model_uri': str(broken), 'wait': True}, headers=headers)
+    assert response.status_code == 500
+    assert exporter.model_service is current
+    # Pointer tetap menunjuk model terakhir yang berhasil, jadi restart tidak gagal
+    assert exporter.model_reloader.read_pointer(str(pointer)) == model_path
+    assert client.post('/admin/reload', json={'model_uri': str(tmp_path / 'missing.joblib')},
+                       headers=headers).status_code == 400
+
+def test_model_pointer_watcher(exporter, restore_model, tmp_path):
+    """Uji bahwa perubahan file pointer memicu pemuatan model yang ditunjuk sekali saja."""
+    pointer = tmp_path / 'model.uri'
+    model_path = save_forest(tmp_path / 'model_zero.joblib', 0)
+    reloader = exporter.model_reloader.ModelReloader(
+        factory=exporter.inference_module.ModelInference, swap=exporter.swap_model_service,
+        current=lambda: exporter.model_service, warmup_rows=np.array(SAMPLE_ROWS, dtype=np.float64),
+        pointer_file=str(pointer))
+    assert reloader.check_pointer() is None
+    exporter.model_reloader.write_pointer(str(pointer), model_path)
+    reloader.check_pointer().result()
+    assert exporter.model_service.model_uri == model_path
+    assert exporter.model_service.predict(SAMPLE_ROWS[0]) == 0
+    assert reloader.check_pointer() is None
+
+class StubCandidate:
+    """Model kandidat tiruan: prediksi = Sex (indeks 1), dengan waktu CPU yang dapat diatur."""
+    model_version = 'candidate'
+
+    def __init__(self, cpu_seconds=0.0):
+        self.cpu_seconds = cpu_seconds
+
+    def predict(self, row):
+        end = time.thread_time() + self.cpu_seconds
+        while time.thread_time() < end:
+            pass
+        return int(row[1])
+
+def shadow_counts(exporter):
+    """Jumlah perbandingan shadow per (live_class, candidate_class, agree)."""
+    counts = {}
+    for metric in exporter.shadow_scoring.SHADOW_PREDICTIONS.collect():
+        for sample in metric.samples:
+            if sample.name.endswith('_total'):
+                key = (sample.labels['live_class'], sample.labels['candidate_class'], sample.labels['agree'])
+                counts[key] = sample.value
+    return counts
+
+def test_shadow_scoring_agreement(client, exporter, monkeypatch):
+    """Uji bahwa /predict dicerminkan ke model kandidat dan kesepakatan per kelas direkam."""
+    shadow_module = exporter.shadow_scoring
+    scorer = shadow_module.ShadowScorer(StubCandidate(), sample_rate=1.0, cpu_budget=1.0)
+    monkeypatch.setattr(exporter, 'shadow', scorer)
+    scorer.start()
+    before = shadow_counts(exporter)
+
+    live = [client.post('/predict', json={'features': row}).get_json()['prediction'] for row in SAMPLE_ROWS]
+    scorer.wait_idle()
+    after = shadow_counts(exporter)
+    expected = {}
+    for row, prediction in zip(SAMPLE_ROWS, live):
+        key = (str(prediction), str(int(row[1])), 'true' if prediction == int(row[1]) else 'false')
+        expected[key] = expected.get(key, 0) + 1
+    assert {k: after[k] - before.get(k, 0) for k in after if after[k] != before.get(k, 0)} == expected
+
+    skipped = shadow_module.ShadowScorer(StubCandidate(), sample_rate=0.0)
+    skipped.submit(SAMPLE_ROWS[0], 1)
+    assert skipped._queue.qsize() == 0
+
+def test_shadow_cpu_budget(exporter):
+    """Uji bahwa jalur shadow berhenti menilai setelah kredit CPU habis."""
+    shadow_module = exporter.shadow_scoring
+    skipped = shadow_module.SHADOW_SKIPPED.labels(reason='cpu_budget')._value.get()
+    # 1% CPU dengan burst 1 detik = kredit 10 ms; setiap prediksi memakai 4 ms CPU
+    scorer = shadow_module.ShadowScorer(StubCandidate(cpu_seconds=0.004), cpu_budget=0.01, burst_seconds=1.0,
+                                        processes=1)
+    results = [scorer.score(SAMPLE_ROWS[0], 0) for _ in range(10)]
+    scored = sum(r is not None for r in results)
+    assert 2 <= scored <= 4
+    assert shadow_module.SHADOW_SKIPPED.labels(reason='cpu_budget')._value.get() == skipped + 10 - scored
+
+    # Anggaran berlaku untuk seluruh server: setiap worker gunicorn mendapat bagiannya
+    shared = shadow_module.ShadowScorer(StubCandidate(), cpu_budget=0.4, burst_seconds=1.0, processes=4)
+    assert shared.budget.cpu_fraction == pytest.approx(0.1)
+    assert shared.budget.burst == pytest.approx(0.1)
+
+    full = shadow_module.ShadowScorer(StubCandidate(), sample_rate=1.0, queue_size=1)
+    queue_full = shadow_module.SHADOW_SKIPPED.labels(reason='queue_full')._value.get()
+    full.submit(SAMPLE_ROWS[0], 0)
+    full.submit(SAMPLE_ROWS[0], 0)
+    assert shadow_module.SHADOW_SKIPPED.labels(reason='queue_full')._value.get() == queue_full + 1
+
+def test_ready_after_warm_up(client, exporter, monkeypatch):
+    """Uji bahwa /ready baru 200 setelah model dipanaskan, dan waktu siap direkam."""
+    monkeypatch.setattr(exporter, 'ready_event', threading.Event())
+    response = client.get('/ready')
+    assert response.status_code == 503
+    assert response.get_json() == {'ready': False}
+
+    exporter.warm_up_and_mark_ready()
+    body = client.get('/ready').get_json()
+    assert body['ready'] is True
+    assert body['model_version'] == exporter.model_service.model_version
+    assert 0 < body['startup_seconds'] < time.time() - exporter.PROCESS_START_TIME
+    assert exporter.READY_TIMESTAMP._value.get() <= time.time()
+
+def test_fast_start_defers_imports(tmp_path):
+    """Uji bahwa FAST_START dengan snapshot compiled start tanpa sklearn, pandas, dan flasgger."""
+    import subprocess
+    import joblib
+    from sklearn.ensemble import RandomForestClassifier
+    rng = np.random.default_rng(0)
+    X = rng.random((200, 8))
+    model = RandomForestClassifier(n_estimators=10, max_depth=5, random_state=0).fit(X, (X[:, 0] > 0.5).astype(int))
+    joblib.dump(model, tmp_path / "model.joblib")
+    env = dict(os.environ, FAST_START='1', AUDIT_LOG_ENABLED='0', INFERENCE_BACKEND='compiled',
+               MODEL_URI=str(tmp_path / "model.joblib"), MODEL_CACHE_DIR=str(tmp_path / "cache"))
+    env.pop('PROMETHEUS_MULTIPROC_DIR', None)
+    # Bangun cache dan snapshot seperti langkah build image
+    subprocess.run([sys.executable, os.path.join(monitor_dir, "model_loader.py"), env['MODEL_URI']],
+                   env=env, check=True, capture_output=True)
+
+    script = (
+        "import sys; sys.path.insert(0, sys.argv[1]); import wsgi; "
+        "lazy = ('flasgger', 'pandas', 'sklearn'); "
+        "assert not [m for m in lazy if m in sys.modules], [m for m in lazy if m in sys.modules]; "
+        "client = wsgi.app.test_client(); "
+        "assert client.get('/ready').status_code == 503; "
+        "wsgi.exporter.start_background_services(); "
+        "assert wsgi.exporter.ready_event.wait(30); "
+        "assert client.get('/ready').status_code == 200; "
+        "print(client.post('/predict', json={'features': [float(v) for v in sys.argv[2:]]}).get_json()['prediction']); "
+        "assert not [m for m in lazy if m in sys.modules]; "
+        "assert client.get('/apidocs/').status_code == 200; "
+        "spec = client.get('/apispec_1.json').get_json(); "
+        "assert {'/predict', '/predict/batch', '/ready'} <= set(spec['paths']), spec['paths']"
+    )
+    output = subprocess.run([sys.executable, "-c", script, monitor_dir] + [str(v) for v in X[0]],
+                            env=env, check=True, capture_output=True, text=True).stdout
+    assert int(output.strip()) == model.predict(X[:1])[0]
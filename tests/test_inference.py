@@ -0,0 +1,279 @@
+import pytest
+import numpy as np
+import joblib
+import json
+import importlib.util
+import os
+from sklearn.ensemble import RandomForestClassifier
+
+# Folder "Monitor dan Logging" mengandung spasi, jadi modul dimuat lewat path file
+monitor_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'Monitor dan Logging'))
+spec = importlib.util.spec_from_file_location("inference_module", os.path.join(monitor_dir, "7. inference.py"))
+inference_module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(inference_module)
+
+@pytest.fixture(scope="module")
+def trained_model():
+    """Latih forest kecil pada data sintetis 8 fitur."""
+    rng = np.random.default_rng(0)
+    X = rng.random((200, 8)) * [3, 1, 80, 5, 5, 500, 1, 1]
+    y = (X[:, 1] > 0.5).astype(int)
+    model = RandomForestClassifier(n_estimators=20, max_depth=6, random_state=42).fit(X, y)
+    return model, X
+
+def test_load_joblib_model_with_cache(trained_model, tmp_path):
+    """Uji bahwa model joblib dimuat lewat cache dan memberi prediksi yang sama."""
+    model, X = trained_model
+    model_path = tmp_path / "model.joblib"
+    joblib.dump(model, model_path)
+    cache_dir = tmp_path / "cache"
+
+    first = inference_module.ModelInference(model_uri=str(model_path), cache_dir=str(cache_dir))
+    assert len(os.listdir(cache_dir)) == 1
+    second = inference_module.ModelInference(model_uri=str(model_path), cache_dir=str(cache_dir))
+    assert first.model_version == second.model_version
+
+    predictions, _ = second.predict_batch(X)
+    np.testing.assert_array_equal(predictions, model.predict(X))
+
+def test_load_mlflow_model_dir(trained_model, tmp_path):
+    """Uji pemuatan folder model MLflow (berisi file MLmodel)."""
+    mlflow_sklearn = pytest.importorskip("mlflow.sklearn")
+    model, X = trained_model
+    model_dir = tmp_path / "mlflow_model"
+    mlflow_sklearn.save_model(model, str(model_dir))
+
+    service = inference_module.ModelInference(model_uri=str(model_dir), cache_dir=str(tmp_path / "cache"))
+    assert service.predict(X[0]) == model.predict(X[:1])[0]
+
+def test_missing_model_path(tmp_path):
+    """Uji bahwa path model yang tidak ada langsung gagal."""
+    with pytest.raises(FileNotFoundError):
+        inference_module.ModelInference(model_uri=str(tmp_path / "missing.joblib"))
+
+def test_registry_uri_resolved_to_version(monkeypatch):
+    """Uji bahwa URI stage/alias registry dikunci ke versi konkret sehingga versi baru terdeteksi."""
+    from types import SimpleNamespace
+    model_loader = inference_module.model_loader
+    registry = {"Production": ["3"], "alias": "4"}
+
+    class FakeClient:
+        def get_latest_versions(self, name, stages=None):
+            versions = registry["Production"] if stages == ["Production"] else ["2", "3", "5"]
+            return [SimpleNamespace(version=v) for v in versions]
+
+        def get_model_version_by_alias(self, name, alias):
+            return SimpleNamespace(version=registry["alias"])
+
+    monkeypatch.setattr(model_loader, "_registry_client", FakeClient)
+    assert model_loader.resolve_model_uri("models:/titanic/Production") == ("mlflow", "models:/titanic/3")
+    assert model_loader.resolve_model_uri("models:/titanic/latest") == ("mlflow", "models:/titanic/5")
+    assert model_loader.resolve_model_uri("models:/titanic@champion") == ("mlflow", "models:/titanic/4")
+    assert model_loader.resolve_model_uri("models:/titanic/7") == ("mlflow", "models:/titanic/7")
+
+    before = model_loader.model_fingerprint("models:/titanic/Production")
+    registry["Production"] = ["6"]
+    assert model_loader.model_fingerprint("models:/titanic/Production") != before
+    registry["Production"] = []
+    with pytest.raises(FileNotFoundError):
+        model_loader.resolve_model_uri("models:/titanic/Production")
+
+def test_moving_stage_resolved_once_per_service(trained_model, tmp_path, monkeypatch):
+    """Uji bahwa semua artefak satu layanan berasal dari satu versi meskipun stage berpindah di tengah pemuatan."""
+    from types import SimpleNamespace
+    model_loader = inference_module.model_loader
+    model, X = trained_model
+    versions = iter(range(3, 100))
+    loaded = []
+
+    class MovingClient:
+        def get_latest_versions(self, name, stages=None):
+            # Setiap panggilan registry melihat versi baru
+            return [SimpleNamespace(version=str(next(versions)))]
+
+    def deserialize(kind, location):
+        loaded.append(location)
+        return model
+
+    def find_artifact(kind, location, filename):
+        loaded.append(location)
+        path = tmp_path / location.replace(":/", "_").replace("/", "_") / filename
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if filename == model_loader.THRESHOLD_FILENAME:
+            path.write_text(json.dumps({"threshold": int(location.rsplit("/", 1)[1]) / 10}))
+            return str(path)
+        return None
+
+    monkeypatch.setattr(model_loader, "_registry_client", MovingClient)
+    monkeypatch.setattr(model_loader, "_deserialize", deserialize)
+    monkeypatch.setattr(model_loader, "_find_artifact", find_artifact)
+    cache_dir = str(tmp_path / "cache")
+    service = inference_module.ModelInference(model_uri="models:/titanic/Production", cache_dir=cache_dir,
+                                              backend="compiled")
+    assert service.model_uri == "models:/titanic/Production"
+    assert service.resolved_uri == "models:/titanic/3"
+    assert service.decision_threshold == 0.3
+    assert service.model_version == model_loader.model_fingerprint("models:/titanic/3")
+    assert set(loaded) == {"models:/titanic/3"}
+
+    # Layanan berikutnya mengikuti versi baru, dengan semua artefak dari versi itu
+    loaded.clear()
+    later = inference_module.ModelInference(model_uri="models:/titanic/Production", cache_dir=cache_dir,
+                                            backend="compiled")
+    later.model
+    assert later.resolved_uri == "models:/titanic/4" and later.decision_threshold == 0.4
+    assert set(loaded) == {"models:/titanic/4"}
+
+def test_dummy_model_is_deterministic():
+    """Uji bahwa model fallback identik antar proses/instance."""
+    a = inference_module.ModelInference()
+    b = inference_module.ModelInference()
+    row = [3, 0, 22.0, 1, 0, 7.25, 0, 1]
+    assert a.model_version == "dummy"
+    np.testing.assert_array_equal(a.predict_batch([row])[1], b.predict_batch([row])[1])
+
+def test_compiled_forest_matches_sklearn(trained_model):
+    """Uji bahwa CompiledForest memberi probabilitas dan kelas yang identik dengan sklearn."""
+    model, X = trained_model
+    compiled = inference_module.CompiledForest.from_sklearn(model)
+    rng = np.random.default_rng(1)
+    # Sertakan nilai bulat agar banyak input jatuh tepat di sekitar threshold
+    Z = np.vstack([X, np.round(rng.random((500, 8)) * [3, 1, 80, 5, 5, 500, 1, 1])])
+    np.testing.assert_array_equal(compiled.predict_proba(Z), model.predict_proba(Z))
+    np.testing.assert_array_equal(compiled.predict(Z), model.predict(Z))
+    np.testing.assert_array_equal(compiled.predict(Z[0]), model.predict(Z[:1]))
+
+@pytest.mark.parametrize("backend", ["compiled", "auto", "lookup"])
+def test_inference_backends_agree(trained_model, tmp_path, backend):
+    """Uji bahwa semua backend ModelInference memberi hasil yang sama."""
+    model, X = trained_model
+    model_path = tmp_path / "model.joblib"
+    joblib.dump(model, model_path)
+    reference = inference_module.ModelInference(model_uri=str(model_path), cache_dir=str(tmp_path / "cache"), backend="sklearn")
+    service = inference_module.ModelInference(model_uri=str(model_path), cache_dir=str(tmp_path / "cache"), backend=backend)
+    assert service.predict(X[0]) == reference.predict(X[0])
+    np.testing.assert_array_equal(service.predict_batch(X)[1], reference.predict_batch(X)[1])
+
+def test_categorical_lookup_matches_sklearn(tmp_path):
+    """Uji bahwa tabel Age x Fare identik dengan sklearn di setiap sel dan fallback menangani sisanya."""
+    import categorical_lookup
+    from feature_csv import read_feature_csv
+    feature_names = list(inference_module.FEATURE_NAMES)
+    X = read_feature_csv(categorical_lookup.LOOKUP_DATA_PATH, feature_names)
+    y = read_feature_csv(categorical_lookup.LOOKUP_DATA_PATH, ["Survived"]).ravel()
+    model = RandomForestClassifier(n_estimators=10, max_depth=6, random_state=42).fit(X, y)
+    compiled = inference_module.CompiledForest.from_sklearn(model)
+    lookup = categorical_lookup.CategoricalLookup.from_forest(compiled, X, feature_names)
+    assert not lookup.verified
+    assert lookup.verify(model) > lookup.n_cells and lookup.verified
+    np.testing.assert_array_equal(lookup.predict_proba(X), model.predict_proba(X))
+    np.testing.assert_array_equal(lookup.predict(X[0]), model.predict(X[:1]))
+
+    # Kombinasi yang tidak ada di data training dan Age kosong dilayani forest lengkap
+    Z = X[:3].copy()
+    Z[0, feature_names.index("SibSp")] = 7
+    Z[1, feature_names.index("Age")] = np.nan
+    np.testing.assert_array_equal(lookup.predict_proba(Z), compiled.predict_proba(Z))
+
+    model_path = tmp_path / "model.joblib"
+    joblib.dump(model, model_path)
+    cache_dir = str(tmp_path / "cache")
+    inference_module.ModelInference(model_uri=str(model_path), cache_dir=cache_dir, backend="lookup")
+    cached = [name for name in os.listdir(cache_dir) if ".lookup-" in name]
+    assert len(cached) == 1
+    service = inference_module.ModelInference(model_uri=str(model_path), cache_dir=cache_dir, backend="lookup")
+    # Tabel di cache sudah terverifikasi, jadi model sklearn tidak perlu dimuat
+    assert service._model is None and service.lookup.verified
+    assert service.lookup.n_cells == lookup.n_cells
+    np.testing.assert_array_equal(service.predict_batch(X)[1], model.predict_proba(X))
+    assert service.predict(X[0]) == model.predict(X[:1])[0]
+
+    # Tabel di cache yang belum terverifikasi dan salah: diverifikasi ulang, ditolak,
+    # tidak di-cache, dan layanan turun ke backend compiled
+    broken = categorical_lookup.CategoricalLookup.from_forest(compiled, X, feature_names)
+    _, _, table = next(iter(broken.tables.values()))
+    table[0, 0] = 1 - table[0, 0]
+    broken.save(os.path.join(cache_dir, cached[0]))
+    fallback = inference_module.ModelInference(model_uri=str(model_path), cache_dir=cache_dir, backend="lookup")
+    assert fallback.backend == "compiled" and fallback.lookup is None
+    assert not categorical_lookup.CategoricalLookup.load(os.path.join(cache_dir, cached[0]), compiled).verified
+    np.testing.assert_array_equal(fallback.predict_batch(X)[1], model.predict_proba(X))
+
+def test_compiled_snapshot_startup(trained_model, tmp_path):
+    """Uji bahwa backend compiled dimulai dari snapshot dan model sklearn baru dimuat saat diakses."""
+    model, X = trained_model
+    model_path = tmp_path / "model.joblib"
+    joblib.dump(model, model_path)
+    cache_dir = str(tmp_path / "cache")
+    first = inference_module.ModelInference(model_uri=str(model_path), cache_dir=cache_dir, backend="compiled")
+    assert any(name.endswith(".compiled.npz") for name in os.listdir(cache_dir))
+
+    service = inference_module.ModelInference(model_uri=str(model_path), cache_dir=cache_dir, backend="compiled")
+    assert service._model is None
+    assert service.model_version == first.model_version
+    np.testing.assert_array_equal(service.classes_, model.classes_)
+    np.testing.assert_array_equal(service.predict_batch(X)[1], model.predict_proba(X))
+    assert service.model.n_estimators == model.n_estimators
+
+def test_decision_threshold_logged_next_to_model(trained_model, tmp_path, monkeypatch):
+    """Uji bahwa threshold di samping model dipakai untuk keputusan dan default-nya sama dengan sklearn."""
+    model, X = trained_model
+    joblib.dump(model, tmp_path / "model.joblib")
+    default = inference_module.ModelInference(model_uri=str(tmp_path / "model.joblib"), cache_dir=str(tmp_path / "cache"))
+    assert default.decision_threshold == 0.5
+    np.testing.assert_array_equal(default.predict_batch(X)[0], model.predict(X))
+
+    (tmp_path / "tuned").mkdir()
+    joblib.dump(model, tmp_path / "tuned" / "model.joblib")
+    (tmp_path / "tuned" / "decision_threshold.json").write_text('{"threshold": 0.3}')
+    monkeypatch.setenv("DECISION_THRESHOLD", "0.9")
+    for backend in ("sklearn", "compiled"):
+        tuned = inference_module.ModelInference(model_uri=str(tmp_path / "tuned" / "model.joblib"),
+                                                cache_dir=str(tmp_path / "cache"), backend=backend)
+        assert tuned.decision_threshold == 0.3
+        predictions, proba = tuned.predict_batch(X)
+        np.testing.assert_array_equal(proba, model.predict_proba(X))
+        np.testing.assert_array_equal(predictions, (proba[:, 1] > 0.3).astype(int))
+        prediction, row_proba = tuned.predict_with_proba(X[0])
+        assert prediction == predictions[0] and tuned.predict(X[0]) == prediction
+        np.testing.assert_array_equal(row_proba, proba[0])
+
+    # Threshold di-tuning ulang tanpa melatih ulang: start berikutnya memakai nilai baru
+    (tmp_path / "tuned" / "decision_threshold.json").write_text('{"threshold": 0.7}')
+    retuned = inference_module.ModelInference(model_uri=str(tmp_path / "tuned" / "model.joblib"),
+                                              cache_dir=str(tmp_path / "cache"))
+    assert retuned.decision_threshold == 0.7
+    assert retuned.model_version == tuned.model_version
+    assert retuned.cache_version != tuned.cache_version
+
+    # Tanpa artefak threshold, DECISION_THRESHOLD menjadi default
+    assert inference_module.ModelInference().decision_threshold == 0.9
+    with pytest.raises(ValueError):
+        inference_module.ModelInference(decision_threshold=1.5)
+
+def test_unknown_backend():
+    """Uji bahwa backend yang tidak dikenal ditolak."""
+    with pytest.raises(ValueError):
+        inference_module.ModelInference(backend="gpu")
+
+def test_preprocessor_logged_next_to_model(trained_model, tmp_path):
+    """Uji bahwa preprocessor.json di samping model dimuat dan di-cache bersama model."""
+    model, _ = trained_model
+    joblib.dump(model, tmp_path / "model.joblib")
+    preprocessor = inference_module.load_preprocessing_module().TitanicPreprocessor.load(
+        inference_module.DEFAULT_PREPROCESSOR_PATH)
+    preprocessor.save(str(tmp_path / "preprocessor.json"))
+
+    service = inference_module.ModelInference(model_uri=str(tmp_path / "model.joblib"), cache_dir=str(tmp_path / "cache"))
+    assert service.preprocessor is not None
+    X = service.transform_records([{'Pclass': 1, 'Sex': 'female', 'Age': 38, 'SibSp': 1, 'Parch': 0,
+                                    'Fare': 71.2833, 'Embarked': 'C'}])
+    np.testing.assert_array_equal(X, [[1, 1, 38, 1, 0, 71.2833, 0, 0]])
+
+    (tmp_path / "bare").mkdir()
+    joblib.dump(model, tmp_path / "bare" / "model.joblib")
+    without = inference_module.ModelInference(model_uri=str(tmp_path / "bare" / "model.joblib"),
+                                              cache_dir=str(tmp_path / "cache"))
+    assert without.preprocessor is None
+    with pytest.raises(ValueError, match="preprocessor"):
+        without.transform_records([{'Pclass': 1}])
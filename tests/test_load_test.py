@@ -0,0 +1,73 @@
+import pytest
+import numpy as np
+import asyncio
+import importlib.util
+import os
+
+monitor_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'Monitor dan Logging'))
+
+@pytest.fixture(scope="module")
+def load_test():
+    spec = importlib.util.spec_from_file_location("load_test", os.path.join(monitor_dir, "load_test.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def test_latency_histogram_percentiles(load_test):
+    """Uji bahwa persentil histogram log-linear sesuai numpy dalam galat relatif 0.1%."""
+    rng = np.random.default_rng(0)
+    samples = rng.lognormal(mean=-6, sigma=1.5, size=20000)  # detik, dari mikrodetik hingga detik
+    first, second = load_test.LatencyHistogram(), load_test.LatencyHistogram()
+    for i, value in enumerate(samples):
+        (first if i % 2 else second).record(value)
+    first.merge(second)
+    assert first.total == len(samples)
+
+    exact_us = np.floor(samples * 1e6)
+    for p in (50, 90, 99, 99.9):
+        expected = np.percentile(exact_us, p, method='inverted_cdf')
+        assert abs(first.percentile(p) - expected) <= max(expected * 1e-3, 1)
+    assert first.percentile(100) == exact_us.max()
+
+def test_payload_mix_ratio(load_test):
+    """Uji bahwa rasio payload tidak valid dan ukuran batch dihormati."""
+    rows = [[3, 0, 22.0, 1, 0, 7.25, 0, 1]]
+    mix = load_test.PayloadMix(rows, invalid_ratio=0.25, batch_size=4, seed=1)
+    payloads = [mix.next() for _ in range(2000)]
+    invalid = sum(not valid for _, valid in payloads)
+    assert 400 < invalid < 600
+    assert all(len(p['instances']) == 4 for p, valid in payloads if valid)
+
+def test_run_load_test_against_stub(load_test):
+    """Uji run singkat mode tertutup dan laju tetap terhadap server aiohttp tiruan."""
+    web = pytest.importorskip("aiohttp.web")
+
+    async def predict(request):
+        body = await request.json()
+        if not isinstance(body.get('features'), list) or not all(isinstance(v, float) for v in body['features']):
+            return web.json_response({'error': 'invalid'}, status=400)
+        return web.json_response({'prediction': 1})
+
+    async def scenario():
+        app = web.Application()
+        app.router.add_post('/predict', predict)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        url = f'http://127.0.0.1:{port}/predict'
+        mix = load_test.PayloadMix([[3, 0, 22.0, 1, 0, 7.25, 0, 1]], invalid_ratio=0.2, seed=0)
+        try:
+            closed = await load_test.run_load_test(url, mix, duration=5, concurrency=4, max_requests=50)
+            opened = await load_test.run_load_test(url, mix, duration=0.3, concurrency=4, rps=50)
+        finally:
+            await runner.cleanup()
+        return closed, opened
+
+    closed, opened = asyncio.run(scenario())
+    report = closed.to_dict()
+    assert report['requests'] == 50
+    assert report['unexpected_status'] == 0 and report['connection_errors'] == 0
+    assert report['status_counts'].get('400', 0) == 50 - report['valid_latency']['count']
+    assert 10 <= opened.to_dict()['requests'] <= 20
@@ -7,7 +7,8 @@ import sys
 # Tambahkan root proyek ke path agar modul preprocessing dapat diimpor
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from Eksperimen_SML_YudhaElfransyah.preprocessing.automate_Yudha_Elfransyah import preprocess_data
+from Eksperimen_SML_YudhaElfransyah.preprocessing.automate_Yudha_Elfransyah import preprocess_data, preprocess_data_streaming, QuantileSketch, TitanicPreprocessor
+from Membangun_model.dataset import load_dataset
 
 @pytest.fixture
 def sample_raw_data(tmp_path):
@@ -83,3 +84,92 @@ def test_encoding_embarked(sample_raw_data, output_path):
     # Cek jika ada kolom yang dimulai dengan Embarked_
     embarked_cols = [col for col in df_clean.columns if col.startswith('Embarked_')]
     assert len(embarked_cols) > 0
+
+@pytest.mark.parametrize("chunksize", [1, 2, 3, 100])
+def test_streaming_matches_in_memory(sample_raw_data, tmp_path, chunksize):
+    """Uji bahwa mode streaming menghasilkan file yang identik byte demi byte."""
+    in_memory_path = str(tmp_path / "in_memory.csv")
+    streaming_path = str(tmp_path / "streaming.csv")
+    preprocess_data(sample_raw_data, in_memory_path)
+    stats = preprocess_data_streaming(sample_raw_data, streaming_path, chunksize=chunksize)
+    assert stats['rows'] == 5
+    assert stats['age_median'] == 30.5
+    with open(in_memory_path, 'rb') as a, open(streaming_path, 'rb') as b:
+        assert a.read() == b.read()
+
+def test_quantile_sketch_approximate_median():
+    """Uji bahwa sketch tetap akurat setelah beralih dari mode tepat ke mode aproksimasi."""
+    rng = np.random.default_rng(0)
+    values = rng.gamma(3, 10, 200_000)
+    sketch = QuantileSketch(max_exact=10_000, k=1024)
+    for chunk in np.array_split(values, 50):
+        sketch.update(chunk)
+    # Galat peringkat kecil dan memori jauh di bawah jumlah nilai
+    assert abs((values < sketch.median()).mean() - 0.5) < 0.01
+    assert sum(level.size for level in sketch._levels) < 20_000
+
+def test_preprocessor_round_trip_matches_training(sample_raw_data, output_path, tmp_path):
+    """Uji bahwa preprocessor tersimpan mengubah record mentah persis seperti saat training."""
+    df_clean = preprocess_data(sample_raw_data, output_path)
+    preprocessor = TitanicPreprocessor.load(os.path.join(os.path.dirname(output_path), "preprocessor.json"))
+
+    raw = pd.read_csv(sample_raw_data)
+    records = raw.drop(columns=['Survived']).replace({np.nan: None}).to_dict('records')
+    X = preprocessor.transform_features(records)
+    expected = df_clean.drop(columns=['Survived']).to_numpy(dtype=np.float64)
+    np.testing.assert_array_equal(X, expected)
+
+def test_transform_features_rejects_missing_required(sample_raw_data, output_path):
+    """Uji bahwa kolom wajib yang kosong ditolak (Age dan Embarked boleh kosong)."""
+    preprocess_data(sample_raw_data, output_path)
+    preprocessor = TitanicPreprocessor.load(os.path.join(os.path.dirname(output_path), "preprocessor.json"))
+    with pytest.raises(ValueError, match="Fare"):
+        preprocessor.transform_features([{'Pclass': 3, 'Sex': 'male', 'SibSp': 0, 'Parch': 0}])
+
+def test_transform_features_rejects_unknown_embarked(sample_raw_data, output_path):
+    """Uji bahwa pelabuhan yang tidak dikenal ditolak, bukan dienkode seperti kategori pertama."""
+    preprocess_data(sample_raw_data, output_path)
+    preprocessor = TitanicPreprocessor.load(os.path.join(os.path.dirname(output_path), "preprocessor.json"))
+    record = {'Pclass': 3, 'Sex': 'male', 'Age': 22, 'SibSp': 0, 'Parch': 0, 'Fare': 7.25}
+    assert preprocessor.transform_features([dict(record, Embarked=None)]).shape[0] == 1
+    with pytest.raises(ValueError, match="Embarked"):
+        preprocessor.transform_features([dict(record, Embarked='X')])
+
+@pytest.mark.parametrize("ext", [".feather", ".parquet"])
+def test_columnar_output_matches_csv(sample_raw_data, tmp_path, ext):
+    """Uji bahwa salinan kolumnar berisi data yang sama dengan dtype float64/int8."""
+    pytest.importorskip("pyarrow")
+    csv_path = str(tmp_path / "titanic_preprocessing.csv")
+    preprocess_data(sample_raw_data, csv_path, columnar_path=str(tmp_path / f"titanic_preprocessing{ext}"))
+
+    X, y, path = load_dataset(search_dirs=[str(tmp_path)])
+    assert path.endswith(ext)
+    assert (X.dtypes == np.float64).all() and y.dtype == np.int8
+    expected = pd.read_csv(csv_path)
+    np.testing.assert_array_equal(X.to_numpy(), expected.drop(columns='Survived').to_numpy(dtype=np.float64))
+    np.testing.assert_array_equal(y.to_numpy(), expected['Survived'].to_numpy())
+
+def test_load_dataset_prefers_newest_file(sample_raw_data, tmp_path):
+    """Uji bahwa CSV yang dibuat ulang tidak tertutupi salinan Feather yang lebih lama."""
+    pytest.importorskip("pyarrow")
+    csv_path = str(tmp_path / "titanic_preprocessing.csv")
+    feather_path = str(tmp_path / "titanic_preprocessing.feather")
+    preprocess_data(sample_raw_data, csv_path, columnar_path=feather_path)
+    assert load_dataset(search_dirs=[str(tmp_path)])[2] == feather_path
+    stat = os.stat(feather_path)
+    os.utime(csv_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert load_dataset(search_dirs=[str(tmp_path)])[2] == csv_path
+
+def test_streaming_columnar_matches_in_memory(sample_raw_data, tmp_path):
+    """Uji bahwa salinan kolumnar mode streaming (ditulis per chunk) sama dengan mode biasa."""
+    pytest.importorskip("pyarrow")
+    (tmp_path / "a").mkdir()
+    (tmp_path / "b").mkdir()
+    preprocess_data(sample_raw_data, str(tmp_path / "a" / "titanic_preprocessing.csv"),
+                    columnar_path=str(tmp_path / "a" / "titanic_preprocessing.feather"))
+    preprocess_data_streaming(sample_raw_data, str(tmp_path / "b" / "titanic_preprocessing.csv"), chunksize=2,
+                              columnar_path=str(tmp_path / "b" / "titanic_preprocessing.feather"))
+    X_a, y_a, _ = load_dataset(search_dirs=[str(tmp_path / "a")])
+    X_b, y_b, _ = load_dataset(search_dirs=[str(tmp_path / "b")])
+    pd.testing.assert_frame_equal(X_a, X_b)
+    pd.testing.assert_series_equal(y_a, y_b)
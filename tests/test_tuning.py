@@ -0,0 +1,105 @@
+import pytest
+import os
+import sys
+
+# modelling_tuning mengimpor dataset.py dari foldernya sendiri
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'Membangun_model')))
+
+pytest.importorskip("seaborn")
+pytest.importorskip("dagshub")
+import modelling_tuning
+
+def test_grid_order_matches_nested_loops():
+    """Uji bahwa grid mengikuti urutan loop bersarang n_estimators x max_depth sebelumnya."""
+    grid = modelling_tuning.build_grid([50, 100], [5, 10])
+    assert [modelling_tuning.make_run_name(p) for p in grid] == ["RF_n50_d5", "RF_n50_d10", "RF_n100_d5", "RF_n100_d10"]
+    sampled = modelling_tuning.sample_configs(modelling_tuning.build_grid([10, 20, 30], [3, 5, 7]), n_iter=4)
+    assert len(sampled) == 4 and len({tuple(p.items()) for p in sampled}) == 4
+
+@pytest.mark.parametrize("n_configs, expected", [
+    (1, [(1, 712)]),
+    (9, [(9, 79), (3, 237), (1, 712)]),
+    (6, [(6, 237), (2, 712)]),
+])
+def test_halving_schedule(n_configs, expected):
+    """Uji jadwal successive halving: kandidat berkurang, sampel bertambah hingga seluruh data."""
+    assert modelling_tuning.halving_schedule(n_configs, n_train=712, factor=3) == expected
+    with pytest.raises(ValueError):
+        modelling_tuning.halving_schedule(n_configs, n_train=712, factor=1)
+
+@pytest.fixture
+def worker_data():
+    """Split train/test data Titanic seperti di train_with_tuning."""
+    from sklearn.model_selection import train_test_split
+    from dataset import load_dataset
+    import numpy as np
+
+    X, y, _ = load_dataset(search_dirs=[os.path.join(os.path.dirname(__file__), '..', 'Membangun_model')])
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    return X_train, X_test, y_train, y_test, np.arange(len(X_train))
+
+def new_experiment(tmp_path):
+    import mlflow
+    tracking_uri = (tmp_path / "mlruns").as_uri()
+    mlflow.set_tracking_uri(tracking_uri)
+    return tracking_uri, mlflow.create_experiment("tuning")
+
+def test_warm_start_ladder_matches_independent_fits(tmp_path, worker_data):
+    """Uji bahwa tangga warm_start memberi metrik yang sama dengan melatih tiap ukuran dari awal."""
+    modelling_tuning.init_worker(worker_data, *new_experiment(tmp_path))
+
+    ladder = modelling_tuning.evaluate_ladder({"max_depth": 5}, [10, 5, 20], log_artifacts=False)
+    assert [r["params"]["n_estimators"] for r in ladder] == [5, 10, 20]
+    for result in ladder:
+        scratch = modelling_tuning.evaluate_config(result["params"], "scratch", log_artifacts=False)
+        for metric in ("accuracy", "precision", "recall", "f1_score"):
+            assert result[metric] == scratch[metric]
+
+    assert modelling_tuning.group_ladders(modelling_tuning.build_grid([50, 100], [5, 10])) == [
+        ({"max_depth": 5}, [50, 100]), ({"max_depth": 10}, [50, 100])]
+
+def test_cheap_logging_logs_only_improving_models(tmp_path, worker_data, monkeypatch):
+    """Uji mode cheap: model hanya dilog untuk run yang mengalahkan skor terbaik, plot diupload di background."""
+    import multiprocessing
+    from mlflow.tracking import MlflowClient
+    monkeypatch.chdir(tmp_path)
+    X_train, _, y_train, _, _ = worker_data
+    signature = modelling_tuning.mlflow.models.infer_signature(X_train.head(), y_train.head().to_numpy())
+    modelling_tuning.init_worker(worker_data, *new_experiment(tmp_path), logging_mode="cheap", signature=signature,
+                                 best_score=multiprocessing.Value('d', float('-inf')), pip_requirements=[])
+
+    uploader = modelling_tuning.ArtifactUploader(max_workers=2)
+    params = {"n_estimators": 5, "max_depth": 3}
+    results = modelling_tuning.run_jobs([((params, "first"), {}), ((params, "repeat"), {})], on_result=uploader.submit)
+    uploader.close()
+
+    assert [r["model_logged"] for r in results] == [True, False]  # akurasi sama tidak mengalahkan yang terbaik
+    client = MlflowClient()
+    artifacts = [{a.path for a in client.list_artifacts(r["run_id"])} for r in results]
+    assert artifacts == [{"confusion_matrix.png", "model"}, {"confusion_matrix.png"}]
+    # Folder sementara per run dihapus setelah diupload
+    assert os.listdir(tmp_path / "temp_artifacts") == []
+
+def test_cross_validation_folds_and_aggregation(tmp_path, worker_data):
+    """Uji fold stratified yang dibagi lewat memmap dan agregasi mean/std per config."""
+    import numpy as np
+    from mlflow.tracking import MlflowClient
+    X_train, _, y_train, _, _ = worker_data
+    fold_ids = modelling_tuning.make_fold_ids(y_train, 4)
+    assert sorted(np.unique(fold_ids)) == [0, 1, 2, 3]
+    # Stratified: proporsi kelas tiap fold mendekati keseluruhan
+    for fold in range(4):
+        assert abs(y_train.to_numpy()[fold_ids == fold].mean() - y_train.mean()) < 0.02
+
+    fold_path = tmp_path / "fold_ids.npy"
+    np.save(fold_path, fold_ids)
+    tracking_uri, experiment_id = new_experiment(tmp_path)
+    parent = MlflowClient().create_run(experiment_id).info.run_id
+    modelling_tuning.init_worker(worker_data, tracking_uri, experiment_id, parent, cv=(X_train, y_train, str(fold_path)))
+    assert isinstance(modelling_tuning._worker_state['fold_ids'], np.memmap)
+
+    [result] = modelling_tuning.run_cv_search([{"n_estimators": 5, "max_depth": 3}], 4, experiment_id, parent)
+    history = MlflowClient().get_metric_history(result["run_id"], "fold_accuracy")
+    assert [m.step for m in history] == [0, 1, 2, 3]
+    assert result["accuracy"] == pytest.approx(np.mean([m.value for m in history]))
+    assert result["accuracy_std"] == pytest.approx(np.std([m.value for m in history]))